@@ -0,0 +1 @@
+"""Benchmarks of the search algorithms and the Python/Java conversion layer."""
@@ -0,0 +1,249 @@
+"""Microbenchmarks of the Python/Java conversion layer, with a regression gate.
+
+Each case times one conversion path on synthetic inputs of several sizes
+and reports its throughput. The paths are:
+
+* ``pandas_data_to_tetrad`` on continuous, discrete and mixed frames
+  (cells/s);
+* ``tetrad_data_to_pandas`` (cells/s);
+* ``tetrad_matrix_to_numpy`` on a square Tetrad ``Matrix`` (cells/s);
+* ``graph_to_matrix`` (edges/s);
+* ``graphs_to_probs`` over a set of resample graphs (edges/s);
+* ``CausalDiscovery._save_graph`` with the default output formats (edges/s).
+
+Every case runs ``--repeats`` times and the fastest run is kept. With
+``--baseline``, the exit status is 1 if any case is slower than the baseline
+by more than ``--threshold`` (a fraction), so the module can gate changes.
+``--update-baseline`` writes the current results as the new baseline.
+
+Usage::
+
+    python -m benchmarks.conversion --baseline benchmarks/baselines/conversion.csv
+    python -m benchmarks.conversion --baseline benchmarks/baselines/conversion.csv --update-baseline
+"""
+
+import argparse
+import logging
+import sys
+import tempfile
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.endpoint_graph import EndpointGraph
+from src.graph_io import ARROW, TAIL
+
+logger = logging.getLogger(__name__)
+
+DATA_SIZES = [(1_000, 10), (10_000, 20), (10_000, 50)]
+GRAPH_SIZES = [50, 200, 500]
+NUM_RESAMPLES = 10
+
+# A case builds its input once and returns a function to time and the units it converts.
+Case = Callable[[], Tuple[Callable[[], Any], int]]
+
+
+def random_frame(rows: int, columns: int, kind: str, seed: int = 0) -> pd.DataFrame:
+    """Continuous (float), discrete (three string categories) or mixed (half each) columns."""
+    rng = np.random.default_rng(seed)
+    num_discrete = {"continuous": 0, "discrete": columns, "mixed": columns // 2}[kind]
+    frame = {}
+    for col in range(columns):
+        if col < num_discrete:
+            frame[f"X{col + 1}"] = rng.choice(["a", "b", "c"], size=rows)
+        else:
+            frame[f"X{col + 1}"] = rng.standard_normal(rows)
+    return pd.DataFrame(frame)
+
+
+def random_graph(num_nodes: int, avg_degree: float = 4.0, seed: int = 0) -> EndpointGraph:
+    """Random DAG over X1..Xp with the given expected degree."""
+    rng = np.random.default_rng(seed)
+    edges = np.triu(rng.random((num_nodes, num_nodes)) < avg_degree / (num_nodes - 1), 1)
+    graph = EndpointGraph([f"X{i + 1}" for i in range(num_nodes)])
+    graph.matrix[edges] = ARROW
+    graph.matrix[edges.T] = TAIL
+    return graph
+
+
+def _data_to_tetrad(rows: int, columns: int, kind: str) -> Case:
+    def build():
+        from src.pytetrad import translate as tr
+
+        frame = random_frame(rows, columns, kind)
+        return (lambda: tr.pandas_data_to_tetrad(frame)), rows * columns
+
+    return build
+
+
+def _data_to_pandas(rows: int, columns: int) -> Case:
+    def build():
+        from src.pytetrad import translate as tr
+
+        dataset = tr.pandas_data_to_tetrad(random_frame(rows, columns, "continuous"))
+        return (lambda: tr.tetrad_data_to_pandas(dataset)), rows * columns
+
+    return build
+
+
+def _matrix_to_numpy(size: int) -> Case:
+    def build():
+        import jpype
+        from edu.cmu.tetrad.util import Matrix
+
+        from src.pytetrad import translate as tr
+
+        values = np.random.default_rng(0).standard_normal((size, size))
+        matrix = Matrix(jpype.JArray(jpype.JDouble, 2)(values.tolist()))
+        return (lambda: tr.tetrad_matrix_to_numpy(matrix)), size * size
+
+    return build
+
+
+def _graph_to_matrix(num_nodes: int) -> Case:
+    def build():
+        from src.pytetrad import translate as tr
+
+        graph = random_graph(num_nodes)
+        java = graph.to_tetrad()
+        return (lambda: tr.graph_to_matrix(java)), graph.num_edges
+
+    return build
+
+
+def _graphs_to_probs(num_nodes: int) -> Case:
+    def build():
+        from src.pytetrad.visualize import graphs_to_probs
+
+        graphs = [random_graph(num_nodes, seed=seed) for seed in range(NUM_RESAMPLES)]
+        javas = [graph.to_tetrad() for graph in graphs]
+        edges = sum(graph.num_edges for graph in graphs)
+        return (lambda: graphs_to_probs(javas)), edges
+
+    return build
+
+
+def _save_graph(num_nodes: int, directory: Path) -> Case:
+    def build():
+        from src.causal_discovery import CausalDiscovery
+
+        graph = random_graph(num_nodes)
+        search = SimpleNamespace(java=graph.to_tetrad())
+        output_path = directory / f"graph_{num_nodes}.txt"
+        return (lambda: CausalDiscovery._save_graph(search, output_path)), graph.num_edges
+
+    return build
+
+
+def cases(directory: Path) -> Dict[Tuple[str, str], Tuple[Case, str]]:
+    """Every (benchmark, size) case with its unit."""
+    table: Dict[Tuple[str, str], Tuple[Case, str]] = {}
+    for rows, columns in DATA_SIZES:
+        size = f"{rows}x{columns}"
+        for kind in ("continuous", "discrete", "mixed"):
+            table[(f"pandas_data_to_tetrad_{kind}", size)] = (
+                _data_to_tetrad(rows, columns, kind), "cells",
+            )
+        table[("tetrad_data_to_pandas", size)] = (_data_to_pandas(rows, columns), "cells")
+    for num_nodes in GRAPH_SIZES:
+        size = f"p={num_nodes}"
+        table[("tetrad_matrix_to_numpy", size)] = (_matrix_to_numpy(num_nodes), "cells")
+        table[("graph_to_matrix", size)] = (_graph_to_matrix(num_nodes), "edges")
+        table[("graphs_to_probs", size)] = (_graphs_to_probs(num_nodes), "edges")
+        table[("save_graph", size)] = (_save_graph(num_nodes, directory), "edges")
+    return table
+
+
+def run_cases(repeats: int = 3, only: Sequence[str] = ()) -> pd.DataFrame:
+    """Time every case, keeping the fastest of ``repeats`` runs."""
+    from src.pytetrad.TetradSearch import TetradSearch  # noqa: F401 (starts the JVM)
+
+    rows = []
+    with tempfile.TemporaryDirectory() as directory:
+        for (benchmark, size), (build, unit) in cases(Path(directory)).items():
+            if only and benchmark not in only:
+                continue
+            run, units = build()
+            timings = []
+            for _ in range(repeats):
+                start = time.perf_counter()
+                run()
+                timings.append(time.perf_counter() - start)
+            seconds = min(timings)
+            rows.append(
+                {
+                    "benchmark": benchmark,
+                    "size": size,
+                    "units": units,
+                    "unit": unit,
+                    "seconds": seconds,
+                    "throughput": units / seconds if seconds > 0 else np.inf,
+                }
+            )
+            logger.info(
+                "%s %s: %.4f s, %.0f %s/s", benchmark, size, seconds, rows[-1]["throughput"], unit
+            )
+    return pd.DataFrame(rows)
+
+
+def regressions(
+    results: pd.DataFrame, baseline: pd.DataFrame, threshold: float
+) -> pd.DataFrame:
+    """Cases whose time grew by more than ``threshold`` relative to the baseline."""
+    merged = results.merge(
+        baseline[["benchmark", "size", "seconds", "throughput"]],
+        on=["benchmark", "size"],
+        suffixes=("", "_baseline"),
+    )
+    merged["slowdown"] = merged["seconds"] / merged["seconds_baseline"] - 1
+    return merged[merged["slowdown"] > threshold]
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the Python/Java conversion layer.")
+    parser.add_argument("--output", type=Path, help="CSV table of results")
+    parser.add_argument("--baseline", type=Path, help="Baseline CSV to gate against")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="Allowed slowdown against the baseline, as a fraction")
+    parser.add_argument("--repeats", type=int, default=3, help="Runs per case; the fastest is kept")
+    parser.add_argument("--only", nargs="*", default=[], help="Run only these benchmarks")
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="Write the results as the new baseline instead of gating")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(message)s")
+    results = run_cases(args.repeats, args.only)
+    if args.output is not None:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        results.to_csv(args.output, index=False)
+        logger.info("Wrote %d cases to %s", len(results), args.output)
+
+    if args.baseline is None:
+        return 0
+    if args.update_baseline:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        results.to_csv(args.baseline, index=False)
+        logger.info("Stored the results as the baseline %s", args.baseline)
+        return 0
+    if not args.baseline.exists():
+        logger.error("No baseline at %s; create it with --update-baseline", args.baseline)
+        return 2
+
+    slower = regressions(results, pd.read_csv(args.baseline), args.threshold)
+    for row in slower.itertuples():
+        logger.error(
+            "%s %s is %.0f%% slower than the baseline (%.4f s vs %.4f s)",
+            row.benchmark, row.size, 100 * row.slowdown, row.seconds, row.seconds_baseline,
+        )
+    if len(slower):
+        return 1
+    logger.info("No case is more than %.0f%% slower than %s", 100 * args.threshold, args.baseline)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
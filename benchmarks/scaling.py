@@ -0,0 +1,339 @@
+"""Scaling benchmarks of the search algorithms on simulated data.
+
+Datasets come from the ``simulate`` generators (``simulateContinuous``,
+``simulateDiscrete`` and ``simulateLeeHastie`` for mixed data) over a grid of
+sample sizes, numbers of variables and average degrees. Every algorithm of
+``CausalDiscovery._run_algorithm`` is run on each dataset with the grid's
+test and score for the data type, with and without bootstrap. Each run
+records:
+
+* wall-clock and CPU seconds (CPU time of the whole process, JVM threads
+  included);
+* the peak JVM heap, as the sum of the peak usage of the heap memory pools
+  (an upper bound, since pools need not peak together);
+* accuracy against the true graph with ``evaluation.evaluate_batch``. The
+  truth is the CPDAG of the simulated DAG, or the DAG itself for algorithms
+  that output DAGs.
+
+Results go to a CSV table, one row per run. With ``--baseline`` they are
+compared with a stored table of an earlier run: median times, heap and
+accuracy per grid cell, with the cells whose time or heap grew by more than
+``--tolerance`` flagged. ``--update-baseline`` stores the new results as the
+baseline. Cells that are too slow (``max_seconds``) stop the combination from
+running on larger cells, and the skipped cells are listed in the table.
+
+Usage::
+
+    python -m benchmarks.scaling --grid benchmarks/scaling.yaml \\
+        --output benchmarks/results/scaling.csv --baseline benchmarks/baselines/scaling.csv
+"""
+
+import argparse
+import itertools
+import json
+import logging
+import os
+import platform
+import shutil
+import time
+import zlib
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.endpoint_graph import EndpointGraph
+from src.evaluation import align, evaluate_batch
+from src.load_parse import load_yaml
+
+logger = logging.getLogger(__name__)
+
+SIMULATORS = {
+    "continuous": "simulateContinuous",
+    "discrete": "simulateDiscrete",
+    "mixed": "simulateLeeHastie",
+}
+
+# Algorithms whose output is a DAG; the others are scored against the CPDAG.
+DAG_ALGORITHMS = ("run_dagma", "run_direct_lingam")
+
+KEY_COLUMNS = ["data_type", "n", "p", "avg_degree", "algorithm", "bootstrap"]
+TIME_COLUMNS = ["wall_seconds", "cpu_seconds", "heap_peak_mb"]
+ACCURACY_COLUMNS = ["adj_f1", "arrow_f1", "shd"]
+
+
+def expand_grid(grid: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Datasets of the grid, smallest first: data type, n, p, degree and repeat."""
+    sizes = grid.get("sizes") or {}
+    datasets = []
+    for data_type in grid.get("data_types") or {}:
+        if data_type not in SIMULATORS:
+            raise ValueError(
+                f"Unsupported data type '{data_type}'. Choices: {list(SIMULATORS)}"
+            )
+        for n, p, avg_degree, repeat in itertools.product(
+            sizes.get("n", [1000]),
+            sizes.get("p", [20]),
+            sizes.get("avg_degree", [2]),
+            range(int(grid.get("repeats", 1))),
+        ):
+            datasets.append(
+                {
+                    "data_type": data_type,
+                    "n": int(n),
+                    "p": int(p),
+                    "avg_degree": float(avg_degree),
+                    "repeat": repeat,
+                }
+            )
+    return sorted(datasets, key=lambda d: (d["p"], d["n"], d["avg_degree"], d["repeat"]))
+
+
+def run_configurations(
+    grid: Dict[str, Any], data_type: str
+) -> List[Tuple[str, int, Dict[str, Any]]]:
+    """(algorithm, number of resamples, configuration) for one data type."""
+    base = dict(grid["data_types"][data_type] or {})
+    if grid.get("num_threads") is not None:
+        base["num_threads"] = grid["num_threads"]
+    configurations = []
+    for algorithm, spec in (grid.get("algorithms") or {}).items():
+        spec = spec or {}
+        if data_type not in spec.get("data_types", SIMULATORS):
+            continue
+        for bootstrap in grid.get("bootstrap") or [0]:
+            if not isinstance(bootstrap, dict):
+                bootstrap = {"numberResampling": int(bootstrap)}
+            configuration = {
+                **base,
+                "algorithm_name": algorithm,
+                "algorithm_params": spec.get("params") or {},
+            }
+            resamples = int(bootstrap.get("numberResampling", 0))
+            if resamples:
+                configuration["bootstrap_params"] = bootstrap
+            configurations.append((algorithm, resamples, configuration))
+    return configurations
+
+
+def dataset_seed(dataset: Dict[str, Any], seed: int) -> int:
+    """Seed of a grid dataset; the same cell gets the same data in every grid."""
+    key = "{data_type}/{n}/{p}/{avg_degree}/{repeat}".format(**dataset)
+    return seed + zlib.crc32(key.encode()) % 1_000_000
+
+
+def simulate(dataset: Dict[str, Any], seed: int):
+    """Tetrad data set and true DAG of one grid dataset."""
+    from src.pytetrad.TetradSearch import TetradSearch  # noqa: F401 (starts the JVM)
+    from edu.cmu.tetrad.util import RandomUtil
+
+    from src.pytetrad import simulate as sim
+
+    RandomUtil.getInstance().setSeed(seed)
+    generator = getattr(sim, SIMULATORS[dataset["data_type"]])
+    return generator(
+        num_meas=dataset["p"], avg_deg=dataset["avg_degree"], samp_size=dataset["n"]
+    )
+
+
+def _heap_pools():
+    from java.lang.management import ManagementFactory, MemoryType
+
+    return [
+        pool
+        for pool in ManagementFactory.getMemoryPoolMXBeans()
+        if pool.getType() == MemoryType.HEAP
+    ]
+
+
+def reset_heap_peak() -> None:
+    """Collect garbage and restart the peak tracking of the heap pools."""
+    from java.lang import System
+
+    System.gc()
+    for pool in _heap_pools():
+        pool.resetPeakUsage()
+
+
+def heap_peak_mb() -> float:
+    return sum(pool.getPeakUsage().getUsed() for pool in _heap_pools()) / 2**20
+
+
+def run_search(data, configuration: Dict[str, Any]) -> Tuple[Any, Dict[str, float]]:
+    """Run one configured search and measure it.
+
+    :return: The result graph and its wall seconds, CPU seconds and heap peak.
+    """
+    from src.causal_discovery import CausalDiscovery
+    from src.parallel_search import configure_search
+    from src.pytetrad.TetradSearch import TetradSearch
+
+    search = TetradSearch(data)
+    configure_search(search, configuration, None)
+    CausalDiscovery._configure_bootstrap(search, configuration.get("bootstrap_params"))
+    reset_heap_peak()
+    wall, cpu = time.perf_counter(), time.process_time()
+    CausalDiscovery._run_algorithm(
+        search,
+        configuration["algorithm_name"],
+        configuration.get("algorithm_params") or {},
+    )
+    measures = {
+        "wall_seconds": time.perf_counter() - wall,
+        "cpu_seconds": time.process_time() - cpu,
+        "heap_peak_mb": heap_peak_mb(),
+    }
+    return search.java, measures
+
+
+def score(truth: EndpointGraph, graph) -> Dict[str, float]:
+    """Accuracy of a Java result graph against a truth over the same nodes."""
+    estimate = EndpointGraph.from_tetrad(graph)
+    matrix = align(estimate.names, estimate.matrix, truth.names)
+    metrics = evaluate_batch(truth.matrix, matrix[None])
+    return {name: float(values[0]) for name, values in metrics.items()}
+
+
+def _dominates(cell: Dict[str, Any], limit: Dict[str, Any]) -> bool:
+    return all(cell[key] >= limit[key] for key in ("n", "p", "avg_degree"))
+
+
+def run_grid(grid: Dict[str, Any]) -> pd.DataFrame:
+    """Run every dataset and configuration of the grid; one row per run."""
+    from src.pytetrad.TetradSearch import TetradSearch  # noqa: F401 (starts the JVM)
+    import edu.cmu.tetrad.graph as gr
+
+    max_seconds = float(grid.get("max_seconds", np.inf))
+    limits: Dict[Tuple[str, str, int], Dict[str, Any]] = {}
+    rows = []
+    for dataset in expand_grid(grid):
+        seed = dataset_seed(dataset, int(grid.get("seed", 0)))
+        data, dag = simulate(dataset, seed)
+        truths = {
+            "dag": EndpointGraph.from_tetrad(dag),
+            "cpdag": EndpointGraph.from_tetrad(gr.GraphTransforms.dagToCpdag(dag)),
+        }
+        for algorithm, resamples, configuration in run_configurations(
+            grid, dataset["data_type"]
+        ):
+            row = {**dataset, "algorithm": algorithm, "bootstrap": resamples, "seed": seed}
+            limit = limits.get((dataset["data_type"], algorithm, resamples))
+            if limit is not None and _dominates(dataset, limit):
+                rows.append({**row, "status": "skipped"})
+                continue
+
+            logger.info(
+                "%s n=%d p=%d degree=%g: %s, %d resamples",
+                dataset["data_type"], dataset["n"], dataset["p"], dataset["avg_degree"],
+                algorithm, resamples,
+            )
+            try:
+                graph, measures = run_search(data, configuration)
+                truth = truths["dag" if algorithm in DAG_ALGORITHMS else "cpdag"]
+                rows.append({**row, "status": "ok", **measures, **score(truth, graph)})
+            except Exception as err:
+                logger.warning("%s failed: %s", algorithm, err)
+                rows.append({**row, "status": f"error: {err}"})
+                continue
+            if measures["wall_seconds"] > max_seconds:
+                limits[(dataset["data_type"], algorithm, resamples)] = dataset
+    return pd.DataFrame(rows)
+
+
+def environment() -> Dict[str, Any]:
+    """Machine and JVM details stored next to the results."""
+    from java.lang import Runtime, System
+
+    return {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "java": str(System.getProperty("java.version")),
+        "jvm_max_heap_mb": Runtime.getRuntime().maxMemory() / 2**20,
+    }
+
+
+def _medians(results: pd.DataFrame) -> pd.DataFrame:
+    completed = results[results["status"] == "ok"]
+    return completed.groupby(KEY_COLUMNS)[TIME_COLUMNS + ACCURACY_COLUMNS].median()
+
+
+def compare(
+    results: pd.DataFrame, baseline: pd.DataFrame, tolerance: float = 0.2
+) -> pd.DataFrame:
+    """Median measures per grid cell against the baseline.
+
+    Ratios above ``1 + tolerance`` for time or heap flag a regression. So do
+    F1 drops of more than ``tolerance / 4`` and SHD increases of more than a
+    ``tolerance`` fraction. Cells run in only one of the tables have NaN
+    ratios and are not flagged.
+    """
+    current, previous = _medians(results), _medians(baseline)
+    table = current.join(previous, how="outer", rsuffix="_baseline")
+    flags = pd.Series("", index=table.index)
+    for column in TIME_COLUMNS:
+        ratio = table[column] / table[f"{column}_baseline"]
+        table[f"{column}_ratio"] = ratio
+        flags = flags.where(~(ratio > 1 + tolerance), flags + f"{column} ")
+    for column in ("adj_f1", "arrow_f1"):
+        drop = table[f"{column}_baseline"] - table[column]
+        flags = flags.where(~(drop > tolerance / 4), flags + f"{column} ")
+    shd_growth = table["shd"] - table["shd_baseline"]
+    flags = flags.where(
+        ~(shd_growth > tolerance * table["shd_baseline"].clip(lower=1)), flags + "shd "
+    )
+    table["regressions"] = flags.str.strip()
+    return table.reset_index()
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark algorithm scaling on simulated data.")
+    parser.add_argument("--grid", type=Path, default=Path(__file__).with_name("scaling.yaml"),
+                        help="YAML grid of sizes, data types, algorithms and bootstrap settings")
+    parser.add_argument("--output", type=Path, required=True, help="CSV table of results")
+    parser.add_argument("--baseline", type=Path, help="Results of an earlier run to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="Relative slowdown (and heap growth) flagged as a regression")
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="Store these results as the baseline after comparing")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(message)s")
+    grid = load_yaml(args.grid)
+    results = run_grid(grid)
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    results.to_csv(args.output, index=False)
+    with args.output.with_suffix(".json").open("w", encoding="utf-8") as fh:
+        json.dump({"grid": grid, "environment": environment()}, fh, indent=2, default=str)
+    logger.info("Wrote %d runs to %s", len(results), args.output)
+
+    if args.baseline is not None and args.baseline.exists():
+        report = compare(results, pd.read_csv(args.baseline), args.tolerance)
+        report_path = args.output.with_name(f"{args.output.stem}_comparison.csv")
+        report.to_csv(report_path, index=False)
+        flagged = report[report["regressions"] != ""]
+        logger.info(
+            "Compared %d cells with %s: %d regressions; report in %s",
+            len(report), args.baseline, len(flagged), report_path,
+        )
+        for row in flagged.itertuples():
+            logger.warning(
+                "%s n=%d p=%d degree=%g %s bootstrap=%d: %s",
+                row.data_type, row.n, row.p, row.avg_degree, row.algorithm, row.bootstrap,
+                row.regressions,
+            )
+    elif args.baseline is not None:
+        logger.info("No baseline at %s yet", args.baseline)
+
+    if args.update_baseline:
+        if args.baseline is None:
+            raise ValueError("--update-baseline needs --baseline")
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(args.output, args.baseline)
+        logger.info("Stored the results as the baseline %s", args.baseline)
+
+
+if __name__ == "__main__":
+    main()
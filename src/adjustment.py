@@ -0,0 +1,40 @@
+"""Helpers for batched adjustment-set queries on one graph.
+
+Reachability along possibly causal paths is computed once per graph in
+NumPy, so pairs without such a path can be skipped without asking Tetrad.
+"""
+
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+EdgeTuple = Tuple[str, str, str, str]
+
+
+def _possibly_directed(end_a: str, end_b: str) -> bool:
+    """Whether an edge with these endpoints can be a -> b (undirected counts)."""
+    return (end_a != "ARROW" and end_b != "TAIL") or (end_a, end_b) == ("TAIL", "TAIL")
+
+
+def ancestor_matrix(names: Sequence[str], edges: List[EdgeTuple]) -> np.ndarray:
+    """Boolean matrix with [i, j] set when a possibly causal path leads from i to j.
+
+    Directed, undirected and circle-marked edges are followed in every
+    direction they could point.
+    """
+    index = {name: i for i, name in enumerate(names)}
+    p = len(names)
+    reach = np.zeros((p, p), dtype=bool)
+    for a, b, end_a, end_b in edges:
+        if _possibly_directed(end_a, end_b):
+            reach[index[a], index[b]] = True
+        if _possibly_directed(end_b, end_a):
+            reach[index[b], index[a]] = True
+
+    # Repeated squaring of the path relation; log2(p) boolean products.
+    while True:
+        paths = reach.astype(np.float32)
+        extended = reach | ((paths @ paths) > 0)
+        if np.array_equal(extended, reach):
+            return reach
+        reach = extended
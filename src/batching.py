@@ -0,0 +1,83 @@
+"""Coalescing of concurrent single-query calls into batched evaluations.
+
+Tetrad's parallel searches call Python tests one query at a time from many
+Java threads. :class:`BatchQueue` lets each caller enqueue its query; the
+first caller to arrive becomes the leader and evaluates everything pending
+in one batched call while the followers block (without holding the GIL) on
+their futures. A leader that is alone evaluates its query right away; only
+when other callers are waiting does it wait a short window for more.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Hashable, List, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class BatchQueue:
+    """Turns concurrent ``submit`` calls into calls of ``evaluate(queries)``.
+
+    :param evaluate: Function mapping a list of queries to a list of results.
+    :param window: Seconds the leader waits for more queries before evaluating,
+        when other callers are already waiting.
+    :param max_batch: Maximum number of queries per ``evaluate`` call.
+    """
+
+    def __init__(
+        self,
+        evaluate: Callable[[List[Hashable]], Sequence[Any]],
+        window: float = 0.002,
+        max_batch: int = 1024,
+    ):
+        self.evaluate = evaluate
+        self.window = window
+        self.max_batch = max_batch
+        self.batches = 0
+        self.queries = 0
+        self._pending: List[Tuple[Hashable, Future]] = []
+        self._leader_active = False
+        self._lock = threading.Lock()
+        self._arrived = threading.Condition(self._lock)
+
+    def submit(self, query: Hashable) -> Any:
+        """Evaluate one query, possibly as part of a batch with other threads."""
+        future: Future = Future()
+        with self._lock:
+            self._pending.append((query, future))
+            lead = not self._leader_active
+            self._leader_active = True
+            self._arrived.notify()
+
+        if lead:
+            self._lead()
+        return future.result()
+
+    def _lead(self) -> None:
+        while True:
+            with self._lock:
+                deadline = time.monotonic() + self.window
+                while 1 < len(self._pending) < self.max_batch:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._arrived.wait(remaining)
+                batch = self._pending[: self.max_batch]
+                self._pending = self._pending[self.max_batch :]
+                if not batch:
+                    self._leader_active = False
+                    return
+
+            try:
+                results = self.evaluate([query for query, _ in batch])
+            except Exception as err:
+                for _, future in batch:
+                    future.set_exception(err)
+                continue
+
+            self.batches += 1
+            self.queries += len(batch)
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
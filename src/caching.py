@@ -0,0 +1,119 @@
+"""Memory-bounded LRU caches that can persist to disk per dataset."""
+
+import hashlib
+import logging
+import pickle
+import sys
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Hashable, Optional
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+def data_hash(df: pd.DataFrame) -> str:
+    """Stable content hash of a dataset: column names, dtypes and values."""
+    digest = hashlib.sha1()
+    digest.update("\x1f".join(f"{col}:{df[col].dtype}" for col in df.columns).encode())
+    digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return digest.hexdigest()[:16]
+
+
+def _approx_size(obj: Any) -> int:
+    """Rough in-memory size of a cache key or value, following containers."""
+    size = sys.getsizeof(obj)
+    if isinstance(obj, (tuple, list, frozenset, set)):
+        size += sum(_approx_size(item) for item in obj)
+    return size
+
+
+class LruCache:
+    """Thread-safe LRU mapping capped by an approximate memory budget.
+
+    Entries are evicted least-recently-used first once their estimated size
+    exceeds ``max_memory_mb``. When ``path`` is given, earlier contents are
+    loaded from it and :meth:`save` writes the cache back.
+    """
+
+    def __init__(self, max_memory_mb: float = 256.0, path: Optional[Path] = None):
+        self.max_bytes = int(max_memory_mb * 1024 * 1024)
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._sizes: Dict[Hashable, int] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        if path is not None and path.exists():
+            self.load()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+            return default
+
+    def put(self, key: Hashable, value: Any) -> None:
+        size = _approx_size(key) + _approx_size(value)
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= self._sizes[key]
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            self._sizes[key] = size
+            self._bytes += size
+
+            while self._bytes > self.max_bytes and len(self._entries) > 1:
+                old_key, _ = self._entries.popitem(last=False)
+                self._bytes -= self._sizes.pop(old_key)
+                self.evictions += 1
+
+    def stats(self, prefix: str = "cache") -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            f"{prefix}_hits": self.hits,
+            f"{prefix}_misses": self.misses,
+            f"{prefix}_hit_rate": self.hits / lookups if lookups else 0.0,
+            f"{prefix}_entries": len(self._entries),
+            f"{prefix}_evictions": self.evictions,
+            f"{prefix}_megabytes": self._bytes / (1024 * 1024),
+        }
+
+    def load(self) -> None:
+        try:
+            with self.path.open("rb") as fh:
+                items = pickle.load(fh)
+        except Exception as err:
+            logger.warning("Ignoring unreadable cache file %s: %s", self.path, err)
+            return
+
+        for key, value in items:
+            self.put(key, value)
+        logger.info("Loaded %d cached entries from %s", len(self._entries), self.path)
+
+    def save(self) -> None:
+        if self.path is None:
+            return
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            items = list(self._entries.items())
+        tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        with tmp_path.open("wb") as fh:
+            pickle.dump(items, fh, protocol=pickle.HIGHEST_PROTOCOL)
+        tmp_path.replace(self.path)
+        logger.info("Saved %d cached entries to %s", len(items), self.path)
@@ -4,13 +4,55 @@ import logging
 import sys
 import time
 import json
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 import yaml
+import numpy as np
 import pandas as pd
+from src.caching import data_hash
+from src.ensemble import agreement_matrix, consensus_edges, edge_table, parse_algorithms
+from src.export import DEFAULT_FORMATS, export_graph, export_paths
 from src.load_parse import load_data, load_yaml
 from src.logging_config import setup_logging
+from src.markov_check import summary_table
+from src.multi_start import (
+    MULTI_START_ALGORITHMS,
+    score_summary,
+    start_orders,
+    start_seeds,
+)
+from src.partial_correlation import PartialCorrelationEngine
+from src.parallel_search import (
+    configure_search,
+    ensemble_graph,
+    graph_edges,
+    graph_from_edges,
+    graphs_from_text,
+    run_parallel_searches,
+    run_parallel_bootstrap,
+    run_parallel_starts,
+)
+from src.partition import (
+    add_overlap,
+    association_matrix,
+    correlation_blocks,
+    merge_block_edges,
+)
+from src.results_store import ResultsStore
+from src.screening import screen_pairs
+from src.shared_data import encode_dataframe
+from src.sufficient_stats import (
+    covariance_configuration,
+    resample_weights,
+    stream_moments,
+    to_tetrad_covariance,
+    update_moments,
+    weighted_covariances,
+)
+from src.targets import FULL_SEARCH, parse_targets, target_tasks, union_edges
+from src.warm_start import WARM_START_ALGORITHMS, warm_start_order
 from src.pytetrad.TetradSearch import TetradSearch
 
 logger = logging.getLogger(__name__)
@@ -37,11 +79,16 @@ class CausalDiscovery:
             logger.info("Metadata: %s", metadata_path)
 
         self.configuration = load_yaml(configuration_path)
-        self.data = load_data(data_path, metadata_path)
+        self.data_path = data_path
         self.output_path = output_path
         self.knowledge_path = knowledge_path
         self.search: Optional[TetradSearch] = None
 
+        self.output_formats: List[str] = list(
+            self.configuration.get("output_formats") or DEFAULT_FORMATS
+        )
+        export_paths(output_path, self.output_formats)
+
         self.num_threads: Optional[int] = None
         if "num_threads" in self.configuration:
             self.num_threads = int(self.configuration["num_threads"])
@@ -51,6 +98,44 @@ class CausalDiscovery:
         self.final_bootstrap: Optional[Dict[str, Any]] = None
         self.final_knowledge: Optional[Dict[str, str]] = None
         self.elapsed_seconds: Optional[float] = None
+        self.metrics: Dict[str, Any] = {}
+        self.forbidden_pairs: List[Tuple[str, str]] = []
+        self.candidate_graphs: Dict[str, Any] = {}
+
+        # Covariance mode: stream the file into sufficient statistics instead
+        # of loading the rows. Incremental mode keeps them between runs.
+        self.sufficient_statistics: Optional[Dict[str, Any]] = None
+        self.moments = None
+        incremental = self.configuration.get("incremental")
+        if self.configuration.get("sufficient_statistics") or incremental:
+            stats_params = self.configuration.get("sufficient_statistics") or incremental
+            self.sufficient_statistics = (
+                stats_params if isinstance(stats_params, dict) else {}
+            )
+            self.configuration = covariance_configuration(self.configuration)
+            self.data = None
+            if incremental:
+                self.moments = self._update_incremental(data_path, metadata_path)
+            else:
+                self.moments = stream_moments(
+                    data_path, metadata_path, self._chunk_rows()
+                )
+        else:
+            self.data = load_data(data_path, metadata_path)
+
+        # Warm start: put the columns in a causal order of an earlier result.
+        self.column_order: Optional[List[int]] = None
+        warm_start = self.configuration.get("warm_start")
+        if (
+            not warm_start
+            and incremental
+            and self.sufficient_statistics.get("warm_start", True)
+            and self.output_path.exists()
+            and self.configuration["algorithm_name"].lower() in WARM_START_ALGORITHMS
+        ):
+            warm_start = {"graph": "previous"}
+        if warm_start:
+            self._apply_warm_start(warm_start)
 
     def run(self) -> None:
         """Run the causal discovery process end-to-end."""
@@ -62,32 +147,136 @@ class CausalDiscovery:
         self.elapsed_seconds = total_time
 
         logger.info("Analysis complete in %.2f seconds", total_time)
+        if self.metrics:
+            logger.info("Run metrics: %s", self.metrics)
         logger.info("Output written to %s", self.output_path)
-        logger.info("DOT graph written to %s", self.output_path.with_suffix(".dot"))
+        for name, path in export_paths(self.output_path, self.output_formats).items():
+            if name != "tetrad":
+                logger.info("%s graph written to %s", name, path)
 
     def _build_and_execute(self) -> None:
         """Configure the search and execute the algorithm."""
-        self.search = TetradSearch(self.data)
+        bootstrap_params = self.configuration.get("bootstrap_params") or {}
+        num_workers = int(bootstrap_params.get("num_workers", 1))
+        bootstrapping = int(bootstrap_params.get("numberResampling", 0)) > 0
+        covariance_bootstrap = self.moments is not None and bootstrapping
+        parallel_bootstrap = (
+            self.moments is None and num_workers > 1 and bootstrapping
+        )
+        partition_params = self.configuration.get("partition")
+        target_params = self.configuration.get("targets")
+        multi_start_params = self.configuration.get("multi_start")
+        ensemble_params = self.configuration.get("ensemble")
+        modes = {
+            "partition": partition_params,
+            "targets": target_params,
+            "multi_start": multi_start_params,
+            "ensemble": ensemble_params,
+        }
+        active_modes = [mode for mode, mode_params in modes.items() if mode_params]
+        if len(active_modes) > 1:
+            raise ValueError(f"{' and '.join(active_modes)} cannot be combined")
+        for mode, mode_params in modes.items():
+            if mode_params and (bootstrapping or self.moments is not None):
+                raise ValueError(
+                    f"{mode} cannot be combined with bootstrap_params or sufficient_statistics"
+                )
+
+        # With process-parallel bootstrap (or any worker mode) the data only lives
+        # in shared memory; the local search just validates the configuration
+        # and holds results.
+        if self.moments is not None:
+            self.search = TetradSearch(
+                self._tetrad_covariance(self.moments.covariance(), self.moments.n)
+            )
+        else:
+            in_workers = parallel_bootstrap or bool(set(active_modes) - {"ensemble"})
+            # Worker processes build their own searches, which the caches of this
+            # process never see.
+            cached = [key for key in ("test_cache", "score_cache") if self.configuration.get(key)]
+            if in_workers and cached:
+                mode = "bootstrap_params.num_workers" if parallel_bootstrap else active_modes[0]
+                raise ValueError(f"{' and '.join(cached)} cannot be combined with {mode}")
+            self.search = TetradSearch(None if in_workers else self.data)
 
         self._configure_search()
 
         # self._log_configuration()
 
-        logger.info("Running algorithm: %s", self.configuration["algorithm_name"])
-        start = time.perf_counter()
-        self._run_algorithm(
-            self.search,
-            self.configuration["algorithm_name"].lower(),
-            self.configuration.get("algorithm_params", {}),
+        logger.info(
+            "Running algorithm: %s", self.configuration.get("algorithm_name", "ensemble")
         )
+        start = time.perf_counter()
+        if parallel_bootstrap:
+            self._run_parallel_bootstrap(self.search, num_workers, bootstrap_params)
+        elif covariance_bootstrap:
+            self._run_covariance_bootstrap(self.search, bootstrap_params)
+        elif partition_params:
+            self._run_partitioned(
+                self.search,
+                partition_params if isinstance(partition_params, dict) else {},
+            )
+        elif target_params:
+            self._run_targets(
+                self.search,
+                target_params if isinstance(target_params, dict) else {"names": target_params},
+            )
+        elif multi_start_params:
+            self._run_multi_start(
+                self.search,
+                multi_start_params
+                if isinstance(multi_start_params, dict)
+                else {"num_starts": multi_start_params},
+            )
+        elif ensemble_params:
+            self._run_ensemble(
+                self.search,
+                ensemble_params
+                if isinstance(ensemble_params, dict)
+                else {"algorithms": ensemble_params},
+            )
+        elif self.configuration.get("engine", "tetrad") != "tetrad":
+            self._run_alternate_engine(self.search, bootstrapping)
+        else:
+            self._run_algorithm(
+                self.search,
+                self.configuration["algorithm_name"].lower(),
+                self.configuration.get("algorithm_params", {}),
+            )
         self.elapsed_seconds = time.perf_counter() - start
         logger.info(
             "Algorithm execution completed in %.2f seconds", self.elapsed_seconds
         )
 
+        markov_check = self.configuration.get("markov_check")
+        if markov_check:
+            self._run_markov_check(
+                self.search, markov_check if isinstance(markov_check, dict) else {}
+            )
+
+        adjustment = self.configuration.get("adjustment_sets")
+        if adjustment:
+            self._write_adjustment_sets(
+                self.search, adjustment if isinstance(adjustment, dict) else {}
+            )
+
+        if self.search.test_cache is not None:
+            self.search.save_test_cache()
+            self.metrics.update(self.search.test_cache.stats("ci_test_cache"))
+        if self.search.score_cache is not None:
+            self.search.save_score_cache()
+            self.metrics.update(self.search.score_cache.stats("score_cache"))
+
         # Save results
         logger.info("Saving graph results")
-        self._save_graph(self.search, self.output_path)
+        graph_str = self._save_graph(self.search, self.output_path, self.output_formats)
+
+        results_store = self.configuration.get("results_store")
+        if results_store:
+            self._record_results(
+                graph_str,
+                results_store if isinstance(results_store, dict) else {"path": results_store},
+            )
 
     def _configure_search(self) -> None:
         """Apply all configurations to the search instance."""
@@ -101,6 +290,13 @@ class CausalDiscovery:
                 self.search, self.knowledge_path
             )
 
+        # Forbid edges between pairs a cheap screen finds independent
+        screening = self.configuration.get("screening")
+        if screening:
+            self.forbidden_pairs = self._screen(
+                self.search, screening if isinstance(screening, dict) else {}
+            )
+
         # Configure test component
         test_name = self.configuration.get("test_name")
         if test_name:
@@ -119,14 +315,505 @@ class CausalDiscovery:
                 score_name,
                 self.configuration.get("score_params"),
             )
+        # Memoize independence tests across the whole session
+        test_cache = self.configuration.get("test_cache")
+        if test_cache and (self.search.TEST or self.search.MC_TEST):
+            cache_params = test_cache if isinstance(test_cache, dict) else {}
+            logger.info("Configuring independence test cache: %s", cache_params)
+            self.search.use_test_cache(data_hash=self._data_hash(), **cache_params)
+
+        # Memoize local scores; a saved cache serves any penalty discount
+        score_cache = self.configuration.get("score_cache")
+        if score_cache and self.search.SCORE:
+            cache_params = score_cache if isinstance(score_cache, dict) else {}
+            logger.info("Configuring local score cache: %s", cache_params)
+            self.search.use_score_cache(data_hash=self._data_hash(), **cache_params)
+
         # Configure bootstrap
         bootstrap_params = self.configuration.get("bootstrap_params")
-        if bootstrap_params:
+        if bootstrap_params and self.moments is not None:
+            # Tetrad cannot resample a covariance matrix; resample weights are
+            # applied to the statistics instead.
+            self.final_bootstrap = {"bootstrap_params": bootstrap_params}
+        elif bootstrap_params:
             logger.info("Configuring bootstrap")
             self.final_bootstrap = self._configure_bootstrap(
                 self.search, bootstrap_params
             )
 
+    def _run_parallel_bootstrap(
+        self,
+        search: TetradSearch,
+        num_workers: int,
+        bootstrap_params: Dict[str, Any],
+    ) -> None:
+        """Run the bootstrap resamples in worker processes over shared data."""
+        memmap_dir = bootstrap_params.get("memmap_dir")
+        graph, graphs, metrics = run_parallel_bootstrap(
+            self.data,
+            self._search_configuration(),
+            self.knowledge_path,
+            num_workers,
+            Path(memmap_dir) if memmap_dir else None,
+        )
+        search.java = graph
+        search.bootstrap_graphs = graphs
+        self.metrics.update(metrics)
+
+    def _run_covariance_bootstrap(
+        self, search: TetradSearch, bootstrap_params: Dict[str, Any]
+    ) -> None:
+        """Bootstrap in covariance mode: one search per reweighted covariance."""
+        weights = resample_weights(self.moments.n, bootstrap_params)
+        covariances, sizes = weighted_covariances(
+            self.data_path, weights, self.moments, self._chunk_rows()
+        )
+        configuration = {
+            key: value
+            for key, value in self._search_configuration().items()
+            if key != "bootstrap_params"
+        }
+
+        graph_texts = []
+        for index, (covariance, size) in enumerate(zip(covariances, sizes)):
+            resample_search = TetradSearch(self._tetrad_covariance(covariance, size))
+            configure_search(resample_search, configuration, self.knowledge_path)
+            self._run_algorithm(
+                resample_search,
+                configuration["algorithm_name"].lower(),
+                configuration.get("algorithm_params") or {},
+            )
+            graph_texts.append(str(resample_search.java))
+            logger.info("Covariance resample %d finished", index)
+
+        if bootstrap_params.get("add_original", True):
+            self._run_algorithm(
+                search,
+                configuration["algorithm_name"].lower(),
+                configuration.get("algorithm_params") or {},
+            )
+            graph_texts.append(str(search.java))
+
+        graphs = graphs_from_text(graph_texts)
+        search.java = ensemble_graph(
+            graphs, int(bootstrap_params.get("resampling_ensemble", 1))
+        )
+        search.bootstrap_graphs = graphs
+        self.metrics["bootstrap_searches"] = len(graph_texts)
+
+    def _run_partitioned(self, search: TetradSearch, params: Dict[str, Any]) -> None:
+        """Search overlapping blocks of associated variables in parallel, then merge."""
+        start = time.perf_counter()
+        matrix, schema = encode_dataframe(self.data)
+        association = association_matrix(matrix, schema.discrete)
+        del matrix
+        cores = correlation_blocks(association, int(params.get("max_block_size", 100)))
+        blocks = add_overlap(association, cores, int(params.get("overlap", 5)))
+        cluster_seconds = time.perf_counter() - start
+        logger.info(
+            "Partitioned %d variables into %d blocks (sizes %s) in %.2f seconds",
+            len(schema.names), len(blocks), [len(b) for b in blocks], cluster_seconds,
+        )
+
+        algorithm_name = self.configuration["algorithm_name"].lower()
+        algorithm_params = self.configuration.get("algorithm_params") or {}
+        memmap_dir = params.get("memmap_dir")
+        block_edges, block_seconds = run_parallel_searches(
+            self.data,
+            self._search_configuration(),
+            self.knowledge_path,
+            [(block, algorithm_name, algorithm_params) for block in blocks],
+            int(params.get("num_workers", 1)),
+            Path(memmap_dir) if memmap_dir else None,
+        )
+
+        start = time.perf_counter()
+        edges, merge_counts = merge_block_edges(schema.names, cores, blocks, block_edges)
+        search.java = graph_from_edges(schema.names, edges)
+        merge_seconds = time.perf_counter() - start
+        logger.info(
+            "Merged %d block graphs into %d edges in %.2f seconds (%s)",
+            len(blocks), len(edges), merge_seconds, merge_counts,
+        )
+
+        self.metrics.update(
+            {
+                "partition_blocks": len(blocks),
+                "partition_block_sizes": [len(block) for block in blocks],
+                "partition_block_seconds": [round(t, 3) for t in block_seconds],
+                "partition_cluster_seconds": cluster_seconds,
+                "partition_merge_seconds": merge_seconds,
+                "partition_reconciled_pairs": merge_counts["reconciled_pairs"],
+                "partition_broken_cycles": merge_counts["broken_cycles"],
+            }
+        )
+
+    def _run_targets(self, search: TetradSearch, params: Dict[str, Any]) -> None:
+        """Learn the neighbourhood of each target in parallel and unite them."""
+        names = parse_targets(params.get("names", ""))
+        algorithm_name = self.configuration["algorithm_name"].lower()
+        tasks = target_tasks(
+            algorithm_name, self.configuration.get("algorithm_params") or {}, names
+        )
+        compare_full = bool(params.get("compare_full", False))
+        if compare_full:
+            tasks.append((None, FULL_SEARCH[algorithm_name], params.get("full_params") or {}))
+
+        memmap_dir = params.get("memmap_dir")
+        start = time.perf_counter()
+        task_edges, task_seconds = run_parallel_searches(
+            self.data,
+            self._search_configuration(),
+            self.knowledge_path,
+            tasks,
+            int(params.get("num_workers", 1)),
+            Path(memmap_dir) if memmap_dir else None,
+        )
+        wall_seconds = time.perf_counter() - start
+
+        edges = union_edges(task_edges[: len(names)])
+        search.java = graph_from_edges([str(col) for col in self.data.columns], edges)
+        logger.info(
+            "Merged neighbourhoods of %d targets into %d edges", len(names), len(edges)
+        )
+
+        self.metrics.update(
+            {
+                "targets": names,
+                "target_search_seconds": [round(t, 3) for t in task_seconds[: len(names)]],
+                "target_edges": len(edges),
+            }
+        )
+        if compare_full:
+            # With the full search in the same pool the wall time is shared, so
+            # compare it with the slowest target search instead.
+            full_seconds = task_seconds[-1]
+            local_seconds = max(task_seconds[: len(names)])
+            self.metrics.update(
+                {
+                    "full_search_seconds": full_seconds,
+                    "full_search_edges": len(task_edges[-1]),
+                    "target_time_saved_seconds": full_seconds - local_seconds,
+                }
+            )
+        else:
+            self.metrics["target_wall_seconds"] = wall_seconds
+
+    def _run_multi_start(self, search: TetradSearch, params: Dict[str, Any]) -> None:
+        """Run independent seeded starts in parallel and keep the best-scoring graph."""
+        algorithm_name = self.configuration["algorithm_name"].lower()
+        if algorithm_name not in MULTI_START_ALGORITHMS:
+            raise ValueError(
+                f"multi_start needs a permutation search. Choices: {MULTI_START_ALGORITHMS}"
+            )
+        if not self.configuration.get("score_name"):
+            raise ValueError("multi_start needs a score_name to compare the starts.")
+
+        names = [str(col) for col in self.data.columns]
+        num_starts = int(params.get("num_starts", 1))
+        seed = int(params.get("seed", 0))
+        orders = start_orders(
+            len(names), num_starts, seed, bool(params.get("random_orders", True))
+        )
+        memmap_dir = params.get("memmap_dir")
+        start = time.perf_counter()
+        start_edges, scores, start_seconds = run_parallel_starts(
+            self.data,
+            self._search_configuration(),
+            self.knowledge_path,
+            orders,
+            start_seeds(num_starts, seed),
+            int(params.get("num_workers", num_starts)),
+            Path(memmap_dir) if memmap_dir else None,
+        )
+        wall_seconds = time.perf_counter() - start
+
+        best = int(np.argmax(scores))
+        search.java = graph_from_edges(names, start_edges[best])
+        summary = score_summary(scores)
+        logger.info(
+            "Best of %d starts is start %d with score %.4f (scores %s)",
+            num_starts, best, scores[best], summary,
+        )
+
+        self.metrics.update(
+            {
+                "multi_start_starts": num_starts,
+                "multi_start_best": best,
+                "multi_start_scores": [round(score, 4) for score in scores],
+                "multi_start_score_summary": summary,
+                "multi_start_search_seconds": [round(t, 3) for t in start_seconds],
+                "multi_start_wall_seconds": wall_seconds,
+            }
+        )
+
+    def _run_ensemble(self, search: TetradSearch, params: Dict[str, Any]) -> None:
+        """Run several algorithms concurrently on forks of one configured search."""
+        algorithms = parse_algorithms(params.get("algorithms") or [])
+        num_workers = int(params.get("num_workers", len(algorithms)))
+        forks = [search.fork() for _ in algorithms]
+        if self.num_threads is not None:
+            for fork in forks:
+                self._apply_threading_parameter(
+                    fork, max(1, self.num_threads // num_workers)
+                )
+
+        def run_member(task):
+            fork, (label, name, algorithm_params) = task
+            start = time.perf_counter()
+            self._run_algorithm(fork, name, algorithm_params)
+            seconds = time.perf_counter() - start
+            logger.info("Ensemble member %s finished in %.2f seconds", label, seconds)
+            return seconds
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=num_workers) as pool:
+            seconds = list(pool.map(run_member, zip(forks, algorithms)))
+        wall_seconds = time.perf_counter() - start
+
+        labels = [label for label, _, _ in algorithms]
+        edge_lists = [graph_edges(fork.java) for fork in forks]
+        names = [str(name) for name in search.data.getVariableNames()]
+        consensus = consensus_edges(edge_lists, float(params.get("min_support", 0.5)))
+        search.java = graph_from_edges(names, consensus)
+        self.candidate_graphs = {label: fork.java for label, fork in zip(labels, forks)}
+
+        stem, suffix = self.output_path.stem, self.output_path.suffix
+        for label, fork in zip(labels, forks):
+            self._save_graph(
+                fork,
+                self.output_path.with_name(f"{stem}_{label}{suffix}"),
+                self.output_formats,
+            )
+        edges_path = self.output_path.with_name(f"{stem}_edges.csv")
+        agreement_path = self.output_path.with_name(f"{stem}_agreement.csv")
+        edge_table(labels, edge_lists).to_csv(edges_path, index=False)
+        agreement = agreement_matrix(labels, edge_lists)
+        agreement.to_csv(agreement_path)
+        logger.info(
+            "Ensemble consensus has %d edges; agreement matrix written to %s",
+            len(consensus), agreement_path,
+        )
+
+        self.metrics.update(
+            {
+                "ensemble_algorithms": labels,
+                "ensemble_search_seconds": [round(t, 3) for t in seconds],
+                "ensemble_wall_seconds": wall_seconds,
+                "ensemble_edges": [len(edges) for edges in edge_lists],
+                "ensemble_consensus_edges": len(consensus),
+            }
+        )
+
+    def _run_alternate_engine(self, search: TetradSearch, bootstrapping: bool) -> None:
+        """Run the adjacency search outside Tetrad (``engine: numpy``)."""
+        engine = self.configuration["engine"]
+        algorithm = self.configuration["algorithm_name"].lower()
+        test_name = self.configuration.get("test_name")
+        if engine != "numpy":
+            raise ValueError(f"Unsupported engine '{engine}'. Choices: ['tetrad', 'numpy']")
+        if algorithm != "run_pc" or test_name not in ("use_fisher_z", "use_numpy_fisher_z"):
+            raise ValueError(
+                "The numpy engine runs 'run_pc' with 'use_fisher_z' or 'use_numpy_fisher_z'"
+            )
+        if bootstrapping:
+            raise ValueError("The numpy engine does not support bootstrap_params.")
+
+        params = self.configuration.get("algorithm_params") or {}
+        test_params = self.configuration.get("test_params") or {}
+        logger.info("Running PC adjacency search with the numpy engine")
+        search.run_numpy_pc(
+            alpha=test_params.get("alpha", 0.01), depth=params.get("depth", -1)
+        )
+
+    def _run_markov_check(self, search: TetradSearch, params: Dict[str, Any]) -> None:
+        """Test the independencies the result implies and write their p-values."""
+        checker = search
+        if search.data is None:
+            # Worker modes keep no data in the parent search.
+            checker = TetradSearch(self.data)
+            configure_search(checker, self._search_configuration(), self.knowledge_path)
+        if checker.MC_TEST is None:
+            raise ValueError("markov_check needs 'use_for_mc: true' in test_params.")
+
+        # Candidate graphs (ensemble members, bootstrap resamples) are checked
+        # together with the result, testing each distinct fact once.
+        candidates = dict(self.candidate_graphs)
+        if not candidates and search.bootstrap_graphs is not None:
+            candidates = {
+                f"resample_{i}": graph for i, graph in enumerate(search.bootstrap_graphs)
+            }
+        labels = ["result", *candidates]
+
+        start = time.perf_counter()
+        results, unique = checker.markov_check_batch(
+            [search.java, *candidates.values()],
+            params.get("conditioning", "ordered_local_markov"),
+            params.get("max_facts"),
+            params.get("seed"),
+            int(params.get("num_threads", 1)),
+        )
+        seconds = time.perf_counter() - start
+
+        stem = self.output_path.stem
+        results[0].to_frame().to_csv(
+            self.output_path.with_name(f"{stem}_markov.csv"), index=False
+        )
+        summary = results[0].summary()
+        logger.info(
+            "Markov check of %d graphs, %d distinct facts, in %.2f seconds: %s",
+            len(results), len(unique), seconds, summary,
+        )
+        if candidates:
+            summary_table(labels, results).to_csv(
+                self.output_path.with_name(f"{stem}_markov_graphs.csv"), index=False
+            )
+            self.metrics["markov_check_graphs"] = len(results)
+        self.metrics.update({f"markov_check_{key}": value for key, value in summary.items()})
+        self.metrics["markov_check_distinct_facts"] = len(unique)
+        self.metrics["markov_check_seconds"] = seconds
+
+    def _write_adjustment_sets(self, search: TetradSearch, params: Dict[str, Any]) -> None:
+        """Write adjustment sets for the configured (or all causal) pairs as JSON."""
+        start = time.perf_counter()
+        pairs = params.get("pairs")
+        adjustment = search.get_adjustment_sets_batch(
+            search.java,
+            [tuple(pair) for pair in pairs] if pairs else None,
+            max_num_sets=int(params.get("max_num_sets", 10)),
+            max_distance_from_point=int(params.get("max_distance_from_point", 5)),
+            near_which_endpoint=int(params.get("near_which_endpoint", 1)),
+            max_path_length=int(params.get("max_path_length", 20)),
+            num_threads=int(params.get("num_threads", 1)),
+        )
+        seconds = time.perf_counter() - start
+
+        records = [
+            {
+                "source": source,
+                "target": target,
+                "adjustment_sets": None if sets is None else [sorted(s) for s in sets],
+            }
+            for (source, target), sets in adjustment.items()
+        ]
+        adjustment_path = self.output_path.with_name(f"{self.output_path.stem}_adjustment.json")
+        with adjustment_path.open("w", encoding="utf-8") as fh:
+            json.dump(records, fh, indent=2)
+        logger.info(
+            "Adjustment sets for %d pairs written to %s in %.2f seconds",
+            len(records), adjustment_path, seconds,
+        )
+        self.metrics["adjustment_pairs"] = len(records)
+        self.metrics["adjustment_seconds"] = seconds
+
+    def _screen(
+        self, search: TetradSearch, params: Dict[str, Any]
+    ) -> List[Tuple[str, str]]:
+        """Forbid both edge directions between pairs screened out as independent."""
+        start = time.perf_counter()
+        engine = None
+        names = None
+        if self.moments is not None:
+            engine = PartialCorrelationEngine.from_covariance(
+                self.moments.covariance(), self.moments.n
+            )
+            names = self.moments.names
+            num_variables = len(names)
+        else:
+            num_variables = self.data.shape[1]
+
+        pairs = [
+            (a, b)
+            for a, b in screen_pairs(params, self.data, engine, names)
+            if not (search.knowledge.isRequired(a, b) or search.knowledge.isRequired(b, a))
+        ]
+        for a, b in pairs:
+            search.set_forbidden(a, b)
+            search.set_forbidden(b, a)
+
+        candidates = num_variables * (num_variables - 1) // 2
+        seconds = time.perf_counter() - start
+        logger.info(
+            "Screening forbade %d of %d candidate pairs in %.2f seconds",
+            len(pairs), candidates, seconds,
+        )
+        self.metrics.update(
+            {
+                "screening_candidate_pairs": candidates,
+                "screening_forbidden_pairs": len(pairs),
+                "screening_seconds": seconds,
+            }
+        )
+        return pairs
+
+    def _search_configuration(self) -> Dict[str, Any]:
+        """Configuration for searches run outside ``self.search``."""
+        if not self.forbidden_pairs:
+            return self.configuration
+        return {**self.configuration, "forbidden_pairs": self.forbidden_pairs}
+
+    def _apply_warm_start(self, params: Dict[str, Any]) -> None:
+        """Reorder the columns and make BOSS/GRaSP start from that order."""
+        algorithm = self.configuration["algorithm_name"].lower()
+        if algorithm not in WARM_START_ALGORITHMS:
+            raise ValueError(
+                f"warm_start needs a permutation search. Choices: {WARM_START_ALGORITHMS}"
+            )
+
+        names = self.moments.names if self.moments is not None else [
+            str(col) for col in self.data.columns
+        ]
+        order = warm_start_order(params, names, self.output_path)
+        if self.moments is not None:
+            position = {name: i for i, name in enumerate(names)}
+            self.column_order = [position[name] for name in order]
+        else:
+            self.data = self.data[order]
+
+        self.configuration["algorithm_params"] = {
+            **(self.configuration.get("algorithm_params") or {}),
+            "use_data_order": True,
+        }
+        logger.info("Warm-start variable order: %s", order)
+
+    def _tetrad_covariance(self, covariance, sample_size: int):
+        """Covariance-mode input for Tetrad, in the warm-start order if any."""
+        names = self.moments.names
+        if self.column_order is not None:
+            covariance = covariance[np.ix_(self.column_order, self.column_order)]
+            names = [names[i] for i in self.column_order]
+        return to_tetrad_covariance(covariance, names, sample_size)
+
+    def _update_incremental(self, data_path: Path, metadata_path: Optional[Path]):
+        """Moments of the whole history, updated from the rows appended since."""
+        state_path = self.sufficient_statistics.get("state_path")
+        state_path = (
+            Path(state_path)
+            if state_path
+            else self.output_path.parent / f"{self.output_path.stem}_state.pkl"
+        )
+        start = time.perf_counter()
+        moments, new_rows = update_moments(
+            data_path, state_path, metadata_path, self._chunk_rows()
+        )
+        self.metrics.update(
+            {
+                "incremental_new_rows": new_rows,
+                "incremental_total_rows": moments.n,
+                "incremental_update_seconds": time.perf_counter() - start,
+            }
+        )
+        return moments
+
+    def _chunk_rows(self) -> int:
+        return int((self.sufficient_statistics or {}).get("chunk_rows", 100_000))
+
+    def _data_hash(self) -> str:
+        """Content hash of the input: of the rows, or of the statistics."""
+        if self.moments is not None:
+            return self.moments.digest()
+        return data_hash(self.data)
+
     @staticmethod
     def _apply_threading_parameter(
         search: TetradSearch,
@@ -188,8 +875,11 @@ class CausalDiscovery:
 
         valid_names = [
             "use_fisher_z",
+            "use_numpy_fisher_z",
+            "use_sem_bic",
             "use_conditional_gaussian_test",
             "use_degenerate_gaussian_test",
+            "use_kci_wrapper",
             "use_conditional_gaussian_score",
             "use_degenerate_gaussian_score",
         ]
@@ -217,7 +907,13 @@ class CausalDiscovery:
             return None
 
         logger.info("Configuring bootstrap with params: %s", params)
-        search.set_bootstrapping(**params)
+        search.set_bootstrapping(
+            **{
+                key: value
+                for key, value in params.items()
+                if key not in ("num_workers", "memmap_dir")
+            }
+        )
 
         return {"bootstrap_params": params}
 
@@ -232,6 +928,8 @@ class CausalDiscovery:
             "run_boss",
             "run_fges",
             "run_direct_lingam",
+            "run_fges_mb",
+            "run_restricted_boss",
         ]
 
         if name not in valid_names:
@@ -247,41 +945,41 @@ class CausalDiscovery:
             logger.error(f"Algorithm {name} failed: {err}")
             raise RuntimeError(f"Unable to run algorithm '{name}': {err}") from err
 
+    def _record_results(self, graph_str: str, params: Dict[str, Any]) -> None:
+        """Add this run to the SQLite results store named in ``params``."""
+        if "path" not in params:
+            raise ValueError("results_store needs a 'path' to the database")
+        run = {
+            "graph_text": graph_str,
+            "dataset": params.get("dataset") or self.data_path.parent.name,
+            "algorithm": self.configuration.get("algorithm_name", "ensemble"),
+            "configuration": self.configuration,
+            "data_path": self.data_path,
+            "data_hash": self._data_hash(),
+            "output_path": self.output_path,
+            "elapsed_seconds": self.elapsed_seconds,
+            "metrics": self.metrics,
+        }
+        with ResultsStore(Path(params["path"])) as store:
+            run_id = store.add_runs([run])[0]
+        logger.info("Recorded run %d in results store %s", run_id, params["path"])
+
     @staticmethod
     def _save_graph(
         search: TetradSearch,
         output_path: Path,
-    ) -> None:
-        """Write both Tetrad's native graph string **and** a plain DOT file."""
+        formats: Optional[List[str]] = None,
+    ) -> str:
+        """Write the graph in each of ``formats`` (Tetrad text, DOT and clean DOT by default).
+
+        :return: The Tetrad graph string that was written.
+        """
         logger.info("Preparing graph output")
         graph_str = str(search.java)  # Tetrad multi-section format
-        dot_str = search.get_dot()  # Clean DOT for GUI tools
-
-        dot_path = output_path.with_suffix(".dot")
-        # Create a DOT file without labels by removing label attributes
-        clean_dot_str = dot_str
-        # Replace label attributes in the DOT file
-        import re
-
-        clean_dot_str = re.sub(r'label="[^"]*"(,\s*)', "", clean_dot_str)
-        clean_dot_path = output_path.parent / f"{output_path.stem}_clean.dot"
-
         try:
-            logger.info("Writing Tetrad graph to %s", output_path)
-            with output_path.open("w", encoding="utf-8") as fh:
-                fh.write(graph_str)
-
-            logger.info("Writing DOT graph to %s", dot_path)
-            with dot_path.open("w", encoding="utf-8") as fh_dot:
-                fh_dot.write(dot_str)
-
-            logger.info("Writing clean DOT graph to %s", clean_dot_path)
-            with clean_dot_path.open("w", encoding="utf-8") as fh_clean:
-                fh_clean.write(clean_dot_str)
-
+            export_graph(graph_str, output_path, formats)
             logger.info("Successfully saved graph output")
+            return graph_str
         except Exception as err:
             logger.error("Failed to write graph output: %s", err)
-            raise RuntimeError(
-                f"Unable to write graph outputs ('{output_path}', '{dot_path}', '{clean_dot_path}'): {err}"
-            ) from err
+            raise RuntimeError(f"Unable to write graph outputs for '{output_path}': {err}") from err
@@ -0,0 +1,188 @@
+"""Compact Python-side graph backed by an int8 endpoint matrix.
+
+``EndpointGraph`` holds node names, a name index and the endpoint matrix of
+``graph_io`` (``m[i, j]`` is the mark at ``j`` of the edge between ``i`` and
+``j``: 0 none, 1 circle, 2 arrow, 3 tail). A Tetrad graph is converted in one
+call each way through its text form, so post-processing (skeletons, parents,
+CPDAG/PAG edge queries, diffs, exports) runs without further JVM crossings.
+"""
+
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.graph_io import (
+    ARROW,
+    CIRCLE,
+    ENDPOINT_CODES,
+    NULL,
+    TAIL,
+    edge_tuples,
+    parse_graph,
+    read_graph,
+)
+
+EdgeTuple = Tuple[str, str, str, str]
+
+_LEFT_CHAR = {TAIL: "-", ARROW: "<", CIRCLE: "o"}
+_RIGHT_CHAR = {TAIL: "-", ARROW: ">", CIRCLE: "o"}
+
+
+class EndpointGraph:
+    """Nodes and endpoint marks of a mixed graph (DAG, CPDAG, PAG)."""
+
+    __slots__ = ("names", "index", "matrix", "probability")
+
+    def __init__(
+        self,
+        names: Sequence[str],
+        matrix: Optional[np.ndarray] = None,
+        probability: Optional[np.ndarray] = None,
+    ):
+        self.names = list(names)
+        self.index = {name: i for i, name in enumerate(self.names)}
+        p = len(self.names)
+        self.matrix = (
+            np.zeros((p, p), dtype=np.int8) if matrix is None else np.asarray(matrix, dtype=np.int8)
+        )
+        self.probability = probability
+
+    @classmethod
+    def from_edges(cls, names: Sequence[str], edges: Sequence[EdgeTuple]) -> "EndpointGraph":
+        """From (node 1, node 2, endpoint 1, endpoint 2) tuples with Endpoint names."""
+        graph = cls(names)
+        for a, b, end_a, end_b in edges:
+            i, j = graph.index[a], graph.index[b]
+            graph.matrix[j, i] = ENDPOINT_CODES[end_a]
+            graph.matrix[i, j] = ENDPOINT_CODES[end_b]
+        return graph
+
+    @classmethod
+    def from_text(cls, text: str) -> "EndpointGraph":
+        """From Tetrad's graph text, e.g. ``str(search.java)``."""
+        return cls(*parse_graph(text.splitlines()))
+
+    @classmethod
+    def read(cls, path: Path) -> "EndpointGraph":
+        """From a Tetrad graph text file."""
+        return cls(*read_graph(path))
+
+    @classmethod
+    def from_tetrad(cls, graph) -> "EndpointGraph":
+        """From a Java graph, with a single call into the JVM."""
+        return cls.from_text(str(graph.toString()))
+
+    def to_tetrad(self):
+        """A Java graph built from this graph's text in a single JVM call."""
+        import edu.cmu.tetrad.graph.GraphSaveLoadUtils as gp
+
+        return gp.readerToGraphTxt(self.to_text())
+
+    def to_text(self) -> str:
+        """Tetrad's graph text: the nodes and one numbered line per edge."""
+        lines = ["Graph Nodes:", ";".join(self.names), "", "Graph Edges:"]
+        firsts, seconds = np.nonzero(np.triu(self.matrix != NULL, 1))
+        for number, (i, j) in enumerate(zip(firsts, seconds), start=1):
+            a, b = self.names[i], self.names[j]
+            lines.append(f"{number}. {a} {self.symbol(a, b)} {b}")
+        return "\n".join(lines) + "\n"
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __eq__(self, other) -> bool:
+        return (
+            isinstance(other, EndpointGraph)
+            and self.names == other.names
+            and np.array_equal(self.matrix, other.matrix)
+        )
+
+    def __repr__(self) -> str:
+        return f"EndpointGraph({len(self.names)} nodes, {self.num_edges} edges)"
+
+    @property
+    def num_edges(self) -> int:
+        return int(np.count_nonzero(np.triu(self.matrix != NULL, 1)))
+
+    def edges(self) -> List[EdgeTuple]:
+        """Edges as (node 1, node 2, endpoint 1, endpoint 2) names."""
+        return edge_tuples(self.names, self.matrix)
+
+    def skeleton(self) -> np.ndarray:
+        """Symmetric boolean adjacency matrix."""
+        return self.matrix != NULL
+
+    def endpoint(self, a: str, b: str) -> int:
+        """Mark at ``b`` of the edge between ``a`` and ``b`` (NULL if none)."""
+        return int(self.matrix[self.index[a], self.index[b]])
+
+    def symbol(self, a: str, b: str) -> str:
+        """Tetrad's notation for the edge read from a to b, e.g. "-->" or "o-o"."""
+        i, j = self.index[a], self.index[b]
+        if self.matrix[i, j] == NULL:
+            raise ValueError(f"{a} and {b} are not adjacent")
+        return _LEFT_CHAR[int(self.matrix[j, i])] + "-" + _RIGHT_CHAR[int(self.matrix[i, j])]
+
+    def is_adjacent(self, a: str, b: str) -> bool:
+        return self.endpoint(a, b) != NULL
+
+    def is_directed(self, a: str, b: str) -> bool:
+        """a --> b."""
+        return self.endpoint(a, b) == ARROW and self.endpoint(b, a) == TAIL
+
+    def is_undirected(self, a: str, b: str) -> bool:
+        """a --- b."""
+        return self.endpoint(a, b) == TAIL and self.endpoint(b, a) == TAIL
+
+    def is_bidirected(self, a: str, b: str) -> bool:
+        """a <-> b."""
+        return self.endpoint(a, b) == ARROW and self.endpoint(b, a) == ARROW
+
+    def has_circle(self, a: str, b: str) -> bool:
+        """The edge between a and b has a circle mark at either end (PAG)."""
+        return CIRCLE in (self.endpoint(a, b), self.endpoint(b, a))
+
+    def directed(self) -> np.ndarray:
+        """Boolean matrix with [i, j] set for each edge i --> j."""
+        return (self.matrix == ARROW) & (self.matrix.T == TAIL)
+
+    def parents(self, name: str) -> List[str]:
+        return [self.names[i] for i in np.flatnonzero(self.directed()[:, self.index[name]])]
+
+    def children(self, name: str) -> List[str]:
+        return [self.names[j] for j in np.flatnonzero(self.directed()[self.index[name]])]
+
+    def neighbors(self, name: str) -> List[str]:
+        """Nodes joined to ``name`` by an undirected edge."""
+        i = self.index[name]
+        undirected = (self.matrix[i] == TAIL) & (self.matrix[:, i] == TAIL)
+        return [self.names[j] for j in np.flatnonzero(undirected)]
+
+    def adjacent_nodes(self, name: str) -> List[str]:
+        return [self.names[j] for j in np.flatnonzero(self.matrix[self.index[name]] != NULL)]
+
+    def diff(self, other: "EndpointGraph") -> Dict[str, List[Tuple[str, str]]]:
+        """Pairs added, removed and with changed marks in ``other`` relative to this graph.
+
+        ``other`` is aligned to this graph's node order; both need the same nodes.
+        """
+        if set(other.names) != set(self.names):
+            raise ValueError("diff needs graphs over the same nodes")
+        order = [other.index[name] for name in self.names]
+        theirs = other.matrix[np.ix_(order, order)]
+        upper = np.triu(np.ones_like(self.matrix, dtype=bool), 1)
+        mine_adj = (self.matrix != NULL) & upper
+        theirs_adj = (theirs != NULL) & upper
+        changed = (
+            mine_adj & theirs_adj & ((self.matrix != theirs) | (self.matrix.T != theirs.T))
+        )
+
+        def pairs(mask: np.ndarray) -> List[Tuple[str, str]]:
+            return [(self.names[i], self.names[j]) for i, j in zip(*np.nonzero(mask))]
+
+        return {
+            "added": pairs(theirs_adj & ~mine_adj),
+            "removed": pairs(mine_adj & ~theirs_adj),
+            "changed": pairs(changed),
+        }
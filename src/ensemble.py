@@ -0,0 +1,122 @@
+"""Several algorithms on one dataset, and how far their graphs agree.
+
+The ``ensemble`` block lists algorithms to run in one session over the same
+converted data, test and score (and their caches). This module parses that
+list and compares the resulting graphs: an algorithm-by-algorithm agreement
+matrix, a per-pair table of the edge each algorithm found, and a consensus
+graph of the edges found by enough of the algorithms.
+"""
+
+from collections import Counter
+from typing import Any, Dict, List, Sequence, Tuple, Union
+
+import pandas as pd
+
+# (node 1, node 2, endpoint at node 1, endpoint at node 2), endpoints named
+# as Tetrad's Endpoint constants ("TAIL", "ARROW", "CIRCLE").
+EdgeTuple = Tuple[str, str, str, str]
+
+_LEFT = {"TAIL": "-", "ARROW": "<", "CIRCLE": "o"}
+_RIGHT = {"TAIL": "-", "ARROW": ">", "CIRCLE": "o"}
+
+
+def parse_algorithms(
+    entries: Sequence[Union[str, Dict[str, Any]]]
+) -> List[Tuple[str, str, Dict[str, Any]]]:
+    """(label, algorithm name, params) for each entry of ``ensemble.algorithms``.
+
+    An entry is an algorithm name or ``{name: ..., params: {...}}``. Labels
+    are the names, numbered when an algorithm is listed more than once.
+    """
+    parsed = []
+    for entry in entries:
+        if isinstance(entry, str):
+            name, params = entry, {}
+        else:
+            name, params = entry.get("name"), entry.get("params") or {}
+        if not name:
+            raise ValueError(f"Ensemble entry without an algorithm name: {entry}")
+        parsed.append((str(name).lower(), dict(params)))
+    if not parsed:
+        raise ValueError("ensemble needs at least one algorithm.")
+
+    totals = Counter(name for name, _ in parsed)
+    seen: Counter = Counter()
+    algorithms = []
+    for name, params in parsed:
+        seen[name] += 1
+        label = name if totals[name] == 1 else f"{name}_{seen[name]}"
+        algorithms.append((label, name, params))
+    return algorithms
+
+
+def _canonical(edge: EdgeTuple) -> Tuple[Tuple[str, str], Tuple[str, str]]:
+    a, b, end_a, end_b = edge
+    if a <= b:
+        return (a, b), (end_a, end_b)
+    return (b, a), (end_b, end_a)
+
+
+def edge_symbol(end_a: str, end_b: str) -> str:
+    """Tetrad's edge notation, e.g. ("TAIL", "ARROW") -> "-->"."""
+    return _LEFT[end_a] + "-" + _RIGHT[end_b]
+
+
+def edge_table(labels: Sequence[str], edge_lists: Sequence[List[EdgeTuple]]) -> pd.DataFrame:
+    """One row per adjacent pair: the edge each algorithm found and the support.
+
+    ``support`` is the fraction of algorithms with an edge between the pair,
+    ``agreement`` the fraction with the most common edge.
+    """
+    found: Dict[Tuple[str, str], Dict[str, str]] = {}
+    for label, edges in zip(labels, edge_lists):
+        for edge in edges:
+            pair, ends = _canonical(edge)
+            found.setdefault(pair, {})[label] = edge_symbol(*ends)
+
+    rows = []
+    for (a, b), symbols in sorted(found.items()):
+        row = {"node1": a, "node2": b}
+        row.update({label: symbols.get(label, "") for label in labels})
+        row["support"] = len(symbols) / len(labels)
+        row["agreement"] = Counter(symbols.values()).most_common(1)[0][1] / len(labels)
+        rows.append(row)
+    return pd.DataFrame(rows, columns=["node1", "node2", *labels, "support", "agreement"])
+
+
+def agreement_matrix(
+    labels: Sequence[str], edge_lists: Sequence[List[EdgeTuple]]
+) -> pd.DataFrame:
+    """Pairwise adjacency agreement (Jaccard index) between the algorithms."""
+    adjacencies = [{_canonical(edge)[0] for edge in edges} for edges in edge_lists]
+    matrix = pd.DataFrame(1.0, index=list(labels), columns=list(labels))
+    for i, first in enumerate(adjacencies):
+        for j in range(i + 1, len(adjacencies)):
+            union = first | adjacencies[j]
+            value = len(first & adjacencies[j]) / len(union) if union else 1.0
+            matrix.iat[i, j] = matrix.iat[j, i] = value
+    return matrix
+
+
+def consensus_edges(
+    edge_lists: Sequence[List[EdgeTuple]], min_support: float = 0.5
+) -> List[EdgeTuple]:
+    """Edges between pairs adjacent in at least ``min_support`` of the graphs.
+
+    Each kept pair gets its most common orientation; a tie leaves it undirected.
+    """
+    votes: Dict[Tuple[str, str], Counter] = {}
+    for edges in edge_lists:
+        for edge in edges:
+            pair, ends = _canonical(edge)
+            votes.setdefault(pair, Counter())[ends] += 1
+
+    consensus = []
+    for (a, b), counts in sorted(votes.items()):
+        if sum(counts.values()) < min_support * len(edge_lists):
+            continue
+        (ends, count), *rest = counts.most_common()
+        if rest and rest[0][1] == count:
+            ends = ("TAIL", "TAIL")
+        consensus.append((a, b, *ends))
+    return consensus
@@ -0,0 +1,261 @@
+"""Score learned graphs against ground truth, many graphs at a time.
+
+Graphs are compared as endpoint matrices in the encoding of
+``translate.graph_to_matrix``: ``m[i, j]`` is the mark at ``j`` of the edge
+between ``i`` and ``j`` (0 none, 1 circle, 2 arrow, 3 tail). Estimates against
+the same truth are stacked into one (runs, p, p) array and all metrics are
+computed at once:
+
+* adjacency precision, recall and F1;
+* arrowhead precision, recall and F1;
+* SHD: pairs whose edge (presence or marks) differs from the truth;
+* SID-style: ordered pairs (i, j) where the estimate is wrong about whether
+  i is an ancestor of j, i.e. about whether intervening on i can change j.
+  Only directed edges of the estimate count. This is cheaper than the full
+  structural intervention distance, which also checks adjustment sets.
+
+Bootstrap outputs carry edge probabilities. They can be scored at several
+thresholds, keeping the edges whose probability reaches each one.
+
+Usage::
+
+    python -m src.evaluation --truth data/ruta --runs output/sweep --output scores.csv
+"""
+
+import argparse
+import ast
+import json
+import logging
+import re
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.graph_io import ARROW, NULL, TAIL, is_graph_file, read_graph
+
+logger = logging.getLogger(__name__)
+
+TRUTH_FILES = ("tetrad.txt", "true_edges_dict.json")
+
+
+def read_edges_dict(path: Path) -> Tuple[List[str], np.ndarray]:
+    """Nodes and endpoint matrix of a ``true_edges_dict.json`` ground truth."""
+    with path.open("r", encoding="utf-8") as fh:
+        relations = json.load(fh)
+
+    pairs = [(ast.literal_eval(key), value) for key, value in relations.items()]
+    names = sorted({name for (a, b), _ in pairs for name in (a, b)}, key=_natural_key)
+    index = {name: i for i, name in enumerate(names)}
+    matrix = np.zeros((len(names), len(names)), dtype=np.int8)
+    for (a, b), relation in pairs:
+        i, j = index[a], index[b]
+        if relation == "no_edge":
+            continue
+        if relation == "source->target":
+            matrix[i, j], matrix[j, i] = ARROW, TAIL
+        elif relation == "target->source":
+            matrix[i, j], matrix[j, i] = TAIL, ARROW
+        else:
+            matrix[i, j] = matrix[j, i] = TAIL
+    return names, matrix
+
+
+def _natural_key(name: str):
+    return [int(part) if part.isdigit() else part for part in re.split(r"(\d+)", name)]
+
+
+def read_truth(path: Path) -> Tuple[List[str], np.ndarray]:
+    """Ground truth from a graph file, an edges dict, or a folder holding either."""
+    if path.is_dir():
+        for file_name in TRUTH_FILES:
+            if (path / file_name).exists():
+                return read_truth(path / file_name)
+        raise FileNotFoundError(f"No ground truth ({', '.join(TRUTH_FILES)}) in '{path}'")
+    if path.suffix == ".json":
+        return read_edges_dict(path)
+    names, matrix, _ = read_graph(path)
+    return names, matrix
+
+
+def align(names: Sequence[str], matrix: np.ndarray, order: Sequence[str]) -> np.ndarray:
+    """Endpoint matrix reindexed to the node order ``order``."""
+    position = {name: i for i, name in enumerate(names)}
+    missing = [name for name in order if name not in position]
+    if missing or len(names) != len(order):
+        raise ValueError(f"Graph nodes do not match the truth (missing {missing[:5]})")
+    permutation = [position[name] for name in order]
+    return matrix[np.ix_(permutation, permutation)]
+
+
+def _ancestors(directed: np.ndarray) -> np.ndarray:
+    """Batched transitive closure of (runs, p, p) boolean parent->child matrices."""
+    reach = directed.copy()
+    while True:
+        paths = reach.astype(np.float32)
+        extended = reach | (np.matmul(paths, paths) > 0)
+        if np.array_equal(extended, reach):
+            return reach
+        reach = extended
+
+
+def _f1(precision: np.ndarray, recall: np.ndarray) -> np.ndarray:
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(
+            precision + recall > 0, 2 * precision * recall / (precision + recall), 0.0
+        )
+
+
+def _ratio(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(denominator > 0, numerator / denominator, np.nan)
+
+
+def evaluate_batch(truth: np.ndarray, estimates: np.ndarray) -> Dict[str, np.ndarray]:
+    """Metrics of each estimate in a (runs, p, p) stack against one truth."""
+    estimates = np.asarray(estimates)
+    truth = np.asarray(truth)[None]
+    upper = np.triu(np.ones(truth.shape[1:], dtype=bool), 1)[None]
+
+    est_adj = (estimates != NULL) & upper
+    true_adj = (truth != NULL) & upper
+    adj_tp = (est_adj & true_adj).sum(axis=(1, 2))
+    adj_est = est_adj.sum(axis=(1, 2))
+    adj_true = true_adj.sum(axis=(1, 2))
+
+    est_arrow = estimates == ARROW
+    true_arrow = truth == ARROW
+    arrow_tp = (est_arrow & true_arrow).sum(axis=(1, 2))
+    arrow_est = est_arrow.sum(axis=(1, 2))
+    arrow_true = true_arrow.sum(axis=(1, 2))
+
+    # An edge is the pair of marks (m[i, j], m[j, i]).
+    differs = (estimates != truth) | (np.swapaxes(estimates, 1, 2) != np.swapaxes(truth, 1, 2))
+    shd = (differs & upper).sum(axis=(1, 2))
+
+    # i -> j is directed when m[i, j] is an arrow and m[j, i] a tail.
+    est_directed = (estimates == ARROW) & (np.swapaxes(estimates, 1, 2) == TAIL)
+    true_directed = (truth == ARROW) & (np.swapaxes(truth, 1, 2) == TAIL)
+    sid = (_ancestors(est_directed) != _ancestors(true_directed)).sum(axis=(1, 2))
+
+    adj_precision = _ratio(adj_tp, adj_est)
+    adj_recall = _ratio(adj_tp, np.broadcast_to(adj_true, adj_tp.shape))
+    arrow_precision = _ratio(arrow_tp, arrow_est)
+    arrow_recall = _ratio(arrow_tp, np.broadcast_to(arrow_true, arrow_tp.shape))
+    return {
+        "num_edges": adj_est,
+        "adj_precision": adj_precision,
+        "adj_recall": adj_recall,
+        "adj_f1": _f1(np.nan_to_num(adj_precision), np.nan_to_num(adj_recall)),
+        "arrow_precision": arrow_precision,
+        "arrow_recall": arrow_recall,
+        "arrow_f1": _f1(np.nan_to_num(arrow_precision), np.nan_to_num(arrow_recall)),
+        "shd": shd,
+        "sid_ancestral": sid,
+    }
+
+
+def threshold_stack(
+    matrix: np.ndarray, probability: np.ndarray, thresholds: Sequence[float]
+) -> np.ndarray:
+    """One endpoint matrix per threshold, keeping edges with probability >= it."""
+    thresholds = np.asarray(thresholds, dtype=float)[:, None, None]
+    return np.where(probability[None] >= thresholds, matrix[None], NULL).astype(np.int8)
+
+
+def find_truths(path: Path) -> Dict[str, Path]:
+    """Truths by name: one file or folder, or every truth folder below ``path``."""
+    if path.is_file() or any((path / name).exists() for name in TRUTH_FILES):
+        return {path.stem if path.is_file() else path.name: path}
+    truths = {
+        folder.name: folder
+        for folder in sorted(path.iterdir())
+        if folder.is_dir() and any((folder / name).exists() for name in TRUTH_FILES)
+    }
+    if not truths:
+        raise FileNotFoundError(f"No ground truth found under '{path}'")
+    return truths
+
+
+def find_runs(path: Path) -> List[Path]:
+    """Tetrad graph text files at or below ``path``."""
+    candidates = [path] if path.is_file() else sorted(path.rglob("*.txt"))
+    return [candidate for candidate in candidates if is_graph_file(candidate)]
+
+
+def _truth_for(run: Path, truths: Dict[str, Path]) -> Optional[str]:
+    if len(truths) == 1:
+        return next(iter(truths))
+    matches = [name for name in truths if name in run.parts]
+    return matches[0] if len(matches) == 1 else None
+
+
+def evaluate_runs(
+    runs: Iterable[Path],
+    truths: Dict[str, Path],
+    thresholds: Sequence[float] = (),
+) -> pd.DataFrame:
+    """One row per (run, threshold): the metrics against the run's truth.
+
+    Runs are matched to the truth whose name is one of their path components
+    (any truth when there is only one). Bootstrap runs get a row per
+    threshold as well as one for the output graph itself.
+    """
+    loaded = {name: read_truth(path) for name, path in truths.items()}
+    groups: Dict[str, List[Tuple[str, float, np.ndarray]]] = {name: [] for name in loaded}
+    for run in runs:
+        truth_name = _truth_for(run, truths)
+        if truth_name is None:
+            logger.warning("No unique ground truth for %s; skipped", run)
+            continue
+        order = loaded[truth_name][0]
+        names, matrix, probability = read_graph(run)
+        matrix = align(names, matrix, order)
+        groups[truth_name].append((str(run), np.nan, matrix))
+        if probability is not None and len(thresholds):
+            probability = align(names, probability, order)
+            stack = threshold_stack(matrix, probability, thresholds)
+            groups[truth_name].extend(
+                (str(run), float(t), graph) for t, graph in zip(thresholds, stack)
+            )
+
+    frames = []
+    for truth_name, rows in groups.items():
+        if not rows:
+            continue
+        metrics = evaluate_batch(loaded[truth_name][1], np.stack([row[2] for row in rows]))
+        frame = pd.DataFrame(metrics)
+        frame.insert(0, "threshold", [row[1] for row in rows])
+        frame.insert(0, "truth", truth_name)
+        frame.insert(0, "run", [row[0] for row in rows])
+        frames.append(frame)
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Score learned graphs against ground truth.")
+    parser.add_argument("--truth", type=Path, required=True,
+                        help="Truth file, dataset folder, or a folder of dataset folders")
+    parser.add_argument("--runs", type=Path, required=True,
+                        help="Graph output file or a directory searched recursively")
+    parser.add_argument("--output", type=Path, required=True, help="CSV table of metrics")
+    parser.add_argument("--thresholds", type=float, nargs="*", default=[],
+                        help="Edge-probability thresholds for bootstrap outputs")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(message)s")
+    start = time.perf_counter()
+    runs = find_runs(args.runs)
+    table = evaluate_runs(runs, find_truths(args.truth), args.thresholds)
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    table.to_csv(args.output, index=False)
+    logger.info(
+        "Scored %d graphs from %d runs in %.2f seconds; wrote %s",
+        len(table), len(runs), time.perf_counter() - start, args.output,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""Write a result graph in several formats from one extracted copy.
+
+The Java graph is turned into text once. That text is written as the Tetrad
+output and parsed once into an ``EndpointGraph``. DOT, clean DOT (no edge
+labels), JSON and npz are rendered from it, and all files are written
+concurrently. ``output_formats`` in the configuration selects which of them
+are produced.
+"""
+
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from src.endpoint_graph import EndpointGraph
+from src.graph_io import ARROW, CIRCLE, TAIL
+
+logger = logging.getLogger(__name__)
+
+EXPORT_FORMATS = ["tetrad", "dot", "clean_dot", "json", "npz"]
+DEFAULT_FORMATS = ["tetrad", "dot", "clean_dot"]
+
+_DOT_MARKS = {TAIL: "none", ARROW: "normal", CIRCLE: "odot"}
+
+
+def export_paths(output_path: Path, formats: Sequence[str]) -> Dict[str, Path]:
+    """File written for each format, next to ``output_path``."""
+    unknown = [name for name in formats if name not in EXPORT_FORMATS]
+    if unknown:
+        raise ValueError(f"Unsupported output formats {unknown}. Choices: {EXPORT_FORMATS}")
+    paths = {
+        "tetrad": output_path,
+        "dot": output_path.with_suffix(".dot"),
+        "clean_dot": output_path.parent / f"{output_path.stem}_clean.dot",
+        "json": output_path.with_suffix(".json"),
+        "npz": output_path.with_suffix(".npz"),
+    }
+    return {name: paths[name] for name in formats}
+
+
+def render_dot(graph: EndpointGraph, labels: bool = True) -> str:
+    """DOT with Tetrad's endpoint marks; edges are labelled with bootstrap probabilities."""
+    lines = ["digraph g {"]
+    lines.extend(f'  "{name}";' for name in graph.names)
+    firsts, seconds = np.nonzero(np.triu(graph.skeleton(), 1))
+    for i, j in zip(firsts, seconds):
+        attributes = (
+            f"dir=both, arrowtail={_DOT_MARKS[int(graph.matrix[j, i])]}, "
+            f"arrowhead={_DOT_MARKS[int(graph.matrix[i, j])]}"
+        )
+        if labels and graph.probability is not None and graph.probability[i, j] > 0:
+            attributes += f', label="{graph.probability[i, j]:.2f}"'
+        lines.append(f'  "{graph.names[i]}" -> "{graph.names[j]}" [{attributes}];')
+    lines.append("}")
+    return "\n".join(lines) + "\n"
+
+
+def render_json(graph: EndpointGraph) -> str:
+    """Nodes and an edge list with endpoint names (and probabilities, if any)."""
+    edges = []
+    probabilities = graph.probability
+    for a, b, end_a, end_b in graph.edges():
+        edge = {
+            "node1": a,
+            "node2": b,
+            "endpoint1": end_a,
+            "endpoint2": end_b,
+            "edge": f"{a} {graph.symbol(a, b)} {b}",
+        }
+        if probabilities is not None and probabilities[graph.index[a], graph.index[b]] > 0:
+            edge["probability"] = float(probabilities[graph.index[a], graph.index[b]])
+        edges.append(edge)
+    return json.dumps({"nodes": graph.names, "edges": edges}, indent=2)
+
+
+def _write_npz(graph: EndpointGraph, path: Path) -> None:
+    arrays = {"names": np.array(graph.names), "matrix": graph.matrix}
+    if graph.probability is not None:
+        arrays["probability"] = graph.probability
+    with path.open("wb") as fh:
+        np.savez_compressed(fh, **arrays)
+
+
+def _write_text(text: str, path: Path) -> None:
+    with path.open("w", encoding="utf-8") as fh:
+        fh.write(text)
+
+
+def export_graph(
+    graph_text: str,
+    output_path: Path,
+    formats: Optional[Sequence[str]] = None,
+    max_workers: Optional[int] = None,
+) -> Dict[str, Path]:
+    """Write ``graph_text`` (Tetrad's graph string) in each requested format.
+
+    :return: The path written for each format.
+    """
+    formats = list(DEFAULT_FORMATS if formats is None else formats)
+    paths = export_paths(output_path, formats)
+    graph = EndpointGraph.from_text(graph_text) if set(formats) - {"tetrad"} else None
+
+    writers = {
+        "tetrad": lambda path: _write_text(graph_text, path),
+        "dot": lambda path: _write_text(render_dot(graph), path),
+        "clean_dot": lambda path: _write_text(render_dot(graph, labels=False), path),
+        "json": lambda path: _write_text(render_json(graph), path),
+        "npz": lambda path: _write_npz(graph, path),
+    }
+    with ThreadPoolExecutor(max_workers=max_workers or len(paths) or 1) as pool:
+        futures = {name: pool.submit(writers[name], path) for name, path in paths.items()}
+        for name, future in futures.items():
+            future.result()
+            logger.info("Wrote %s graph to %s", name, paths[name])
+    return paths
+
+
+def load_npz(path: Path) -> EndpointGraph:
+    """Read back a graph written in the npz format."""
+    with np.load(path) as arrays:
+        names: List[str] = [str(name) for name in arrays["names"]]
+        probability = arrays["probability"] if "probability" in arrays else None
+        return EndpointGraph(names, arrays["matrix"], probability)
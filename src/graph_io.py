@@ -0,0 +1,138 @@
+"""Read Tetrad graph text files into arrays without the JVM.
+
+Handles the multi-section format written by ``CausalDiscovery._save_graph``
+(``Graph Nodes:`` / ``Graph Edges:`` with "1. X --> Y" lines, plus
+``Graph Attributes:`` and other trailing sections) and the ground-truth
+format with "Edge. X --> Y" lines directly after the nodes. Bootstrap
+outputs annotate edges with the frequency of each edge type, e.g.
+"1. X --> Y [no edge]:0.1000;[X --> Y]:0.9000;"; these become an adjacency
+probability matrix.
+
+Files are read line by line. The graph is returned as its node names and an
+int8 endpoint matrix in the encoding of ``translate.graph_to_matrix``:
+``m[i, j]`` is the mark at ``j`` of the edge between ``i`` and ``j``.
+"""
+
+import re
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+NULL, CIRCLE, ARROW, TAIL = 0, 1, 2, 3
+
+ENDPOINT_CODES = {"TAIL": TAIL, "ARROW": ARROW, "CIRCLE": CIRCLE}
+
+_LEFT_MARK = {"-": TAIL, "<": ARROW, "o": CIRCLE}
+_RIGHT_MARK = {"-": TAIL, ">": ARROW, "o": CIRCLE}
+_NO_EDGE = re.compile(r"\[no edge\]:\s*([0-9.eE+-]+)")
+_EDGE_FREQUENCY = re.compile(r"\]:\s*([0-9.eE+-]+)")
+
+# Sections whose lines may hold edges: the output format lists them under
+# "Graph Edges", the ground-truth format right after the nodes.
+_EDGE_SECTIONS = ("Graph Edges", "Graph Nodes")
+
+Graph = Tuple[List[str], np.ndarray, Optional[np.ndarray]]
+
+
+def _is_edge_symbol(symbol: str) -> bool:
+    return (
+        len(symbol) >= 3
+        and symbol[0] in _LEFT_MARK
+        and symbol[-1] in _RIGHT_MARK
+        and symbol[1:-1].strip("-") == ""
+    )
+
+
+def parse_graph(lines: Iterable[str]) -> Graph:
+    """Parse the lines of a Tetrad graph text (a file handle or ``str(graph).splitlines()``).
+
+    :return: The node names, the int8 endpoint matrix and, for bootstrap
+        outputs, a symmetric matrix of adjacency probabilities (else None).
+    """
+    names: List[str] = []
+    rows: List[Tuple[str, str, str]] = []
+    probabilities: Dict[int, float] = {}
+    section = None
+    for line in lines:
+        parts = line.split(None, 4)
+        if not parts:
+            continue
+        if (
+            len(parts) >= 4
+            and section in _EDGE_SECTIONS
+            and parts[0].endswith(".")
+            and _is_edge_symbol(parts[2])
+        ):
+            rows.append((parts[1], parts[2], parts[3]))
+            if len(parts) == 5 and "]:" in parts[4]:
+                annotation = parts[4]
+                no_edge = _NO_EDGE.search(annotation)
+                probabilities[len(rows) - 1] = (
+                    1.0 - float(no_edge.group(1))
+                    if no_edge
+                    else sum(float(value) for value in _EDGE_FREQUENCY.findall(annotation))
+                )
+            continue
+        stripped = line.strip()
+        if stripped.endswith(":"):
+            section = stripped[:-1].strip()
+        elif section == "Graph Nodes" and not names:
+            names = [name for name in stripped.split(";") if name]
+
+    index = {name: i for i, name in enumerate(names)}
+    p = len(names)
+    matrix = np.zeros((p, p), dtype=np.int8)
+    if rows:
+        try:
+            first = np.fromiter((index[a] for a, _, _ in rows), dtype=np.intp, count=len(rows))
+            second = np.fromiter((index[b] for _, _, b in rows), dtype=np.intp, count=len(rows))
+        except KeyError as err:
+            raise ValueError(f"Edge refers to unknown node {err}") from None
+        matrix[second, first] = [_LEFT_MARK[symbol[0]] for _, symbol, _ in rows]
+        matrix[first, second] = [_RIGHT_MARK[symbol[-1]] for _, symbol, _ in rows]
+
+    probability = None
+    if probabilities:
+        probability = np.zeros((p, p))
+        for row, value in probabilities.items():
+            a, _, b = rows[row]
+            probability[index[a], index[b]] = probability[index[b], index[a]] = value
+    return names, matrix, probability
+
+
+def read_graph(path: Path) -> Graph:
+    """Parse a Tetrad graph text file; see ``parse_graph``."""
+    with Path(path).open("r", encoding="utf-8") as fh:
+        return parse_graph(fh)
+
+
+def is_graph_file(path: Path) -> bool:
+    """Whether a file starts with a Tetrad "Graph Nodes:" header."""
+    with Path(path).open("r", encoding="utf-8", errors="replace") as fh:
+        return fh.readline().startswith("Graph Nodes:")
+
+
+def read_graph_dir(directory: Path, pattern: str = "*.txt") -> Dict[Path, Graph]:
+    """Every Tetrad graph file matching ``pattern`` below ``directory``."""
+    return {
+        path: read_graph(path)
+        for path in sorted(Path(directory).rglob(pattern))
+        if is_graph_file(path)
+    }
+
+
+def directed_edges(names: List[str], matrix: np.ndarray) -> List[Tuple[str, str]]:
+    """(parent, child) names of the directed edges of an endpoint matrix."""
+    parents, children = np.nonzero((matrix == ARROW) & (matrix.T == TAIL))
+    return [(names[i], names[j]) for i, j in zip(parents, children)]
+
+
+def edge_tuples(names: List[str], matrix: np.ndarray) -> List[Tuple[str, str, str, str]]:
+    """Edges as (node 1, node 2, endpoint 1, endpoint 2) names, node 1 before node 2."""
+    endpoint_names = {code: name for name, code in ENDPOINT_CODES.items()}
+    firsts, seconds = np.nonzero(np.triu(matrix != NULL, 1))
+    return [
+        (names[i], names[j], endpoint_names[int(matrix[j, i])], endpoint_names[int(matrix[i, j])])
+        for i, j in zip(firsts, seconds)
+    ]
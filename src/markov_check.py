@@ -0,0 +1,223 @@
+"""Markov checking of a graph with facts and p-values held in NumPy arrays.
+
+The independencies a DAG implies are enumerated in Python from its parent
+sets, without going through Tetrad's ``MarkovCheck`` result lists:
+
+* ``local_markov``: each X is independent of every non-descendant Y that is
+  not a parent, given the parents of X;
+* ``ordered_local_markov``: as above, but only for Y before X in a causal
+  order, so each non-adjacent pair is tested once.
+
+Facts are kept as index arrays ``x``, ``y`` and a tuple of conditioning index
+tuples ``z``. On large graphs a random subset of the facts can be tested.
+"""
+
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+CONDITIONING_SETS = ["local_markov", "ordered_local_markov"]
+
+EdgeTuple = Tuple[str, str, str, str]
+
+
+@dataclass
+class MarkovFacts:
+    """Independence facts x _||_ y | z as variable indices into ``names``."""
+
+    names: List[str]
+    x: np.ndarray
+    y: np.ndarray
+    z: Tuple[Tuple[int, ...], ...]
+
+    def __len__(self) -> int:
+        return len(self.x)
+
+    def take(self, indices: Sequence[int]) -> "MarkovFacts":
+        """The facts at ``indices``, in that order."""
+        indices = np.asarray(indices, dtype=np.intp)
+        return MarkovFacts(
+            self.names, self.x[indices], self.y[indices], tuple(self.z[i] for i in indices)
+        )
+
+    def queries(self) -> List[Tuple[int, int, Tuple[int, ...]]]:
+        """(x, y, z) index queries, as taken by PartialCorrelationEngine.pvalues."""
+        return list(zip(self.x.tolist(), self.y.tolist(), self.z))
+
+
+@dataclass
+class MarkovCheckResult:
+    """P-values of tested facts, with the test's alpha."""
+
+    facts: MarkovFacts
+    pvalues: np.ndarray
+    alpha: float
+
+    def summary(self) -> Dict[str, float]:
+        """Uniformity of the p-values: under the Markov condition they are U(0, 1)."""
+        return markov_summary(self.pvalues, self.alpha)
+
+    def to_frame(self) -> pd.DataFrame:
+        """One row per fact with variable names and the p-value."""
+        names = self.facts.names
+        return pd.DataFrame(
+            {
+                "x": [names[i] for i in self.facts.x],
+                "y": [names[i] for i in self.facts.y],
+                "z": [",".join(names[k] for k in z) for z in self.facts.z],
+                "p_value": self.pvalues,
+            }
+        )
+
+
+def dag_parents(names: Sequence[str], edges: List[EdgeTuple]) -> List[List[int]]:
+    """Parent indices of each variable of a DAG given as edge tuples."""
+    index = {name: i for i, name in enumerate(names)}
+    parents: List[List[int]] = [[] for _ in names]
+    for a, b, end_a, end_b in edges:
+        if (end_a, end_b) == ("TAIL", "ARROW"):
+            parents[index[b]].append(index[a])
+        elif (end_a, end_b) == ("ARROW", "TAIL"):
+            parents[index[a]].append(index[b])
+        else:
+            raise ValueError(f"Markov check needs a DAG; found edge {a} {end_a}-{end_b} {b}")
+    return [sorted(p) for p in parents]
+
+
+def _topological_order(parents: List[List[int]]) -> List[int]:
+    children: List[List[int]] = [[] for _ in parents]
+    indegree = [len(p) for p in parents]
+    for child, ps in enumerate(parents):
+        for parent in ps:
+            children[parent].append(child)
+
+    ready = [i for i, d in enumerate(indegree) if d == 0]
+    order = []
+    while ready:
+        node = ready.pop()
+        order.append(node)
+        for child in children[node]:
+            indegree[child] -= 1
+            if indegree[child] == 0:
+                ready.append(child)
+    if len(order) != len(parents):
+        raise ValueError("Markov check needs a DAG; the graph has a directed cycle.")
+    return order
+
+
+def implied_independencies(
+    names: Sequence[str],
+    parents: List[List[int]],
+    conditioning: str = "ordered_local_markov",
+) -> MarkovFacts:
+    """All local Markov independencies of the DAG with these parent sets."""
+    if conditioning not in CONDITIONING_SETS:
+        raise ValueError(
+            f"Unsupported conditioning set '{conditioning}'. Choices: {CONDITIONING_SETS}"
+        )
+
+    p = len(parents)
+    order = _topological_order(parents)
+    excluded = np.eye(p, dtype=bool)
+    if conditioning == "local_markov":
+        # Descendants (and the node itself), filled in reverse causal order.
+        for node in reversed(order):
+            for parent in parents[node]:
+                excluded[parent] |= excluded[node]
+    else:
+        # Everything at or after the node in the causal order.
+        position = np.empty(p, dtype=np.intp)
+        position[order] = np.arange(p)
+        excluded = position[None, :] >= position[:, None]
+
+    xs: List[np.ndarray] = []
+    ys: List[np.ndarray] = []
+    zs: List[Tuple[int, ...]] = []
+    for node in range(p):
+        candidates = ~excluded[node]
+        candidates[parents[node]] = False
+        others = np.flatnonzero(candidates)
+        xs.append(np.full(len(others), node, dtype=np.int32))
+        ys.append(others.astype(np.int32))
+        zs.extend([tuple(parents[node])] * len(others))
+
+    return MarkovFacts(
+        list(names),
+        np.concatenate(xs) if xs else np.empty(0, dtype=np.int32),
+        np.concatenate(ys) if ys else np.empty(0, dtype=np.int32),
+        tuple(zs),
+    )
+
+
+def sample_facts(
+    facts: MarkovFacts, max_facts: Optional[int], seed: Optional[int] = None
+) -> MarkovFacts:
+    """A random subset of at most ``max_facts`` facts, in their original order."""
+    if max_facts is None or len(facts) <= max_facts:
+        return facts
+    rng = np.random.default_rng(seed)
+    return facts.take(np.sort(rng.choice(len(facts), size=int(max_facts), replace=False)))
+
+
+def markov_summary(pvalues: np.ndarray, alpha: float) -> Dict[str, float]:
+    """Number of tests, fraction dependent at ``alpha``, and uniformity p-values.
+
+    ``ks_pvalue`` tests the p-values against U(0, 1); ``binomial_pvalue`` tests
+    whether more facts are rejected at ``alpha`` than chance would reject.
+    """
+    pvalues = np.asarray(pvalues, dtype=float)
+    pvalues = pvalues[~np.isnan(pvalues)]
+    if not len(pvalues):
+        return {"num_tests": 0}
+    dependent = int(np.count_nonzero(pvalues < alpha))
+    return {
+        "num_tests": len(pvalues),
+        "fraction_dependent": dependent / len(pvalues),
+        "ks_pvalue": float(stats.kstest(pvalues, "uniform").pvalue),
+        "binomial_pvalue": float(
+            stats.binomtest(dependent, len(pvalues), alpha, alternative="greater").pvalue
+        ),
+    }
+
+
+def deduplicate_facts(
+    fact_sets: Sequence[MarkovFacts],
+) -> Tuple[MarkovFacts, List[np.ndarray]]:
+    """Distinct facts over several graphs, and where each graph's facts are in them.
+
+    x _||_ y | z and y _||_ x | z count as the same fact.
+
+    :return: The unique facts and, per graph, the index of each of its facts
+        among them.
+    """
+    if not fact_sets:
+        raise ValueError("deduplicate_facts needs at least one set of facts.")
+    unique: Dict[Tuple[int, int, Tuple[int, ...]], int] = {}
+    positions = []
+    for facts in fact_sets:
+        where = np.empty(len(facts), dtype=np.intp)
+        for i, (x, y, z) in enumerate(facts.queries()):
+            key = (min(x, y), max(x, y), tuple(sorted(z)))
+            where[i] = unique.setdefault(key, len(unique))
+        positions.append(where)
+
+    keys = list(unique)
+    return (
+        MarkovFacts(
+            fact_sets[0].names,
+            np.array([key[0] for key in keys], dtype=np.int32),
+            np.array([key[1] for key in keys], dtype=np.int32),
+            tuple(key[2] for key in keys),
+        ),
+        positions,
+    )
+
+
+def summary_table(labels: Sequence[str], results: Sequence[MarkovCheckResult]) -> pd.DataFrame:
+    """One row of Markov-check summary statistics per graph."""
+    return pd.DataFrame(
+        [{"graph": label, **result.summary()} for label, result in zip(labels, results)]
+    )
@@ -0,0 +1,379 @@
+"""Process-parallel searches over a dataset held once in shared memory.
+
+Worker processes are spawned (a JVM cannot survive ``fork``), start their own
+JVM, attach to the parent's shared data matrix and run the configured Tetrad
+algorithm on zero-copy views of it. Graphs travel back as Tetrad text.
+"""
+
+import logging
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from src.endpoint_graph import EndpointGraph
+from src.shared_data import (
+    ColumnSchema,
+    SharedArray,
+    SharedArrayHandle,
+    encode_dataframe,
+    resample_indices,
+    to_tetrad_dataset,
+)
+
+logger = logging.getLogger(__name__)
+
+# Tetrad's RESAMPLING_ENSEMBLE parameter values.
+ENSEMBLE_NAMES = {1: "Preserved", 2: "Highest", 3: "Majority"}
+
+_WORKER_STATE: Dict[str, Any] = {}
+
+
+def _init_worker(
+    data_handle: SharedArrayHandle,
+    schema: ColumnSchema,
+    index_handle: Optional[SharedArrayHandle],
+    configuration: Dict[str, Any],
+    knowledge_path: Optional[Path],
+) -> None:
+    """Attach a freshly spawned worker to the parent's shared arrays."""
+    from src.pytetrad.TetradSearch import TetradSearch  # noqa: F401 (starts the JVM)
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s:%(name)s: %(message)s")
+    _WORKER_STATE["data"] = SharedArray.attach(data_handle)
+    _WORKER_STATE["schema"] = schema
+    _WORKER_STATE["indices"] = (
+        SharedArray.attach(index_handle) if index_handle is not None else None
+    )
+    _WORKER_STATE["configuration"] = configuration
+    _WORKER_STATE["knowledge_path"] = knowledge_path
+
+
+def configure_search(search, configuration: Dict[str, Any], knowledge_path):
+    """Apply threads, knowledge, test and score exactly as the parent would."""
+    from src.causal_discovery import CausalDiscovery
+
+    if configuration.get("num_threads") is not None:
+        CausalDiscovery._apply_threading_parameter(
+            search, int(configuration["num_threads"])
+        )
+    if knowledge_path:
+        search.load_knowledge(str(knowledge_path))
+    for a, b in configuration.get("forbidden_pairs") or ():
+        search.set_forbidden(a, b)
+        search.set_forbidden(b, a)
+    for key in ("test", "score"):
+        name = configuration.get(f"{key}_name")
+        if name:
+            CausalDiscovery._configure_test_or_score(
+                search, name, configuration.get(f"{key}_params") or {}
+            )
+
+
+def _search_resample(index: int) -> Tuple[int, str, float]:
+    """Run the configured algorithm on one resample (-1 = the original data)."""
+    from src.causal_discovery import CausalDiscovery
+    from src.pytetrad.TetradSearch import TetradSearch
+
+    start = time.perf_counter()
+    indices = _WORKER_STATE["indices"]
+    rows = None if index < 0 else indices.array[index]
+    dataset = to_tetrad_dataset(
+        _WORKER_STATE["data"].array, _WORKER_STATE["schema"], rows=rows
+    )
+
+    configuration = _WORKER_STATE["configuration"]
+    search = TetradSearch(dataset)
+    configure_search(search, configuration, _WORKER_STATE["knowledge_path"])
+    CausalDiscovery._run_algorithm(
+        search,
+        configuration["algorithm_name"].lower(),
+        configuration.get("algorithm_params") or {},
+    )
+    return index, str(search.java), time.perf_counter() - start
+
+
+def _search_task(
+    task: Tuple[int, Optional[List[int]], str, Dict[str, Any]]
+) -> Tuple[int, List[Tuple[str, str, str, str]], float]:
+    """Run one algorithm on the shared data, or on a block of its columns."""
+    from src.causal_discovery import CausalDiscovery
+    from src.pytetrad.TetradSearch import TetradSearch
+
+    start = time.perf_counter()
+    index, columns, algorithm_name, algorithm_params = task
+    dataset = to_tetrad_dataset(
+        _WORKER_STATE["data"].array, _WORKER_STATE["schema"], columns=columns
+    )
+
+    search = TetradSearch(dataset)
+    configure_search(search, _WORKER_STATE["configuration"], _WORKER_STATE["knowledge_path"])
+    CausalDiscovery._run_algorithm(search, algorithm_name, algorithm_params)
+    return index, graph_edges(search.java), time.perf_counter() - start
+
+
+def _search_start(
+    task: Tuple[int, List[int], str, Dict[str, Any], int]
+) -> Tuple[int, List[Tuple[str, str, str, str]], float, float]:
+    """Run one seeded start of a permutation search and score its graph."""
+    from edu.cmu.tetrad.util import RandomUtil
+
+    from src.causal_discovery import CausalDiscovery
+    from src.pytetrad.TetradSearch import TetradSearch
+
+    start = time.perf_counter()
+    index, columns, algorithm_name, algorithm_params, seed = task
+    RandomUtil.getInstance().setSeed(seed)
+    dataset = to_tetrad_dataset(
+        _WORKER_STATE["data"].array, _WORKER_STATE["schema"], columns=columns
+    )
+
+    search = TetradSearch(dataset)
+    configure_search(search, _WORKER_STATE["configuration"], _WORKER_STATE["knowledge_path"])
+    CausalDiscovery._run_algorithm(search, algorithm_name, algorithm_params)
+    score = search.score_graph()
+    return index, graph_edges(search.java), score, time.perf_counter() - start
+
+
+def _worker_configuration(
+    configuration: Dict[str, Any], num_workers: int
+) -> Dict[str, Any]:
+    """Copy of the configuration for one worker: no bootstrap, shared threads."""
+    worker_configuration = {
+        key: value for key, value in configuration.items() if key != "bootstrap_params"
+    }
+    if configuration.get("num_threads") is not None:
+        worker_configuration["num_threads"] = max(
+            1, int(configuration["num_threads"]) // num_workers
+        )
+    return worker_configuration
+
+
+def graphs_from_text(graph_texts: List[str]):
+    """Parse Tetrad graph strings into Java graphs over one shared node list."""
+    import edu.cmu.tetrad.graph as gr
+    import edu.cmu.tetrad.graph.GraphSaveLoadUtils as gp
+    import java.util as util
+
+    graphs = util.ArrayList()
+    nodes = None
+    for text in graph_texts:
+        graph = gp.readerToGraphTxt(text)
+        if nodes is None:
+            nodes = graph.getNodes()
+        else:
+            graph = gr.GraphUtils.replaceNodes(graph, nodes)
+        graphs.add(graph)
+    return graphs
+
+
+def graph_edges(graph) -> List[Tuple[str, str, str, str]]:
+    """Edges of a Java graph as (node 1, node 2, endpoint 1, endpoint 2) names."""
+    return EndpointGraph.from_tetrad(graph).edges()
+
+
+def graph_from_edges(names: List[str], edges: List[Tuple[str, str, str, str]]):
+    """Build a Java graph over ``names`` from edge tuples as given by graph_edges."""
+    return EndpointGraph.from_edges(names, edges).to_tetrad()
+
+
+def ensemble_graph(graphs, resampling_ensemble: int = 1):
+    """Combine resample graphs into one edge-probability annotated graph."""
+    from edu.cmu.tetrad.util import GraphSampling, ResamplingEdgeEnsemble
+
+    if resampling_ensemble not in ENSEMBLE_NAMES:
+        raise ValueError(
+            f"Unsupported resampling_ensemble '{resampling_ensemble}'. "
+            f"Choices: {ENSEMBLE_NAMES}"
+        )
+    ensemble = getattr(ResamplingEdgeEnsemble, ENSEMBLE_NAMES[resampling_ensemble])
+    return GraphSampling.createGraphWithHighProbabilityEdges(graphs, ensemble)
+
+
+def run_parallel_bootstrap(
+    data: pd.DataFrame,
+    configuration: Dict[str, Any],
+    knowledge_path: Optional[Path],
+    num_workers: int,
+    memmap_dir: Optional[Path] = None,
+) -> Tuple[Any, Any, Dict[str, Any]]:
+    """Run every bootstrap resample of the configured search in worker processes.
+
+    The parent encodes ``data`` once into shared memory and draws all resample
+    row indices in a single call from the configured seed; workers only ever
+    materialise the resample they are currently searching.
+
+    :return: The ensemble graph, the list of resample graphs and run metrics.
+    """
+    bootstrap = configuration.get("bootstrap_params") or {}
+    number_resampling = int(bootstrap.get("numberResampling", 0))
+    add_original = bool(bootstrap.get("add_original", True))
+
+    matrix, schema = encode_dataframe(data)
+    indices = resample_indices(
+        matrix.shape[0],
+        number_resampling,
+        bootstrap.get("percent_resample_size", 100),
+        bootstrap.get("with_replacement", True),
+        bootstrap.get("seed", -1),
+    )
+    shared_data = SharedArray.create(matrix, memmap_dir)
+    shared_indices = SharedArray.create(indices, memmap_dir)
+    del matrix, indices
+
+    tasks = list(range(number_resampling)) + ([-1] if add_original else [])
+    logger.info(
+        "Running %d bootstrap searches on %d worker processes", len(tasks), num_workers
+    )
+
+    graph_texts: Dict[int, str] = {}
+    task_seconds: List[float] = []
+    start = time.perf_counter()
+    try:
+        with ProcessPoolExecutor(
+            max_workers=num_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(
+                shared_data.handle,
+                schema,
+                shared_indices.handle,
+                _worker_configuration(configuration, num_workers),
+                knowledge_path,
+            ),
+        ) as pool:
+            for index, text, seconds in pool.map(_search_resample, tasks):
+                graph_texts[index] = text
+                task_seconds.append(seconds)
+                logger.info("Resample %d finished in %.2f seconds", index, seconds)
+    finally:
+        shared_data.unlink()
+        shared_indices.unlink()
+
+    graphs = graphs_from_text([graph_texts[index] for index in tasks])
+    graph = ensemble_graph(graphs, int(bootstrap.get("resampling_ensemble", 1)))
+
+    metrics = {
+        "bootstrap_workers": num_workers,
+        "bootstrap_searches": len(tasks),
+        "bootstrap_wall_seconds": time.perf_counter() - start,
+        "bootstrap_search_seconds": sum(task_seconds),
+    }
+    return graph, graphs, metrics
+
+
+def _search_pool(
+    shared_data: SharedArray,
+    schema: ColumnSchema,
+    configuration: Dict[str, Any],
+    knowledge_path: Optional[Path],
+    num_workers: int,
+) -> ProcessPoolExecutor:
+    """Spawned workers attached to the shared data, without resample indices."""
+    return ProcessPoolExecutor(
+        max_workers=num_workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(
+            shared_data.handle,
+            schema,
+            None,
+            _worker_configuration(configuration, num_workers),
+            knowledge_path,
+        ),
+    )
+
+
+def run_parallel_searches(
+    data: pd.DataFrame,
+    configuration: Dict[str, Any],
+    knowledge_path: Optional[Path],
+    tasks: List[Tuple[Optional[List[int]], str, Dict[str, Any]]],
+    num_workers: int,
+    memmap_dir: Optional[Path] = None,
+) -> Tuple[List[List[Tuple[str, str, str, str]]], List[float]]:
+    """Run independent searches over the shared data in worker processes.
+
+    Each task is (columns or None for all, algorithm name, algorithm params);
+    test, score, knowledge and threads come from ``configuration``.
+
+    :return: The edges found by each task and each task's search time.
+    """
+    matrix, schema = encode_dataframe(data)
+    shared_data = SharedArray.create(matrix, memmap_dir)
+    del matrix
+
+    logger.info("Running %d searches on %d worker processes", len(tasks), num_workers)
+    task_edges: List[List[Tuple[str, str, str, str]]] = [[] for _ in tasks]
+    task_seconds: List[float] = [0.0 for _ in tasks]
+    try:
+        with _search_pool(
+            shared_data, schema, configuration, knowledge_path, num_workers
+        ) as pool:
+            indexed = [(index,) + tuple(task) for index, task in enumerate(tasks)]
+            for index, edges, seconds in pool.map(_search_task, indexed):
+                task_edges[index] = edges
+                task_seconds[index] = seconds
+                logger.info(
+                    "Search %d (%s) finished in %.2f seconds",
+                    index, tasks[index][1], seconds,
+                )
+    finally:
+        shared_data.unlink()
+
+    return task_edges, task_seconds
+
+
+def run_parallel_starts(
+    data: pd.DataFrame,
+    configuration: Dict[str, Any],
+    knowledge_path: Optional[Path],
+    orders: List[List[int]],
+    seeds: List[int],
+    num_workers: int,
+    memmap_dir: Optional[Path] = None,
+) -> Tuple[List[List[Tuple[str, str, str, str]]], List[float], List[float]]:
+    """Run single-start searches, one per starting column order, in worker processes.
+
+    Each start searches the columns in its order (``use_data_order``) with
+    Tetrad's random generator seeded from ``seeds``, and scores its graph.
+
+    :return: The edges, the score and the search time of each start.
+    """
+    algorithm_name = configuration["algorithm_name"].lower()
+    algorithm_params = {
+        **(configuration.get("algorithm_params") or {}),
+        "num_starts": 1,
+        "use_data_order": True,
+    }
+
+    matrix, schema = encode_dataframe(data)
+    shared_data = SharedArray.create(matrix, memmap_dir)
+    del matrix
+
+    logger.info("Running %d starts on %d worker processes", len(orders), num_workers)
+    start_edges: List[List[Tuple[str, str, str, str]]] = [[] for _ in orders]
+    start_scores: List[float] = [0.0 for _ in orders]
+    start_seconds: List[float] = [0.0 for _ in orders]
+    try:
+        with _search_pool(
+            shared_data, schema, configuration, knowledge_path, num_workers
+        ) as pool:
+            tasks = [
+                (index, order, algorithm_name, algorithm_params, seed)
+                for index, (order, seed) in enumerate(zip(orders, seeds))
+            ]
+            for index, edges, score, seconds in pool.map(_search_start, tasks):
+                start_edges[index] = edges
+                start_scores[index] = score
+                start_seconds[index] = seconds
+                logger.info(
+                    "Start %d scored %.4f in %.2f seconds", index, score, seconds
+                )
+    finally:
+        shared_data.unlink()
+
+    return start_edges, start_scores, start_seconds
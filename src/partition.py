@@ -0,0 +1,215 @@
+"""Divide-and-conquer search over overlapping blocks of variables.
+
+Variables are clustered on the association graph (average linkage on the
+distance 1 - a) into core blocks of at most ``max_block_size`` variables,
+where a is |r| between continuous columns, Cramer's V between discrete
+columns and the correlation ratio between a discrete and a continuous one.
+Each block is extended by the ``overlap`` outside variables most associated
+with it, so that edges crossing a block boundary are seen by more than one
+sub-search. The sub-graphs are merged with a reconciliation pass:
+
+* a pair inside one core block takes that block's edge;
+* a pair across blocks is kept when at least half of the blocks holding both
+  variables found it, with the majority orientation (undirected on a tie);
+* directed cycles created by the merge are broken by making a reconciled
+  edge on the cycle undirected.
+"""
+
+import logging
+from collections import Counter
+from typing import Dict, List, Sequence, Set, Tuple
+
+import numpy as np
+from scipy.cluster.hierarchy import linkage, to_tree
+from scipy.spatial.distance import squareform
+
+from src.partial_correlation import PartialCorrelationEngine
+
+logger = logging.getLogger(__name__)
+
+# (node 1, node 2, endpoint at node 1, endpoint at node 2), endpoints named
+# as Tetrad's Endpoint constants ("TAIL", "ARROW", "CIRCLE").
+EdgeTuple = Tuple[str, str, str, str]
+
+
+def _one_hot(codes: np.ndarray) -> np.ndarray:
+    """n x k indicator matrix of integer category codes."""
+    onehot = np.zeros((len(codes), int(codes.max()) + 1))
+    onehot[np.arange(len(codes)), codes.astype(np.intp)] = 1.0
+    return onehot
+
+
+def association_matrix(matrix: np.ndarray, discrete: Sequence[bool]) -> np.ndarray:
+    """Symmetric p x p matrix of pairwise association strengths in [0, 1].
+
+    :param matrix: Encoded data (see ``encode_dataframe``); discrete columns
+        hold integer category codes.
+    :param discrete: Whether each column is discrete.
+    """
+    n, p = matrix.shape
+    discrete = np.asarray(discrete, dtype=bool)
+    continuous = np.flatnonzero(~discrete)
+    association = np.eye(p)
+    if len(continuous):
+        correlation = PartialCorrelationEngine(matrix[:, continuous]).correlation
+        association[np.ix_(continuous, continuous)] = np.abs(correlation)
+        standardized = matrix[:, continuous] - matrix[:, continuous].mean(axis=0)
+        scale = np.sqrt((standardized**2).mean(axis=0))
+        standardized /= np.where(scale > 0, scale, 1.0)
+
+    indicators = {j: _one_hot(matrix[:, j]) for j in np.flatnonzero(discrete)}
+    for j, onehot in indicators.items():
+        counts = onehot.sum(axis=0)
+        if len(continuous):
+            # Correlation ratio: share of each column's variance between the groups.
+            means = (onehot.T @ standardized) / counts[:, None]
+            eta = np.sqrt(np.clip(counts @ means**2 / n, 0.0, 1.0))
+            association[j, continuous] = association[continuous, j] = eta
+        for k, other in indicators.items():
+            if k <= j:
+                continue
+            levels = min(onehot.shape[1], other.shape[1]) - 1
+            if levels == 0:
+                value = 0.0
+            else:
+                table = onehot.T @ other
+                expected = np.outer(counts, other.sum(axis=0)) / n
+                chi2 = ((table - expected) ** 2 / expected).sum()
+                value = min(np.sqrt(chi2 / (n * levels)), 1.0)
+            association[j, k] = association[k, j] = value
+    return association
+
+
+def correlation_blocks(correlation: np.ndarray, max_block_size: int) -> List[List[int]]:
+    """Disjoint blocks of variable indices, each of at most ``max_block_size``."""
+    p = correlation.shape[0]
+    if p <= max_block_size:
+        return [list(range(p))]
+
+    distance = 1.0 - np.abs(correlation)
+    np.fill_diagonal(distance, 0.0)
+    tree = to_tree(linkage(squareform(distance, checks=False), method="average"))
+
+    blocks: List[List[int]] = []
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        if node.get_count() <= max_block_size:
+            blocks.append(sorted(node.pre_order()))
+        else:
+            stack.extend([node.get_right(), node.get_left()])
+
+    # Neighbouring small clusters in dendrogram order are merged up to the cap.
+    merged: List[List[int]] = []
+    for block in blocks:
+        if merged and len(merged[-1]) + len(block) <= max_block_size:
+            merged[-1] = sorted(merged[-1] + block)
+        else:
+            merged.append(block)
+    return merged
+
+
+def add_overlap(
+    correlation: np.ndarray, cores: List[List[int]], overlap: int
+) -> List[List[int]]:
+    """Extend each core by the outside variables most associated with it."""
+    if overlap <= 0 or len(cores) == 1:
+        return [list(core) for core in cores]
+
+    strength = np.abs(correlation)
+    np.fill_diagonal(strength, 0.0)
+    blocks = []
+    for core in cores:
+        link = strength[core].max(axis=0)
+        link[core] = -1.0
+        extra = [int(j) for j in np.argsort(-link)[:overlap] if link[j] > 0]
+        blocks.append(sorted(core + extra))
+    return blocks
+
+
+def _canonical(edge: EdgeTuple) -> Tuple[Tuple[str, str], Tuple[str, str]]:
+    a, b, end_a, end_b = edge
+    if a <= b:
+        return (a, b), (end_a, end_b)
+    return (b, a), (end_b, end_a)
+
+
+def _directed_cycle(edges: Dict[Tuple[str, str], Tuple[str, str]]) -> List[Tuple[str, str]]:
+    """Pairs (as keys of ``edges``) on one directed cycle, or [] if acyclic."""
+    children: Dict[str, List[str]] = {}
+    for (a, b), ends in edges.items():
+        if ends == ("TAIL", "ARROW"):
+            children.setdefault(a, []).append(b)
+        elif ends == ("ARROW", "TAIL"):
+            children.setdefault(b, []).append(a)
+
+    state: Dict[str, int] = {}
+    for root in children:
+        if state.get(root):
+            continue
+        path = [root]
+        iterators = [iter(children.get(root, []))]
+        state[root] = 1
+        while iterators:
+            child = next(iterators[-1], None)
+            if child is None:
+                state[path.pop()] = 2
+                iterators.pop()
+            elif state.get(child) == 1:
+                cycle = path[path.index(child) :] + [child]
+                return [tuple(sorted(pair)) for pair in zip(cycle, cycle[1:])]
+            elif not state.get(child):
+                state[child] = 1
+                path.append(child)
+                iterators.append(iter(children.get(child, [])))
+    return []
+
+
+def merge_block_edges(
+    names: Sequence[str],
+    cores: List[List[int]],
+    blocks: List[List[int]],
+    block_edges: List[List[EdgeTuple]],
+) -> Tuple[List[EdgeTuple], Dict[str, int]]:
+    """Merge the sub-graph edges of overlapping blocks into one edge list.
+
+    :return: The merged edges and counts of reconciled pairs and broken cycles.
+    """
+    owner = {names[j]: i for i, core in enumerate(cores) for j in core}
+    members: List[Set[str]] = [{names[j] for j in block} for block in blocks]
+
+    votes: Dict[Tuple[str, str], Dict[int, Tuple[str, str]]] = {}
+    for i, edges in enumerate(block_edges):
+        for edge in edges:
+            pair, ends = _canonical(edge)
+            votes.setdefault(pair, {})[i] = ends
+
+    merged: Dict[Tuple[str, str], Tuple[str, str]] = {}
+    reconciled: Set[Tuple[str, str]] = set()
+    for pair, found in votes.items():
+        a, b = pair
+        if owner[a] == owner[b]:
+            if owner[a] in found:
+                merged[pair] = found[owner[a]]
+            continue
+
+        holders = sum(1 for block in members if a in block and b in block)
+        if 2 * len(found) < holders:
+            continue
+        (ends, count), *rest = Counter(found.values()).most_common()
+        if rest and rest[0][1] == count:
+            ends = ("TAIL", "TAIL")
+        merged[pair] = ends
+        reconciled.add(pair)
+
+    broken = 0
+    while True:
+        cycle = _directed_cycle(merged)
+        if not cycle:
+            break
+        candidates = [pair for pair in cycle if pair in reconciled] or cycle
+        merged[candidates[0]] = ("TAIL", "TAIL")
+        broken += 1
+
+    edges = [(a, b, end_a, end_b) for (a, b), (end_a, end_b) in sorted(merged.items())]
+    return edges, {"reconciled_pairs": len(reconciled), "broken_cycles": broken}
@@ -4,6 +4,7 @@
 ## future version, we may allow the outputs to be given other formats.)
 
 import importlib.resources as importlib_resources
+from pathlib import Path
 
 import jpype.imports
 
@@ -64,7 +65,11 @@ class TetradSearch:
     :type bootstrap_graphs: object or None
     """
     def __init__(self, df):
-        self.data = tr.pandas_data_to_tetrad(df)
+        # A Tetrad DataModel is used as is; None gives a search that only holds results.
+        if df is None or isinstance(df, td.DataModel):
+            self.data = df
+        else:
+            self.data = tr.pandas_data_to_tetrad(df)
         self.SCORE = None
         self.TEST = None
         self.MC_TEST = None
@@ -73,6 +78,27 @@ class TetradSearch:
         self.mc_knowledge = None
         self.params = Parameters()
         self.bootstrap_graphs = None
+        self.test_cache = None
+        self.score_cache = None
+
+    def fork(self):
+        """
+        Returns a search over the same data, test, score, caches and knowledge, with its own copy
+        of the parameters and its own result. Forks can run different algorithms concurrently in
+        threads without converting the data again.
+
+        :return: TetradSearch
+        """
+        forked = TetradSearch(self.data)
+        forked.SCORE = self.SCORE
+        forked.TEST = self.TEST
+        forked.MC_TEST = self.MC_TEST
+        forked.knowledge = td.Knowledge(self.knowledge)
+        forked.mc_knowledge = self.mc_knowledge
+        forked.params = Parameters(self.params)
+        forked.test_cache = self.test_cache
+        forked.score_cache = self.score_cache
+        return forked
 
     def __str__(self):
         display = [self.SCORE, self.TEST, self.knowledge, self.java]
@@ -188,6 +214,19 @@ class TetradSearch:
             self.TEST = ind_.FisherZ()
 
 
+    # Fisher Z computed in NumPy (src/partial_correlation.py) from a correlation matrix computed once
+    # per dataset, with Cholesky factors cached across conditioning sets. Works on covariance matrices.
+    def use_numpy_fisher_z(self, alpha=0.01, max_cache_mb=256, use_for_mc=False):
+        from src.pytetrad.WrappedFisherZ import WrappedFisherZ
+
+        self.params.set(Params.ALPHA, alpha)
+        test = WrappedFisherZ(alpha=alpha, max_cache_mb=max_cache_mb)
+
+        if use_for_mc:
+            self.MC_TEST = test
+        else:
+            self.TEST = test
+
     # This conflicts--to use a particular test like this, you should do the whole thing in JPype.
     # # The supplied test should implement edu.cmu.tetrad.algcomparison.independence.IndependenceWrapper in Tetrad.
     # def use_test(self, test, use_for_mc=False):
@@ -267,6 +306,24 @@ class TetradSearch:
         else:
             self.TEST = ind_.Kci()
 
+    # Python KCI (src/kernel_ci.py) with per-variable kernel caching. approximation_rank: number of
+    # Nystroem landmarks, None for exact n x n kernels. Tests whatever data the algorithm passes in,
+    # including bootstrap resamples. batch_threads > 1 computes concurrently requested tests in batches
+    # on that many Python threads (pair it with num_threads so Tetrad issues tests in parallel).
+    def use_kci_wrapper(self, alpha=0.01, est_width="empirical", epsilon=1e-3, approximation_rank=None,
+                        max_cache_mb=1024, seed=0, batch_threads=None, use_for_mc=False):
+        from src.pytetrad.WrappedClKci import WrappedClKci
+
+        self.params.set(Params.ALPHA, alpha)
+        test = WrappedClKci(None, alpha=alpha, est_width=est_width, epsilon=epsilon,
+                            approximation_rank=approximation_rank, max_cache_mb=max_cache_mb, seed=seed,
+                            batch_threads=batch_threads)
+
+        if use_for_mc:
+            self.MC_TEST = test
+        else:
+            self.TEST = test
+
     def use_cci(self, alpha=0.01, scaling_factor=2, num_basis_functions=3, basis_type=4,
                 basis_scale=0.0, use_for_mc=False):
         self.params.set(Params.ALPHA, alpha)
@@ -280,6 +337,73 @@ class TetradSearch:
         else:
             self.TEST = ind_.CciTest()
 
+    def use_test_cache(self, max_memory_mb=256, cache_dir=None, data_hash=None):
+        """
+        Wraps the configured test (and Markov-checker test, if any) in a memoizing layer that
+        answers repeated (X, Y | S) queries on this search's data from one shared LRU cache.
+        Call this after the use_{test name} methods.
+
+        :param max_memory_mb: Approximate memory cap of the cache; least recently used entries
+            are evicted beyond it.
+        :type max_memory_mb: float
+        :param cache_dir: If given together with data_hash, the cache is loaded from and saved to
+            a file for this dataset in this directory.
+        :type cache_dir: str
+        :param data_hash: Content hash of the data, used to name the cache file.
+        :type data_hash: str
+        :return: None
+        """
+        from src.caching import LruCache
+        from src.pytetrad.WrappedCachedTest import WrappedCachedTest
+
+        path = None
+        if cache_dir is not None and data_hash is not None:
+            path = Path(cache_dir) / f"ci_{data_hash}.pkl"
+
+        self.test_cache = LruCache(max_memory_mb, path)
+
+        if self.TEST is not None:
+            self.TEST = WrappedCachedTest(self.TEST, self.test_cache, self.data)
+        if self.MC_TEST is not None:
+            self.MC_TEST = WrappedCachedTest(self.MC_TEST, self.test_cache, self.data)
+
+    def save_test_cache(self):
+        if self.test_cache is not None:
+            self.test_cache.save()
+
+    def use_score_cache(self, max_memory_mb=256, cache_dir=None, data_hash=None):
+        """
+        Wraps the configured score in a memoizing layer that stores local scores by
+        (node, parent set) for this search's data. For penalized scores the penalty discount
+        is factored out, so a cache saved by a run with one penalty_discount is reused by runs
+        with another. Call this after the use_{score name} methods.
+
+        :param max_memory_mb: Approximate memory cap of the cache; least recently used entries
+            are evicted beyond it.
+        :type max_memory_mb: float
+        :param cache_dir: If given together with data_hash, the cache is loaded from and saved to
+            a file for this dataset in this directory.
+        :type cache_dir: str
+        :param data_hash: Content hash of the data, used to name the cache file.
+        :type data_hash: str
+        :return: None
+        """
+        from src.caching import LruCache
+        from src.pytetrad.WrappedCachedScore import WrappedCachedScore
+
+        path = None
+        if cache_dir is not None and data_hash is not None:
+            path = Path(cache_dir) / f"score_{data_hash}.pkl"
+
+        self.score_cache = LruCache(max_memory_mb, path)
+
+        if self.SCORE is not None:
+            self.SCORE = WrappedCachedScore(self.SCORE, self.score_cache, self.data)
+
+    def save_score_cache(self):
+        if self.score_cache is not None:
+            self.score_cache.save()
+
     def add_to_tier(self, tier, var_name):
         self.knowledge.addToTier(lang.Integer(tier), lang.String(var_name))
 
@@ -460,6 +584,55 @@ class TetradSearch:
         self.java = alg.search(self.data, self.params)
         self.bootstrap_graphs = alg.getBootstrapGraphs()
 
+    # PC with the adjacency search (stable FAS, Fisher Z) done in NumPy by src/fas.py; colliders and
+    # Meek rules are then oriented by Tetrad from the skeleton and sepsets. Continuous data only.
+    def run_numpy_pc(self, alpha=0.01, depth=-1, max_cache_mb=256, meek_prevent_cycles=True):
+        from src.fas import fas_stable
+        from src.pytetrad.WrappedFisherZ import engine_for
+
+        variables = self.data.getVariables()
+        names = [str(node.getName()) for node in variables]
+        pairs = [(i, j) for i in range(len(names)) for j in range(i + 1, len(names))]
+        forbidden = [(i, j) for i, j in pairs
+                     if self.knowledge.isForbidden(names[i], names[j])
+                     and self.knowledge.isForbidden(names[j], names[i])]
+        required = [(i, j) for i, j in pairs
+                    if self.knowledge.isRequired(names[i], names[j])
+                    or self.knowledge.isRequired(names[j], names[i])]
+
+        adjacency, sepsets = fas_stable(engine_for(self.data, max_cache_mb), alpha, depth, forbidden,
+                                        required=required)
+
+        graph = gr.EdgeListGraph(variables)
+        sepset_map = search_utils.SepsetMap()
+        for i, j in zip(*adjacency.nonzero()):
+            if i < j:
+                graph.addUndirectedEdge(variables.get(int(i)), variables.get(int(j)))
+
+        # Orient the edges knowledge decides (required, or forbidden one way) before colliders and Meek,
+        # as Tetrad's PC does.
+        for i, j in zip(*adjacency.nonzero()):
+            if self.knowledge.isRequired(names[i], names[j]) or (
+                    self.knowledge.isForbidden(names[j], names[i])
+                    and not self.knowledge.isForbidden(names[i], names[j])):
+                x, y = variables.get(int(i)), variables.get(int(j))
+                graph.removeEdge(x, y)
+                graph.addDirectedEdge(x, y)
+        for (i, j), z in sepsets.items():
+            conditioning = util.HashSet()
+            for k in z:
+                conditioning.add(variables.get(int(k)))
+            sepset_map.set(variables.get(i), variables.get(j), conditioning)
+
+        search_utils.GraphSearchUtils.orientCollidersUsingSepsets(sepset_map, self.knowledge, graph, False, True)
+        meek = search_utils.MeekRules()
+        meek.setKnowledge(self.knowledge)
+        meek.setMeekPreventCycles(meek_prevent_cycles)
+        meek.orientImplied(graph)
+
+        self.java = graph
+        self.bootstrap_graphs = None
+
     def run_pc_max(self, conflict_rule=1, depth=-1, stable_fas=True, guarantee_cpdag=True):
         self.params.set(Params.CONFLICT_RULE, conflict_rule)
         self.params.set(Params.DEPTH, depth)
@@ -860,6 +1033,28 @@ class TetradSearch:
             dag = gr.GraphTransforms.dagFromCpdag(java)
             return dag
 
+    def score_graph(self, java=None):
+        """
+        Total score of a graph under the configured score: the sum of the local scores of a DAG
+        in its equivalence class (Tetrad scores are higher-is-better).
+
+        :param java: Graph to score; defaults to the last search result.
+        :return: float
+        """
+        from jpype import JArray, JInt
+
+        score = self.SCORE.getScore(self.data, self.params)
+        variables = score.getVariables()
+        graph = gr.GraphUtils.replaceNodes(self.java if java is None else java, variables)
+        dag = gr.GraphTransforms.dagFromCpdag(graph)
+        index = {str(node.getName()): i for i, node in enumerate(variables)}
+
+        total = 0.0
+        for i, node in enumerate(variables):
+            parents = [index[str(parent.getName())] for parent in dag.getParents(dag.getNode(node.getName()))]
+            total += float(score.localScore(i, JArray(JInt)(parents)))
+        return total
+
     def get_causal_learn(self, java=None):
         if (java == None):
             return tr.tetrad_graph_to_causal_learn(self.java)
@@ -999,6 +1194,80 @@ class TetradSearch:
 
         return pvalues
 
+    def markov_check_arrays(self, graph, conditioning="ordered_local_markov", max_facts=None, seed=None,
+                            num_threads=1):
+        """
+        Markov check with the facts and p-values returned as NumPy arrays. The independencies implied
+        by a DAG in the graph's class are enumerated in Python; with the NumPy Fisher Z test as the
+        Markov-checker test all p-values are computed in bulk, otherwise the test is called from
+        num_threads threads.
+
+        :param graph: Graph to check (a DAG or CPDAG).
+        :param conditioning: "ordered_local_markov" (each pair once) or "local_markov".
+        :param max_facts: Test a random subset of at most this many facts; None tests all.
+        :param seed: Seed for the random subset.
+        :param num_threads: Threads calling a Java test.
+        :return: src.markov_check.MarkovCheckResult
+        """
+        results, _ = self.markov_check_batch([graph], conditioning, max_facts, seed, num_threads)
+        return results[0]
+
+    def markov_check_batch(self, graphs, conditioning="ordered_local_markov", max_facts=None, seed=None,
+                           num_threads=1):
+        """
+        Markov check of many candidate graphs (bootstrap graphs, grid points, algorithms) against one
+        Markov-checker test. The facts all graphs imply are deduplicated and each distinct fact is
+        tested once; every graph is then scored from the shared p-values.
+
+        :param graphs: Iterable of graphs (DAGs or CPDAGs) over the data's variables.
+        :param conditioning: "ordered_local_markov" (each pair once) or "local_markov".
+        :param max_facts: Per graph, test a random subset of at most this many facts.
+        :param seed: Seed for the random subsets.
+        :param num_threads: Threads calling a Java test.
+        :return: A list of src.markov_check.MarkovCheckResult, one per graph, and the distinct
+            facts tested.
+        """
+        from concurrent.futures import ThreadPoolExecutor
+
+        import numpy as np
+
+        from src.markov_check import (MarkovCheckResult, dag_parents, deduplicate_facts,
+                                      implied_independencies, sample_facts)
+        from src.parallel_search import graph_edges
+
+        if self.MC_TEST is None:
+            raise Exception("A test for the Markov Checker has not been set. Please call as use_{test name} method setting the parmaeter 'use_for_mc' to True")
+
+        test = self.MC_TEST.getTest(self.data, self.params)
+        variables = test.getVariables()
+        names = [str(node.getName()) for node in variables]
+
+        fact_sets = []
+        for graph in graphs:
+            dag = gr.GraphTransforms.dagFromCpdag(gr.GraphUtils.replaceNodes(graph, variables))
+            facts = implied_independencies(names, dag_parents(names, graph_edges(dag)), conditioning)
+            fact_sets.append(sample_facts(facts, max_facts, seed))
+        unique, positions = deduplicate_facts(fact_sets)
+
+        # The KCI wrapper has no engine when it falls back to causal-learn's CIT.
+        if getattr(test, "engine", None) is not None:
+            pvalues = test.engine.pvalues(unique.queries())
+        else:
+            def pvalue(query):
+                x, y, z = query
+                conditioning_set = util.HashSet()
+                for k in z:
+                    conditioning_set.add(variables.get(k))
+                result = test.checkIndependence(variables.get(x), variables.get(y), conditioning_set)
+                return float(result.getPValue())
+
+            with ThreadPoolExecutor(max_workers=num_threads) as pool:
+                pvalues = np.fromiter(pool.map(pvalue, unique.queries()), dtype=float, count=len(unique))
+
+        alpha = float(test.getAlpha())
+        results = [MarkovCheckResult(facts, pvalues[where], alpha) for facts, where in zip(fact_sets, positions)]
+        return results, unique
+
     # Returns a (tetrad-format) List of Sets of Nodes. Each set of nodes in the list is an adjustment set
     # for the source/target pair.f
     # near_which_endpoint: The endpoint(s) to consider for adjustment; 1 = near the source, 2 = near the target, 3 = near either.
@@ -1007,6 +1276,49 @@ class TetradSearch:
         return graph.paths().adjustmentSets(source, target, max_num_sets, max_distance_from_point,
                                              near_which_endpoint, max_path_length)
 
+    def get_adjustment_sets_batch(self, graph, pairs=None, max_num_sets=10, max_distance_from_point=5,
+                                  near_which_endpoint=1, max_path_length=20, num_threads=1):
+        """
+        Adjustment sets for many (source, target) pairs of one graph. The graph's Paths object, node
+        lookup and possibly-causal reachability are computed once; the pairs are queried from
+        num_threads threads and the answers come back as Python sets of variable names.
+
+        :param graph: The graph.
+        :param pairs: (source name, target name) pairs; None queries every pair joined by a possibly
+            causal path.
+        :param num_threads: Threads querying Tetrad.
+        :return: Dict from (source, target) to a list of sets of names, or None for a pair without a
+            possibly causal path from source to target.
+        """
+        from concurrent.futures import ThreadPoolExecutor
+
+        from src.adjustment import ancestor_matrix
+        from src.parallel_search import graph_edges
+
+        nodes = {str(node.getName()): node for node in graph.getNodes()}
+        names = list(nodes)
+        reach = ancestor_matrix(names, graph_edges(graph))
+        index = {name: i for i, name in enumerate(names)}
+        if pairs is None:
+            pairs = [(a, b) for a in names for b in names if a != b and reach[index[a], index[b]]]
+        pairs = [(str(a), str(b)) for a, b in pairs]
+        unknown = {name for pair in pairs for name in pair} - set(nodes)
+        if unknown:
+            raise ValueError(f"Unknown variables in adjustment pairs: {sorted(unknown)}")
+
+        paths = graph.paths()
+
+        def query(pair):
+            source, target = pair
+            if not reach[index[source], index[target]]:
+                return None
+            sets = paths.adjustmentSets(nodes[source], nodes[target], max_num_sets, max_distance_from_point,
+                                        near_which_endpoint, max_path_length)
+            return [{str(node.getName()) for node in node_set} for node_set in sets]
+
+        with ThreadPoolExecutor(max_workers=num_threads) as pool:
+            return dict(zip(pairs, pool.map(query, pairs)))
+
 
 def mimbuild(clustering, measure_names, latent_names, cov, full_graph=False):
     mb = ts.Mimbuild()
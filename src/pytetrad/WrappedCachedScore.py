@@ -0,0 +1,185 @@
+# This module wraps any Tetrad score in a memoizing layer, so that local scores of
+# (node, parent set) pairs repeated across num_starts, the original-data run of a
+# bootstrap and penalty sweeps are computed once per dataset.
+#
+# To use it from py-tetrad, wrap the ScoreWrapper you would otherwise pass to an
+# algorithm:
+# cache = LruCache(max_memory_mb=256)
+# score = WrappedCachedScore(score_.DegenerateGaussianBicScore(), cache, data)
+#
+# Keys are (score parameters other than the penalty discount, node name, frozenset of
+# parent names), so entries saved to disk stay valid when the columns are reordered.
+# For scores with a penalty discount c the local score is linear in c,
+# s(c) = s(0) + c * (s(1) - s(0)), so an entry keeps the values at the (at most two)
+# penalties seen so far; once two are known every other penalty is interpolated
+# without calling the inner score. A second point is only kept when both values are
+# finite and the penalties are far enough apart for the interpolation to be stable;
+# otherwise other penalties are scored by the inner score. Only the registered dataset is cached; resampled
+# datasets (bootstrap) go straight to the inner score.
+
+import jpype.imports
+from jpype import JArray, JImplements, JInt, JOverride
+
+import importlib.resources as importlib_resources
+import math
+
+jar_path = importlib_resources.files('pytetrad').joinpath('resources','tetrad-current.jar')
+jar_path = str(jar_path)
+if not jpype.isJVMStarted():
+    try:
+        jpype.startJVM(jpype.getDefaultJVMPath(), classpath=[jar_path])
+    except OSError:
+        print("can't load jvm")
+        pass
+
+import edu.cmu.tetrad.search.score as tss
+import edu.cmu.tetrad.algcomparison.score as agscore
+import java.lang as lang
+
+from edu.cmu.tetrad.util import Params
+
+# Smallest relative gap between two cached penalties used for interpolation.
+MIN_PENALTY_GAP = 1e-3
+
+
+# Implements the Score interface in Tetrad by delegating to the inner score at the
+# configured penalty and memoizing local scores in a shared cache.
+@JImplements(tss.Score)
+class CachedScoreWrapper:
+    def __init__(self, wrapper, data_model, parameters, cache, signature, penalized):
+        self.cache = cache
+        self.signature = signature
+        self.penalized = penalized
+        self.penalty = float(parameters.getDouble(Params.PENALTY_DISCOUNT)) if penalized else None
+        self.score = wrapper.getScore(data_model, parameters)
+        self.names = [str(variable.getName()) for variable in self.score.getVariables()]
+
+    def _local_score(self, node, parents):
+        key = (self.signature, self.names[int(node)],
+               frozenset(self.names[int(parent)] for parent in parents))
+
+        points = self.cache.get(key, ())
+        for penalty, value in points:
+            if penalty == self.penalty:
+                return value
+
+        if len(points) == 2:
+            (c0, s0), (c1, s1) = points
+            return s0 + (self.penalty - c0) * (s1 - s0) / (c1 - c0)
+
+        value = float(self.score.localScore(int(node), JArray(JInt)([int(p) for p in parents])))
+        if not points:
+            self.cache.put(key, ((self.penalty, value),))
+        elif self.penalized and self._interpolable(points[0], (self.penalty, value)):
+            self.cache.put(key, (points[0], (self.penalty, value)))
+        return value
+
+    @staticmethod
+    def _interpolable(first, second):
+        (c0, s0), (c1, s1) = first, second
+        gap = abs(c1 - c0)
+        return (math.isfinite(s0) and math.isfinite(s1)
+                and gap >= MIN_PENALTY_GAP * max(abs(c0), abs(c1), 1.0))
+
+    @JOverride
+    def localScore(self, *args):
+        node = args[0]
+        if len(args) == 1:
+            parents = []
+        elif isinstance(args[1], int):
+            parents = [args[1]]
+        else:
+            parents = list(args[1])
+        return self._local_score(node, parents)
+
+    @JOverride
+    def localScoreDiff(self, *args):
+        x = args[0]
+        y = args[1]
+        z = list(args[2]) if len(args) > 2 else []
+        return self._local_score(y, z + [x]) - self._local_score(y, z)
+
+    @JOverride
+    def getVariables(self, *arg):
+        return self.score.getVariables()
+
+    @JOverride
+    def isEffectEdge(self, *args):
+        return self.score.isEffectEdge(args[0])
+
+    @JOverride
+    def getSampleSize(self, *arg):
+        return self.score.getSampleSize()
+
+    @JOverride
+    def getMaxDegree(self, *arg):
+        return self.score.getMaxDegree()
+
+    @JOverride
+    def getVariable(self, *args):
+        return self.score.getVariable(args[0])
+
+    @JOverride
+    def determines(self, *args):
+        return self.score.determines(args[0], args[1])
+
+    @JOverride
+    def toString(self, *arg):
+        return "Cached " + str(self.score.toString())
+
+
+# Implements the ScoreWrapper interface in Tetrad, so that the cached score can be
+# handed to any algcomparison algorithm in place of the wrapper it decorates.
+@JImplements(agscore.ScoreWrapper)
+class WrappedCachedScore:
+    def __init__(self, wrapper, cache, data):
+        self.wrapper = wrapper
+        self.cache = cache
+        self.data = data
+
+    def _is_registered_data(self, data_model):
+        if self.data is None or data_model is None:
+            return False
+        return (lang.System.identityHashCode(data_model) == lang.System.identityHashCode(self.data)
+                and data_model.getNumColumns() == self.data.getNumColumns())
+
+    def _is_penalized(self):
+        return any(str(name) == str(Params.PENALTY_DISCOUNT) for name in self.wrapper.getParameters())
+
+    # The penalty discount is left out when the score is linear in it, so that runs
+    # with different penalties share entries.
+    def signature(self, parameters, penalized):
+        values = [str(self.wrapper.getDescription())]
+        for name in self.wrapper.getParameters():
+            if penalized and str(name) == str(Params.PENALTY_DISCOUNT):
+                continue
+            values.append(str(name) + "=" + str(parameters.get(name)))
+        return "|".join(values)
+
+    @JOverride
+    def getScore(self, *args):
+        data_model = args[0]
+        parameters = args[1]
+
+        if not self._is_registered_data(data_model):
+            return self.wrapper.getScore(data_model, parameters)
+
+        penalized = self._is_penalized()
+        return CachedScoreWrapper(self.wrapper, data_model, parameters, self.cache,
+                                  self.signature(parameters, penalized), penalized)
+
+    @JOverride
+    def getDescription(self):
+        return "Cached " + str(self.wrapper.getDescription())
+
+    @JOverride
+    def getDataType(self):
+        return self.wrapper.getDataType()
+
+    @JOverride
+    def getParameters(self):
+        return self.wrapper.getParameters()
+
+    @JOverride
+    def getVariable(self, *args):
+        return self.wrapper.getVariable(args[0])
@@ -0,0 +1,138 @@
+# This module wraps any Tetrad independence test in a memoizing layer, so that repeated
+# (X, Y | S) queries -- across algorithms, grid points and Markov checks on the same
+# data -- are answered from a shared LRU cache instead of being recomputed.
+#
+# To use it from py-tetrad, wrap the IndependenceWrapper you would otherwise pass to
+# an algorithm:
+# cache = LruCache(max_memory_mb=256)
+# test = WrappedCachedTest(ind_.FisherZ(), cache, data)
+#
+# Keys are (test signature, x, y, frozenset S) with x and y in name order, so the
+# symmetric query (Y, X | S) is a hit as well. The signature is the wrapper's
+# cache_signature() for the Python tests, whose options are not Tetrad parameters,
+# and its description and parameter values otherwise. Only the p-value and score are
+# cached; the independence decision is made from the current test's alpha. Only
+# queries against the registered dataset are cached; resampled datasets (bootstrap)
+# go straight to the inner test.
+
+import jpype.imports
+from jpype import JImplements, JOverride
+
+import importlib.resources as importlib_resources
+
+jar_path = importlib_resources.files('pytetrad').joinpath('resources','tetrad-current.jar')
+jar_path = str(jar_path)
+if not jpype.isJVMStarted():
+    try:
+        jpype.startJVM(jpype.getDefaultJVMPath(), classpath=[jar_path])
+    except OSError:
+        print("can't load jvm")
+        pass
+
+import edu.cmu.tetrad.graph as tg
+import edu.cmu.tetrad.search as ts
+import edu.cmu.tetrad.search.test as tt
+import edu.cmu.tetrad.algcomparison.independence as agind
+import java.lang as lang
+
+
+# Implements the IndependenceTest interface in Tetrad by delegating to an inner test and
+# memoizing its (p-value, score) answers in a shared cache.
+@JImplements(ts.IndependenceTest)
+class CachedTestWrapper:
+    def __init__(self, test, cache, signature):
+        self.test = test
+        self.cache = cache
+        self.signature = signature
+
+    @JOverride
+    def checkIndependence(self, *args):
+        x = args[0]
+        y = args[1]
+        s = args[2]
+
+        x_name = str(x)
+        y_name = str(y)
+        key = (self.signature, min(x_name, y_name), max(x_name, y_name),
+               frozenset(str(node) for node in s))
+
+        cached = self.cache.get(key)
+        if cached is None:
+            result = self.test.checkIndependence(x, y, s)
+            cached = (float(result.getPValue()), float(result.getScore()))
+            self.cache.put(key, cached)
+
+        p_value, score = cached
+        indep = p_value > float(self.test.getAlpha())
+        return tt.IndependenceResult(tg.IndependenceFact(x, y, s), indep, p_value, score)
+
+    @JOverride
+    def getVariables(self, *arg):
+        return self.test.getVariables()
+
+    @JOverride
+    def getData(self, *arg):
+        return self.test.getData()
+
+    @JOverride
+    def isVerbose(self, *arg):
+        return self.test.isVerbose()
+
+    @JOverride
+    def setVerbose(self, *arg):
+        self.test.setVerbose(arg[0])
+
+    @JOverride
+    def toString(self, *arg):
+        return "Cached " + str(self.test.toString())
+
+    @JOverride
+    def getAlpha(self, *args):
+        return self.test.getAlpha()
+
+
+# Implements the IndependenceWrapper interface in Tetrad, so that the cached test can be
+# handed to any algcomparison algorithm in place of the wrapper it decorates.
+@JImplements(agind.IndependenceWrapper)
+class WrappedCachedTest:
+    def __init__(self, wrapper, cache, data):
+        self.wrapper = wrapper
+        self.cache = cache
+        self.data = data
+
+    def _is_registered_data(self, data_model):
+        if self.data is None or data_model is None:
+            return False
+        return (lang.System.identityHashCode(data_model) == lang.System.identityHashCode(self.data)
+                and data_model.getNumColumns() == self.data.getNumColumns())
+
+    def signature(self, parameters):
+        if hasattr(self.wrapper, "cache_signature"):
+            return self.wrapper.cache_signature()
+        values = [str(self.wrapper.getDescription())]
+        for name in self.wrapper.getParameters():
+            values.append(str(name) + "=" + str(parameters.get(name)))
+        return "|".join(values)
+
+    @JOverride
+    def getTest(self, *args):
+        data_model = args[0]
+        parameters = args[1]
+        test = self.wrapper.getTest(data_model, parameters)
+
+        if not self._is_registered_data(data_model):
+            return test
+
+        return CachedTestWrapper(test, self.cache, self.signature(parameters))
+
+    @JOverride
+    def getDescription(self):
+        return "Cached " + str(self.wrapper.getDescription())
+
+    @JOverride
+    def getDataType(self):
+        return self.wrapper.getDataType()
+
+    @JOverride
+    def getParameters(self):
+        return self.wrapper.getParameters()
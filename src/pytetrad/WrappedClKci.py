@@ -13,8 +13,14 @@
 # This test will implement the IndependenceWrapper interface in Tetrad. For a test that implements the
 # IndependenceTest interface in Tetrad, use KciWrapper instead, in this module.
 #
+# By default (Gaussian kernels) the test is computed by src.kernel_ci.KernelCiEngine, which caches
+# per-variable kernel matrices across tests and can use a rank-r Nystroem approximation
+# (approximation_rank=r) for large samples. Passing any other causal-learn option falls back to
+# causal-learn's CIT.
+#
 # jdramsey 2024-08-24
 
+import logging
 import time as tm
 
 import jpype.imports
@@ -38,6 +44,9 @@ try:
 except ImportError as e:
     print('Could not import a causal-learn module: ', e)
 
+import numpy as np
+import pandas as pd
+
 import pytetrad.tools.translate as tr
 import edu.cmu.tetrad.data as td
 import edu.cmu.tetrad.graph as tg
@@ -47,6 +56,14 @@ import edu.cmu.tetrad.util as util
 import edu.cmu.tetrad.algcomparison.independence as agind
 import java.util as ju
 
+from src.batching import BatchQueue
+from src.kernel_ci import KernelCiEngine
+
+logger = logging.getLogger(__name__)
+
+# Options handled by KernelCiEngine; anything else is passed on to causal-learn's CIT.
+ENGINE_OPTIONS = {"est_width", "epsilon", "approximation_rank", "max_cache_mb", "seed"}
+
 # This is the wrapper for the KCI test from causal-learn. It implements the IndependenceTest interface in Tetrad.
 # The KCI test is a kernel-based independence test that can be used in Tetrad.
 #
@@ -67,13 +84,41 @@ import java.util as ju
 #         kwidthx: kernel width for data x (standard deviation sigma)
 #         kwidthy: kernel width for data y (standard deviation sigma)
 #
+# The cached engine takes instead:
+#
+#         est_width: 'empirical' or 'median'
+#         epsilon: ridge for regressing out the conditioning set (default=1e-3)
+#         approximation_rank: number of Nystroem landmarks; None for exact n x n kernels
+#         max_cache_mb: memory cap for cached kernels (default=1024)
+#         seed: seed for choosing the Nystroem landmarks
+#
+# and, to evaluate tests in parallel despite the GIL:
+#
+#         batch_threads: if > 1, tests requested concurrently by Tetrad's threads are queued into
+#             batches and computed on this many Python threads
+#         batch_window: seconds to wait for further requests while other requests are waiting (default=0.002)
+#
 @JImplements(ts.IndependenceTest)
 class KciWrapper:
-    def __init__(self, df, alpha=0.01, start_time=-1, timeout=-1, **kwargs):
+    def __init__(self, df, alpha=0.01, start_time=-1, timeout=-1, batch_threads=None, batch_window=0.002,
+                 **kwargs):
         self.df = df
         self.data = df.values
         self.alpha = alpha
-        self.kci_obj = CIT(self.data, "kci", **kwargs)
+        self.tetrad_data = None
+        self.batch_threads = batch_threads or 1
+        self.batch_queue = None
+
+        if set(kwargs) <= ENGINE_OPTIONS:
+            self.engine = KernelCiEngine(self.data, **kwargs)
+            self.kci_obj = self.engine.pvalue
+            if self.batch_threads > 1:
+                self.batch_queue = BatchQueue(
+                    lambda queries: self.engine.pvalues(queries, self.batch_threads), window=batch_window)
+        else:
+            self.engine = None
+            cit = CIT(self.data, "kci", **kwargs)
+            self.kci_obj = lambda x, y, s: cit(x, y, list(s))
 
         self.start_time = start_time
         self.timeout = timeout
@@ -103,23 +148,46 @@ class KciWrapper:
         Y = self.reverse_variable_map[y]
         S = [self.reverse_variable_map[si] for si in s]
 
-        pValue = self.kci_obj(X, Y, S)
+        if self.batch_queue is not None:
+            pValue = self.batch_queue.submit((X, Y, tuple(S)))
+        else:
+            pValue = self.kci_obj(X, Y, S)
 
-        # print("p = " + pValue)
-        print("Found " + str(pValue) + " for " + str(x) + " and " + str(y) + " given " + str(s))
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Found %s for %s and %s given %s", pValue, x, y, s)
 
         indep = pValue > self.alpha
 
         result = tt.IndependenceResult(fact, indep, pValue, self.alpha - pValue)
         return result
 
+    # Batched interface for Python callers: takes a list of (x, y, s) Tetrad nodes and node sets and
+    # returns their IndependenceResults, computed together on batch_threads threads.
+    def check_independence_batch(self, facts):
+        queries = [(self.reverse_variable_map[x], self.reverse_variable_map[y],
+                    tuple(self.reverse_variable_map[si] for si in s)) for x, y, s in facts]
+
+        if self.engine is not None:
+            pValues = self.engine.pvalues(queries, self.batch_threads)
+        else:
+            pValues = [self.kci_obj(X, Y, S) for X, Y, S in queries]
+
+        results = []
+        for (x, y, s), pValue in zip(facts, pValues):
+            pValue = float(pValue)
+            fact = tg.IndependenceFact(x, y, s)
+            results.append(tt.IndependenceResult(fact, pValue > self.alpha, pValue, self.alpha - pValue))
+        return results
+
     @JOverride
     def getVariables(self, *arg):
         return self.variables
 
     @JOverride
     def getData(self, *arg):
-        return tr.pandas_data_to_tetrad(self.df)
+        if self.tetrad_data is None:
+            self.tetrad_data = tr.pandas_data_to_tetrad(self.df)
+        return self.tetrad_data
 
     @JOverride
     def isVerbose(self, *arg):
@@ -147,7 +215,18 @@ class WrappedClKci:
 
     @JOverride
     def getTest(self, *args):
-        return KciWrapper(self.df, **self.kwargs)
+        # Without a DataFrame, test the data the algorithm hands us (e.g. a bootstrap resample).
+        df = self.df if self.df is not None else dataset_to_pandas(args[0])
+        return KciWrapper(df, alpha=self.alpha, **self.kwargs)
+
+    # Key of this test's results in a test cache (WrappedCachedTest): alpha and every option that changes
+    # p-values, since none of them are Tetrad parameters.
+    def cache_signature(self):
+        options = {key: value for key, value in self.kwargs.items()
+                   if key not in ("batch_threads", "batch_window", "max_cache_mb")}
+        values = ["Wrapped CL KCI", "alpha=" + str(self.alpha)]
+        values += [f"{key}={options[key]}" for key in sorted(options)]
+        return "|".join(values)
 
     @JOverride
     def getDescription(self):
@@ -160,3 +239,10 @@ class WrappedClKci:
     @JOverride
     def getParameters(self):
         return util.ArrayList()
+
+
+# Converts a continuous Tetrad DataSet to a pandas DataFrame with one bulk array transfer.
+def dataset_to_pandas(data):
+    values = np.array(data.getDoubleData().toArray())
+    columns = [str(name) for name in data.getVariableNames()]
+    return pd.DataFrame(values, columns=columns)
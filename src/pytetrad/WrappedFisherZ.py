@@ -0,0 +1,143 @@
+# This module wraps the NumPy Fisher-Z engine (src.partial_correlation.PartialCorrelationEngine) in
+# JPype objects so that Tetrad algorithms can use it in place of Tetrad's own FisherZ test.
+#
+# To use it as a test in py-tetrad:
+# import src.pytetrad.WrappedFisherZ as wf
+# test = wf.WrappedFisherZ(alpha=0.01)
+#
+# WrappedFisherZ implements the IndependenceWrapper interface in Tetrad and builds a FisherZWrapper
+# (an IndependenceTest) for whatever data model the algorithm passes in: a continuous DataSet, or a
+# CovarianceMatrix (covariance mode). The correlation matrix is computed once per data model, and
+# partial correlations come from Cholesky factors cached per conditioning set.
+
+import logging
+
+import jpype.imports
+from jpype import JImplements, JOverride
+
+import importlib.resources as importlib_resources
+
+jar_path = importlib_resources.files('pytetrad').joinpath('resources','tetrad-current.jar')
+jar_path = str(jar_path)
+if not jpype.isJVMStarted():
+    try:
+        jpype.startJVM(jpype.getDefaultJVMPath(), classpath=[jar_path])
+    except OSError:
+        print("can't load jvm")
+        pass
+
+import numpy as np
+
+import edu.cmu.tetrad.data as td
+import edu.cmu.tetrad.graph as tg
+import edu.cmu.tetrad.search as ts
+import edu.cmu.tetrad.search.test as tt
+import edu.cmu.tetrad.util as util
+import edu.cmu.tetrad.algcomparison.independence as agind
+
+from src.partial_correlation import PartialCorrelationEngine
+
+logger = logging.getLogger(__name__)
+
+
+# Implements the IndependenceTest interface in Tetrad with Fisher-Z p-values from the NumPy engine.
+# Results are the same IndependenceResult objects Tetrad's FisherZ returns.
+@JImplements(ts.IndependenceTest)
+class FisherZWrapper:
+    def __init__(self, data_model, alpha=0.01, max_cache_mb=256):
+        self.data_model = data_model
+        self.alpha = alpha
+        self.variables = data_model.getVariables()
+        self.index = {str(node): i for i, node in enumerate(self.variables)}
+
+        self.engine = engine_for(data_model, max_cache_mb)
+
+    def _query(self, x, y, s):
+        return self.index[str(x)], self.index[str(y)], tuple(self.index[str(node)] for node in s)
+
+    def _result(self, x, y, s, pValue):
+        pValue = float(pValue)
+        fact = tg.IndependenceFact(x, y, s)
+        return tt.IndependenceResult(fact, pValue > self.alpha, pValue, self.alpha - pValue)
+
+    @JOverride
+    def checkIndependence(self, *args):
+        x = args[0]
+        y = args[1]
+        s = args[2]
+
+        X, Y, S = self._query(x, y, s)
+        pValue = self.engine.pvalue(X, Y, S)
+
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Found %s for %s and %s given %s", pValue, x, y, s)
+
+        return self._result(x, y, s, pValue)
+
+    # Batched interface for Python callers: takes a list of (x, y, s) Tetrad nodes and node sets and
+    # returns their IndependenceResults, vectorized per conditioning set.
+    def check_independence_batch(self, facts):
+        pValues = self.engine.pvalues([self._query(x, y, s) for x, y, s in facts])
+        return [self._result(x, y, s, pValue) for (x, y, s), pValue in zip(facts, pValues)]
+
+    @JOverride
+    def getVariables(self, *arg):
+        return self.variables
+
+    @JOverride
+    def getData(self, *arg):
+        return self.data_model
+
+    @JOverride
+    def isVerbose(self, *arg):
+        return False
+
+    @JOverride
+    def setVerbose(self, *arg):
+        pass
+
+    @JOverride
+    def toString(self, *arg):
+        return "NumPy Fisher Z, alpha = " + str(self.alpha)
+
+    @JOverride
+    def getAlpha(self, *args):
+        return self.alpha
+
+
+@JImplements(agind.IndependenceWrapper)
+class WrappedFisherZ:
+    def __init__(self, alpha=0.01, max_cache_mb=256):
+        self.alpha = alpha
+        self.max_cache_mb = max_cache_mb
+
+    @JOverride
+    def getTest(self, *args):
+        return FisherZWrapper(args[0], alpha=self.alpha, max_cache_mb=self.max_cache_mb)
+
+    # Key of this test's results in a test cache (WrappedCachedTest): its options are not Tetrad parameters.
+    def cache_signature(self):
+        return "NumPy Fisher Z|alpha=" + str(self.alpha)
+
+    @JOverride
+    def getDescription(self):
+        return "NumPy Fisher Z"
+
+    @JOverride
+    def getDataType(self):
+        return td.DataType.Continuous
+
+    @JOverride
+    def getParameters(self):
+        return util.ArrayList()
+
+
+# Builds the NumPy engine for a continuous DataSet or a CovarianceMatrix, with one bulk array transfer.
+def engine_for(data_model, max_cache_mb=256):
+    if isinstance(data_model, td.ICovarianceMatrix):
+        covariance = np.array(data_model.getMatrix().toArray())
+        return PartialCorrelationEngine.from_covariance(
+            covariance, int(data_model.getSampleSize()), max_cache_mb=max_cache_mb)
+
+    data = np.array(data_model.getDoubleData().toArray())
+    return PartialCorrelationEngine(data, max_cache_mb=max_cache_mb)
@@ -32,6 +32,8 @@ import java.util as util
 import edu.cmu.tetrad.data as td
 import edu.cmu.tetrad.graph as tg
 
+from src.endpoint_graph import EndpointGraph
+
 
 def pandas_data_to_tetrad(df: DataFrame, int_as_cont=False):
     dtypes = ["float16", "float32", "float64"]
@@ -88,27 +90,15 @@ def tetrad_data_to_pandas(data: td.DataSet):
 ## The defaults here are for the PCALG style of general graph endpoint matrices, but
 ## the user can use whichever endpoint encoding they like.
 def graph_to_matrix(g, nullEpt = 0, circleEpt = 1, arrowEpt = 2, tailEpt = 3):
-    endpoint_map = {"NULL": nullEpt,
-                    "CIRCLE": circleEpt,
-                    "ARROW": arrowEpt,
-                    "TAIL": tailEpt}
-
-    nodes = g.getNodes()
-    p = g.getNumNodes()
-    A = np.zeros((p, p), dtype=int)
-
-    for edge in g.getEdges():
-        i = nodes.indexOf(edge.getNode1())
-        j = nodes.indexOf(edge.getNode2())
-        A[j][i] = endpoint_map[edge.getEndpoint1().name()]
-        A[i][j] = endpoint_map[edge.getEndpoint2().name()]
-
-    columns_ = []
-
-    for name in nodes:
-        columns_.append(str(name))
+    # One call into Java for the whole graph; the endpoint codes are remapped in NumPy.
+    graph = g if isinstance(g, EndpointGraph) else EndpointGraph.from_tetrad(g)
+    # Cells without an edge (and the diagonal) stay 0 whatever nullEpt is, as before.
+    codes = np.array([nullEpt, circleEpt, arrowEpt, tailEpt])
+    A = np.zeros(graph.matrix.shape, dtype=int)
+    adjacent = graph.matrix != 0
+    A[adjacent] = codes[graph.matrix[adjacent]]
 
-    return pd.DataFrame(A, columns=columns_)
+    return pd.DataFrame(A, columns=graph.names)
 
 def tetrad_matrix_to_numpy(array):
     # print(array)
@@ -159,18 +149,18 @@ def write_gdot(g, gdot):
                     "ARROW": "empty",
                     "CIRCLE": "odot"}
 
-    for node in g.getNodes():
-        gdot.node(str(node.getName()),
+    graph = g if isinstance(g, EndpointGraph) else EndpointGraph.from_tetrad(g)
+
+    for name in graph.names:
+        gdot.node(name,
                   shape='circle',
                   fixedsize='true',
                   style='filled',
                   color='lightgray')
 
-    for edge in g.getEdges():
-        node1 = str(edge.getNode1().getName())
-        node2 = str(edge.getNode2().getName())
-        endpoint1 = str(endpoint_map[edge.getEndpoint1().name()])
-        endpoint2 = str(endpoint_map[edge.getEndpoint2().name()])
+    for node1, node2, endpoint1, endpoint2 in graph.edges():
+        endpoint1 = endpoint_map[endpoint1]
+        endpoint2 = endpoint_map[endpoint2]
         color = "blue"
         if (endpoint1 == "empty") and (endpoint2 == "empty"): color = "red"
         gdot.edge(node1, node2,
@@ -1,20 +1,14 @@
+from src.endpoint_graph import EndpointGraph
+
 
 def graphs_to_probs(graphs):
     probs = {}
-    reverse = {"---": "---", "o-o": "o-o", "o--": "--o",
-               "--o": "o--", "<--": "-->", "-->": "<--",
-               "<-o": "o->", "o->": "<-o", "<->": "<->"}
 
     for graph in graphs:
-        for edge in graph.getEdges():
-            edge = str(edge).split()
-
-            if edge[0] < edge[2]:
-                key = (edge[0], edge[2])
-                arr = edge[1]
-            else:
-                key = (edge[2], edge[0])
-                arr = reverse[edge[1]]
+        graph = graph if isinstance(graph, EndpointGraph) else EndpointGraph.from_tetrad(graph)
+        for a, b, _, _ in graph.edges():
+            key = (a, b) if a < b else (b, a)
+            arr = graph.symbol(*key)
 
             if key not in probs: probs[key] = {}
             if arr not in probs[key]: probs[key][arr] = 0
@@ -0,0 +1,295 @@
+"""SQLite store of run results, for comparing runs without re-parsing outputs.
+
+Each run is one row of ``runs``: dataset, data hash, algorithm, the full
+configuration (JSON, plus a hash of it to group identical parameters), the
+elapsed time and the run metrics. Its edges go to ``edges``, one row per
+adjacent pair with the endpoints and the bootstrap adjacency probability.
+The per-type bootstrap frequencies of each pair ("[X --> Y]:0.6;[no edge]:0.1")
+go to ``edge_frequencies``. Pairs are stored with the names in sorted order
+so that a pair is found by one index lookup whichever way it is asked for.
+
+Rows are inserted with ``executemany``, one transaction per call, and runs
+are indexed by dataset, algorithm and parameters. Existing output trees can
+be loaded in bulk::
+
+    python -m src.results_store --db results.db --ingest output/sweep
+    python -m src.results_store --db results.db --dataset synth_normal_4000 --edge X1 X2
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import re
+import sqlite3
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from src.endpoint_graph import EndpointGraph
+from src.graph_io import is_graph_file
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created TEXT NOT NULL,
+    dataset TEXT NOT NULL,
+    data_path TEXT,
+    data_hash TEXT,
+    algorithm TEXT NOT NULL,
+    params_hash TEXT NOT NULL,
+    config TEXT NOT NULL,
+    output_path TEXT,
+    elapsed_seconds REAL,
+    metrics TEXT
+);
+CREATE INDEX IF NOT EXISTS runs_dataset ON runs (dataset, algorithm);
+CREATE INDEX IF NOT EXISTS runs_algorithm ON runs (algorithm);
+CREATE INDEX IF NOT EXISTS runs_params ON runs (params_hash);
+CREATE INDEX IF NOT EXISTS runs_data_hash ON runs (data_hash);
+
+CREATE TABLE IF NOT EXISTS edges (
+    run_id INTEGER NOT NULL REFERENCES runs (run_id) ON DELETE CASCADE,
+    node1 TEXT NOT NULL,
+    node2 TEXT NOT NULL,
+    endpoint1 TEXT NOT NULL,
+    endpoint2 TEXT NOT NULL,
+    probability REAL
+);
+CREATE INDEX IF NOT EXISTS edges_pair ON edges (node1, node2, run_id);
+CREATE INDEX IF NOT EXISTS edges_run ON edges (run_id);
+
+CREATE TABLE IF NOT EXISTS edge_frequencies (
+    run_id INTEGER NOT NULL REFERENCES runs (run_id) ON DELETE CASCADE,
+    node1 TEXT NOT NULL,
+    node2 TEXT NOT NULL,
+    edge TEXT NOT NULL,
+    frequency REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS edge_frequencies_pair ON edge_frequencies (node1, node2, run_id);
+"""
+
+_FREQUENCY = re.compile(r"\[([^\]]+)\]:\s*([0-9.eE+-]+)")
+
+
+def params_hash(configuration: Dict[str, Any]) -> str:
+    """Hash of a configuration, equal for configurations with the same settings."""
+    canonical = json.dumps(configuration, sort_keys=True, default=str)
+    return hashlib.sha1(canonical.encode()).hexdigest()[:16]
+
+
+def edge_frequencies(graph_text: str) -> List[Tuple[str, str, str, float]]:
+    """(node 1, node 2, edge, frequency) for each bootstrap annotation of a graph text."""
+    rows = []
+    for line in graph_text.splitlines():
+        parts = line.split(None, 4)
+        if len(parts) < 5 or not parts[0].endswith(".") or "]:" not in parts[4]:
+            continue
+        a, b = sorted((parts[1], parts[3]))
+        rows.extend(
+            (a, b, edge, float(frequency)) for edge, frequency in _FREQUENCY.findall(parts[4])
+        )
+    return rows
+
+
+def _edge_rows(graph: EndpointGraph) -> List[Tuple[str, str, str, str, Optional[float]]]:
+    rows = []
+    for a, b, end_a, end_b in graph.edges():
+        probability = None
+        if graph.probability is not None:
+            probability = float(graph.probability[graph.index[a], graph.index[b]]) or None
+        if b < a:
+            a, b, end_a, end_b = b, a, end_b, end_a
+        rows.append((a, b, end_a, end_b, probability))
+    return rows
+
+
+class ResultsStore:
+    """A SQLite database of runs, their edges and bootstrap edge frequencies."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(str(self.path))
+        self.connection.execute("PRAGMA foreign_keys = ON")
+        self.connection.execute("PRAGMA journal_mode = WAL")
+        self.connection.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def __enter__(self) -> "ResultsStore":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def add_runs(self, runs: Iterable[Dict[str, Any]]) -> List[int]:
+        """Insert runs in one transaction.
+
+        Each run is a dict with ``graph_text`` (Tetrad's graph string),
+        ``dataset`` and ``algorithm``, and optionally ``configuration``,
+        ``data_path``, ``data_hash``, ``output_path``, ``elapsed_seconds`` and
+        ``metrics``.
+
+        :return: The new run ids.
+        """
+        run_ids = []
+        edges: List[Tuple] = []
+        frequencies: List[Tuple] = []
+        created = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        with self.connection:
+            for run in runs:
+                configuration = run.get("configuration") or {}
+                cursor = self.connection.execute(
+                    "INSERT INTO runs (created, dataset, data_path, data_hash, algorithm,"
+                    " params_hash, config, output_path, elapsed_seconds, metrics)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        created,
+                        run["dataset"],
+                        str(run["data_path"]) if run.get("data_path") else None,
+                        run.get("data_hash"),
+                        run["algorithm"],
+                        params_hash(configuration),
+                        json.dumps(configuration, sort_keys=True, default=str),
+                        str(run["output_path"]) if run.get("output_path") else None,
+                        run.get("elapsed_seconds"),
+                        json.dumps(run.get("metrics") or {}, default=str),
+                    ),
+                )
+                run_id = cursor.lastrowid
+                run_ids.append(run_id)
+                graph = EndpointGraph.from_text(run["graph_text"])
+                edges.extend((run_id, *row) for row in _edge_rows(graph))
+                frequencies.extend(
+                    (run_id, *row) for row in edge_frequencies(run["graph_text"])
+                )
+            self.connection.executemany(
+                "INSERT INTO edges (run_id, node1, node2, endpoint1, endpoint2, probability)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                edges,
+            )
+            self.connection.executemany(
+                "INSERT INTO edge_frequencies (run_id, node1, node2, edge, frequency)"
+                " VALUES (?, ?, ?, ?, ?)",
+                frequencies,
+            )
+        return run_ids
+
+    def add_run(self, graph_text: str, dataset: str, algorithm: str, **fields) -> int:
+        """Insert one run; see ``add_runs`` for the fields."""
+        run = dict(fields, graph_text=graph_text, dataset=dataset, algorithm=algorithm)
+        return self.add_runs([run])[0]
+
+    def runs(
+        self, dataset: Optional[str] = None, algorithm: Optional[str] = None
+    ) -> pd.DataFrame:
+        """Runs, optionally of one dataset and/or algorithm."""
+        clauses, values = [], []
+        if dataset is not None:
+            clauses.append("dataset = ?")
+            values.append(dataset)
+        if algorithm is not None:
+            clauses.append("algorithm = ?")
+            values.append(algorithm)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        return pd.read_sql_query(
+            f"SELECT * FROM runs{where} ORDER BY run_id", self.connection, params=values
+        )
+
+    def edge_history(self, a: str, b: str, dataset: Optional[str] = None) -> pd.DataFrame:
+        """The edge between ``a`` and ``b`` in every run (of ``dataset``).
+
+        Runs without the edge are included with ``edge`` set to None, so
+        the share of runs finding it is ``edge.notna().mean()``. The edge is
+        written from ``a`` to ``b``, e.g. "a --> b" or "a <-- b".
+        """
+        node1, node2 = sorted((a, b))
+        where = " WHERE r.dataset = ?" if dataset is not None else ""
+        frame = pd.read_sql_query(
+            "SELECT r.run_id, r.dataset, r.algorithm, r.params_hash, r.created,"
+            " e.endpoint1, e.endpoint2, e.probability"
+            " FROM runs r LEFT JOIN edges e"
+            " ON e.run_id = r.run_id AND e.node1 = ? AND e.node2 = ?"
+            f"{where} ORDER BY r.run_id",
+            self.connection,
+            params=[node1, node2] + ([dataset] if dataset is not None else []),
+        )
+        left = {"TAIL": "-", "ARROW": "<", "CIRCLE": "o"}
+        right = {"TAIL": "-", "ARROW": ">", "CIRCLE": "o"}
+
+        def symbol(row) -> Optional[str]:
+            if pd.isna(row.endpoint1):
+                return None
+            end_a, end_b = (
+                (row.endpoint1, row.endpoint2) if a == node1 else (row.endpoint2, row.endpoint1)
+            )
+            return f"{a} {left[end_a]}-{right[end_b]} {b}"
+
+        frame["edge"] = [symbol(row) for row in frame.itertuples()]
+        return frame.drop(columns=["endpoint1", "endpoint2"])
+
+    def edge_frequencies(self, a: str, b: str, dataset: Optional[str] = None) -> pd.DataFrame:
+        """Bootstrap frequency of each edge type between ``a`` and ``b``, per run."""
+        node1, node2 = sorted((a, b))
+        where = " AND r.dataset = ?" if dataset is not None else ""
+        return pd.read_sql_query(
+            "SELECT r.run_id, r.dataset, r.algorithm, f.edge, f.frequency"
+            " FROM edge_frequencies f JOIN runs r ON r.run_id = f.run_id"
+            f" WHERE f.node1 = ? AND f.node2 = ?{where} ORDER BY r.run_id, f.edge",
+            self.connection,
+            params=[node1, node2] + ([dataset] if dataset is not None else []),
+        )
+
+
+def ingest(store: ResultsStore, directory: Path) -> List[int]:
+    """Load every graph output below ``directory`` into the store in one batch.
+
+    The dataset is the name of the output's parent folder and the algorithm
+    the name of the folder above it, matching ``output/<algorithm>/<dataset>/``
+    sweep layouts.
+    """
+    runs = []
+    for path in sorted(Path(directory).rglob("*.txt")):
+        if not is_graph_file(path):
+            continue
+        runs.append(
+            {
+                "graph_text": path.read_text(encoding="utf-8"),
+                "dataset": path.parent.name,
+                "algorithm": path.parent.parent.name,
+                "output_path": path,
+            }
+        )
+    return store.add_runs(runs)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Load and query the results database.")
+    parser.add_argument("--db", type=Path, required=True, help="SQLite database file")
+    parser.add_argument("--ingest", type=Path, help="Directory of graph outputs to load")
+    parser.add_argument("--dataset", help="Restrict queries to one dataset")
+    parser.add_argument("--edge", nargs=2, metavar=("X", "Y"), help="Edge to look up")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(message)s")
+    with ResultsStore(args.db) as store:
+        if args.ingest:
+            start = time.perf_counter()
+            run_ids = ingest(store, args.ingest)
+            logger.info(
+                "Stored %d runs from %s in %.2f seconds",
+                len(run_ids), args.ingest, time.perf_counter() - start,
+            )
+        if args.edge:
+            print(store.edge_history(*args.edge, dataset=args.dataset).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
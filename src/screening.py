@@ -0,0 +1,165 @@
+"""Cheap pre-screening of variable pairs before the search.
+
+Pairs that are clearly independent are turned into forbidden edges, so the
+search never considers them. Two screens are available, both computed for
+all pairs at once in NumPy:
+
+* ``correlation``: Fisher-Z p-values of the correlations, optionally also
+  given each single other variable (``order: 1``), plus an optional minimum
+  absolute correlation. Only pairs of continuous columns are screened this
+  way; pairs involving a discrete column use the G-test below.
+* ``mutual_information``: G-tests of mutual information between binned (or
+  categorical) columns. All contingency tables come from one product of the
+  columns' one-hot encodings, which suits discrete and mixed data.
+"""
+
+import logging
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+from src.partial_correlation import PartialCorrelationEngine
+from src.shared_data import CONTINUOUS_DTYPES, encode_dataframe
+
+logger = logging.getLogger(__name__)
+
+SCREENING_METHODS = ["correlation", "mutual_information"]
+
+
+def correlation_screen(
+    engine: PartialCorrelationEngine,
+    alpha: float = 0.5,
+    order: int = 0,
+    min_abs_correlation: Optional[float] = None,
+) -> np.ndarray:
+    """Boolean p x p matrix of pairs screened out as independent.
+
+    A pair is screened out when its correlation has p-value above ``alpha``,
+    when (with ``order: 1``) its partial correlation given any single other
+    variable does, or when its absolute correlation is below
+    ``min_abs_correlation``.
+    """
+    if order not in (0, 1):
+        raise ValueError(f"Unsupported screening order '{order}'. Choices: [0, 1]")
+
+    p = engine.p
+    xs, ys = np.triu_indices(p, 1)
+    pruned = engine.pvalues_given(xs, ys) > alpha
+    if min_abs_correlation is not None:
+        pruned |= np.abs(engine.correlation[xs, ys]) < min_abs_correlation
+
+    if order == 1:
+        for k in range(p):
+            open_pairs = ~pruned & (xs != k) & (ys != k)
+            if not open_pairs.any():
+                break
+            pvalues = engine.pvalues_given(xs[open_pairs], ys[open_pairs], (k,))
+            pruned[np.flatnonzero(open_pairs)[pvalues > alpha]] = True
+
+    matrix = np.zeros((p, p), dtype=bool)
+    matrix[xs, ys] = pruned
+    return matrix
+
+
+def _bin_codes(df: pd.DataFrame, max_bins: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Integer codes (n x p) with at most ``max_bins`` levels per column."""
+    codes = np.empty(df.shape, dtype=np.intp)
+    levels = np.empty(df.shape[1], dtype=np.intp)
+    for j, col in enumerate(df.columns):
+        values = df[col]
+        if str(values.dtype) in CONTINUOUS_DTYPES and values.nunique() > max_bins:
+            edges = np.quantile(values, np.linspace(0, 1, max_bins + 1)[1:-1])
+            column = np.searchsorted(np.unique(edges), values.to_numpy(), side="right")
+        else:
+            # Most frequent categories first; the rarest share the last level.
+            ranks = {value: rank for rank, value in enumerate(values.value_counts().index)}
+            column = np.minimum(values.map(ranks).to_numpy(), max_bins - 1)
+        codes[:, j] = column
+        levels[j] = column.max() + 1
+    return codes, levels
+
+
+def mutual_information_screen(
+    df: pd.DataFrame, alpha: float = 0.5, max_bins: int = 5, block: int = 64
+) -> np.ndarray:
+    """Boolean p x p matrix of pairs whose mutual-information G-test has p > alpha."""
+    codes, levels = _bin_codes(df, max_bins)
+    n, p = codes.shape
+    onehot = np.zeros((n, p * max_bins))
+    onehot[np.arange(n)[:, None], np.arange(p) * max_bins + codes] = 1.0
+    marginals = onehot.sum(axis=0).reshape(p, max_bins)
+
+    pruned = np.zeros((p, p), dtype=bool)
+    for start in range(0, p, block):
+        stop = min(start + block, p)
+        # Contingency tables of the block's variables with every variable.
+        tables = (onehot[:, start * max_bins : stop * max_bins].T @ onehot).reshape(
+            stop - start, max_bins, p, max_bins
+        )
+        expected = marginals[start:stop, :, None, None] * marginals[None, None, :, :]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            terms = tables * np.log(tables * n / expected)
+        g_stat = 2.0 * np.nansum(terms, axis=(1, 3))
+        dof = (levels[start:stop, None] - 1) * (levels[None, :] - 1)
+        with np.errstate(invalid="ignore"):
+            pvalues = np.where(dof > 0, stats.chi2.sf(g_stat, np.maximum(dof, 1)), 1.0)
+        pruned[start:stop] = pvalues > alpha
+
+    return np.triu(pruned, 1)
+
+
+def screen_pairs(
+    params: Dict[str, Any],
+    data: Optional[pd.DataFrame] = None,
+    engine: Optional[PartialCorrelationEngine] = None,
+    names: Optional[Sequence[str]] = None,
+) -> List[Tuple[str, str]]:
+    """Pairs of variable names screened out by the configured method.
+
+    :param params: The ``screening`` configuration block.
+    :param data: Dataset, if rows are available.
+    :param engine: Correlation engine, for covariance mode (no rows).
+    :param names: Variable names of ``engine``.
+    """
+    method = params.get("method", "correlation")
+    if method not in SCREENING_METHODS:
+        raise ValueError(
+            f"Unsupported screening method '{method}'. Choices: {SCREENING_METHODS}"
+        )
+
+    alpha = float(params.get("alpha", 0.5))
+    if method == "mutual_information":
+        if data is None:
+            raise ValueError("Mutual-information screening needs the data rows.")
+        names = [str(col) for col in data.columns]
+        pruned = mutual_information_screen(data, alpha, int(params.get("max_bins", 5)))
+    else:
+        order = int(params.get("order", 0))
+        min_abs_correlation = params.get("min_abs_correlation")
+        if engine is not None:
+            pruned = correlation_screen(engine, alpha, order, min_abs_correlation)
+        else:
+            matrix, schema = encode_dataframe(data)
+            names = schema.names
+            continuous = np.flatnonzero(~np.asarray(schema.discrete, dtype=bool))
+            if len(continuous) == len(names):
+                pruned = correlation_screen(
+                    PartialCorrelationEngine(matrix), alpha, order, min_abs_correlation
+                )
+            else:
+                # Category codes carry no order, so pairs with a discrete
+                # column fall back to the G-test.
+                pruned = mutual_information_screen(
+                    data, alpha, int(params.get("max_bins", 5))
+                )
+                if len(continuous) > 1:
+                    pruned[np.ix_(continuous, continuous)] = correlation_screen(
+                        PartialCorrelationEngine(matrix[:, continuous]),
+                        alpha,
+                        order,
+                        min_abs_correlation,
+                    )
+
+    return [(names[i], names[j]) for i, j in zip(*np.nonzero(pruned))]
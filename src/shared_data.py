@@ -0,0 +1,223 @@
+"""Typed data matrices shared between processes without copying.
+
+The parent process encodes the dataset once into a float64 matrix held in
+POSIX shared memory (or a memory-mapped file). Worker processes attach to it
+by name and build Tetrad datasets from views of that single copy.
+"""
+
+import logging
+import secrets
+from dataclasses import dataclass, field
+from multiprocessing import shared_memory
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+CONTINUOUS_DTYPES = ("float16", "float32", "float64")
+
+
+@dataclass(frozen=True)
+class SharedArrayHandle:
+    """Picklable reference to a shared array, sent to worker processes."""
+
+    name: str
+    shape: Tuple[int, ...]
+    dtype: str
+    path: Optional[str] = None  # memmap backing file instead of POSIX shm
+
+
+@dataclass(frozen=True)
+class ColumnSchema:
+    """Column names, types and category labels of an encoded dataset."""
+
+    names: List[str]
+    discrete: List[bool]
+    categories: Dict[str, List[str]] = field(default_factory=dict)
+
+
+class SharedArray:
+    """A NumPy array backed by POSIX shared memory or a memmapped file."""
+
+    def __init__(
+        self,
+        array: np.ndarray,
+        handle: SharedArrayHandle,
+        shm: Optional[shared_memory.SharedMemory] = None,
+        owner: bool = False,
+    ):
+        self.array = array
+        self.handle = handle
+        self._shm = shm
+        self._owner = owner
+
+    @classmethod
+    def create(
+        cls, source: np.ndarray, memmap_dir: Optional[Path] = None
+    ) -> "SharedArray":
+        """Copy ``source`` once into a new shared segment owned by the caller."""
+        source = np.ascontiguousarray(source)
+        nbytes = max(source.nbytes, 1)
+
+        if memmap_dir is not None:
+            memmap_dir.mkdir(parents=True, exist_ok=True)
+            name = f"cd_{secrets.token_hex(8)}"
+            path = memmap_dir / f"{name}.dat"
+            array = np.memmap(path, dtype=source.dtype, mode="w+", shape=source.shape)
+            array[...] = source
+            array.flush()
+            handle = SharedArrayHandle(name, source.shape, source.dtype.str, str(path))
+            return cls(array, handle, owner=True)
+
+        shm = shared_memory.SharedMemory(create=True, size=nbytes)
+        array = np.ndarray(source.shape, dtype=source.dtype, buffer=shm.buf)
+        array[...] = source
+        handle = SharedArrayHandle(shm.name, source.shape, source.dtype.str)
+        logger.info(
+            "Placed %s array (%.1f MB) in shared memory '%s'",
+            "x".join(str(d) for d in source.shape),
+            source.nbytes / 1e6,
+            shm.name,
+        )
+        return cls(array, handle, shm=shm, owner=True)
+
+    @classmethod
+    def attach(cls, handle: SharedArrayHandle) -> "SharedArray":
+        """Map an existing shared array read-only, without copying it."""
+        if handle.path is not None:
+            array = np.memmap(
+                handle.path, dtype=np.dtype(handle.dtype), mode="r", shape=handle.shape
+            )
+            return cls(array, handle)
+
+        shm = shared_memory.SharedMemory(name=handle.name)
+        array = np.ndarray(handle.shape, dtype=np.dtype(handle.dtype), buffer=shm.buf)
+        array.flags.writeable = False
+        return cls(array, handle, shm=shm)
+
+    def close(self) -> None:
+        self.array = None
+        if self._shm is not None:
+            self._shm.close()
+
+    def unlink(self) -> None:
+        """Release the segment; only the creating process should call this."""
+        self.close()
+        if not self._owner:
+            return
+        if self._shm is not None:
+            self._shm.unlink()
+        elif self.handle.path is not None:
+            Path(self.handle.path).unlink(missing_ok=True)
+
+
+def encode_dataframe(df: pd.DataFrame) -> Tuple[np.ndarray, ColumnSchema]:
+    """Encode a DataFrame into one float64 matrix plus its column schema.
+
+    Columns are split into continuous and discrete exactly as
+    ``pandas_data_to_tetrad`` does; discrete values become integer codes in
+    order of first appearance.
+    """
+    names = [str(col) for col in df.columns]
+    discrete = [str(df[col].dtype) not in CONTINUOUS_DTYPES for col in df.columns]
+    matrix = np.empty(df.shape, dtype=np.float64)
+    categories: Dict[str, List[str]] = {}
+
+    for j, col in enumerate(df.columns):
+        if discrete[j]:
+            codes, uniques = pd.factorize(df[col], sort=False, use_na_sentinel=False)
+            matrix[:, j] = codes
+            categories[names[j]] = [str(value) for value in uniques]
+        else:
+            matrix[:, j] = df[col].to_numpy(dtype=np.float64)
+
+    return matrix, ColumnSchema(names, discrete, categories)
+
+
+def resample_indices(
+    n_rows: int,
+    number_resampling: int,
+    percent_resample_size: float = 100,
+    with_replacement: bool = True,
+    seed: int = -1,
+) -> np.ndarray:
+    """Draw the row indices of every bootstrap resample in one vectorized call.
+
+    Returns an int array of shape ``(number_resampling, m)`` with
+    ``m = n_rows * percent_resample_size / 100``. A negative seed draws
+    fresh entropy, matching Tetrad's convention.
+    """
+    m = int(n_rows * percent_resample_size / 100)
+    if m <= 0:
+        raise ValueError(f"Resample size must be positive, got {m} rows.")
+    if not with_replacement and m > n_rows:
+        raise ValueError("Resample size exceeds the data size without replacement.")
+
+    rng = np.random.default_rng(None if seed is None or seed < 0 else seed)
+    if with_replacement:
+        indices = rng.integers(0, n_rows, size=(number_resampling, m))
+    else:
+        keys = rng.random((number_resampling, n_rows))
+        indices = np.argpartition(keys, m - 1, axis=1)[:, :m]
+        indices.sort(axis=1)
+    return indices.astype(np.int64 if n_rows > np.iinfo(np.int32).max else np.int32)
+
+
+def to_tetrad_dataset(
+    matrix: np.ndarray,
+    schema: ColumnSchema,
+    rows: Optional[np.ndarray] = None,
+    columns: Optional[Sequence[int]] = None,
+):
+    """Build a Tetrad ``BoxDataSet`` from (a view of) an encoded matrix.
+
+    Values are handed to Java as whole arrays rather than cell by cell.
+    ``rows`` selects a resample and ``columns`` a variable subset; when both
+    are None the shared matrix is transferred directly without an extra
+    NumPy copy. The JVM must already be running.
+    """
+    from jpype import JArray, JDouble, JInt
+    import edu.cmu.tetrad.data as td
+    import java.util as util
+
+    block = matrix
+    if rows is not None:
+        block = block[rows]
+    if columns is not None:
+        block = block[:, list(columns)]
+    column_ids = range(matrix.shape[1]) if columns is None else list(columns)
+
+    variables = util.ArrayList()
+    discrete = []
+    for j in column_ids:
+        name = schema.names[j]
+        discrete.append(schema.discrete[j])
+        if schema.discrete[j]:
+            categories = util.ArrayList()
+            for category in schema.categories[name]:
+                categories.add(category)
+            variables.add(td.DiscreteVariable(name, categories))
+        else:
+            variables.add(td.ContinuousVariable(name))
+
+    n = block.shape[0]
+    if not any(discrete):
+        databox = td.DoubleDataBox(JArray(JDouble, 2)(np.ascontiguousarray(block)))
+    elif all(discrete):
+        databox = td.IntDataBox(JArray(JInt, 2)(block.astype(np.int32)))
+    else:
+        # MixedDataBox stores columns, with null for the other type.
+        continuous_data = JArray(JDouble, 2)(len(discrete))
+        discrete_data = JArray(JInt, 2)(len(discrete))
+        for j, is_discrete in enumerate(discrete):
+            column = np.ascontiguousarray(block[:, j])
+            if is_discrete:
+                discrete_data[j] = JArray(JInt)(column.astype(np.int32))
+            else:
+                continuous_data[j] = JArray(JDouble)(column)
+        databox = td.MixedDataBox(variables, n, continuous_data, discrete_data)
+
+    return td.BoxDataSet(databox, variables)
@@ -0,0 +1,387 @@
+"""Covariance sufficient statistics for Gaussian tests and scores.
+
+For linear-Gaussian methods the search only needs the covariance matrix and
+the sample size. These helpers compute them in NumPy while streaming the CSV
+in row chunks, so the per-row data never has to be held in memory or passed
+to the JVM, and recompute resample covariances from bootstrap weights.
+"""
+
+import hashlib
+import io
+import json
+import logging
+import pickle
+from pathlib import Path
+from typing import IO, Any, Dict, Iterator, List, Optional, Set, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from src.shared_data import CONTINUOUS_DTYPES
+
+logger = logging.getLogger(__name__)
+
+# Gaussian methods that run on a covariance matrix, and what the methods
+# needing row data are replaced with. On purely continuous data the
+# degenerate Gaussian test/score reduce to the linear-Gaussian likelihood
+# ratio, which FisherZ and the SEM BIC compute from the covariance.
+COVARIANCE_METHODS = {
+    "use_fisher_z": "use_fisher_z",
+    "use_numpy_fisher_z": "use_numpy_fisher_z",
+    "use_sem_bic": "use_sem_bic",
+    "use_degenerate_gaussian_test": "use_fisher_z",
+    "use_degenerate_gaussian_score": "use_sem_bic",
+}
+COVARIANCE_ALGORITHMS = ["run_pc", "run_fges", "run_boss", "run_grasp"]
+
+
+class RunningMoments:
+    """Sample size, means and co-moments of continuous columns.
+
+    Blocks of rows are merged with Chan et al.'s pairwise update, so the
+    statistics of a file can be accumulated chunk by chunk.
+    """
+
+    def __init__(self, names: List[str]):
+        self.names = list(names)
+        p = len(self.names)
+        self.n = 0
+        self.mean = np.zeros(p)
+        self.comoment = np.zeros((p, p))
+
+    def update(self, block: np.ndarray) -> None:
+        block = np.asarray(block, dtype=np.float64)
+        m = block.shape[0]
+        if m == 0:
+            return
+
+        block_mean = block.mean(axis=0)
+        centered = block - block_mean
+        delta = block_mean - self.mean
+        total = self.n + m
+
+        self.comoment += centered.T @ centered + np.outer(delta, delta) * (
+            self.n * m / total
+        )
+        self.mean += delta * (m / total)
+        self.n = total
+
+    def covariance(self) -> np.ndarray:
+        if self.n < 2:
+            raise ValueError("At least two rows are needed for a covariance matrix.")
+        return self.comoment / (self.n - 1)
+
+    def digest(self) -> str:
+        """Content hash of the statistics, standing in for a data hash."""
+        digest = hashlib.sha1()
+        digest.update("\x1f".join(self.names).encode())
+        digest.update(np.int64(self.n).tobytes())
+        digest.update(self.mean.tobytes())
+        digest.update(self.comoment.tobytes())
+        return digest.hexdigest()[:16]
+
+
+def _declared_discrete(metadata_path: Optional[Path]) -> Dict[str, bool]:
+    """Whether each variable listed in the metadata is discrete."""
+    if metadata_path is None or not metadata_path.exists():
+        return {}
+    with open(metadata_path, "r", encoding="utf-8") as fh:
+        metadata = json.load(fh)
+    return {
+        domain["name"]: domain.get("discrete", True)
+        for domain in metadata.get("domains", [])
+    }
+
+
+def _check_continuous(
+    names: List[str], declared: Dict[str, bool], float_columns: Set[str]
+) -> None:
+    """Reject discrete columns, typed as ``load_data`` would type them.
+
+    Columns the metadata does not list are continuous only if pandas parsed
+    them as floats somewhere in the file; integer columns are discrete.
+    """
+    found = [name for name in names if declared.get(name, name not in float_columns)]
+    if found:
+        raise ValueError(
+            f"Covariance mode supports continuous data only; discrete columns: {found}. "
+            "Mark integer-valued continuous columns as continuous in the metadata."
+        )
+
+
+def iter_csv_blocks(
+    data_path: Union[Path, IO[bytes]], chunk_rows: int = 100_000
+) -> Iterator[Tuple[List[str], np.ndarray, Set[str]]]:
+    """Yield (column names, float64 block, float-typed columns) per row chunk of a CSV."""
+    try:
+        for chunk in pd.read_csv(data_path, chunksize=chunk_rows):
+            names = [str(col) for col in chunk.columns]
+            float_columns = {
+                name
+                for name, dtype in zip(names, chunk.dtypes)
+                if str(dtype) in CONTINUOUS_DTYPES
+            }
+            yield names, chunk.to_numpy(dtype=np.float64), float_columns
+    except ValueError as err:
+        raise ValueError(
+            f"Covariance mode needs numeric columns in '{data_path}': {err}"
+        ) from err
+
+
+def stream_moments(
+    data_path: Path,
+    metadata_path: Optional[Path] = None,
+    chunk_rows: int = 100_000,
+) -> RunningMoments:
+    """Accumulate the moments of a CSV file without loading it whole."""
+    moments: Optional[RunningMoments] = None
+    float_columns: Set[str] = set()
+
+    for names, block, chunk_floats in iter_csv_blocks(data_path, chunk_rows):
+        if moments is None:
+            moments = RunningMoments(names)
+        moments.update(block)
+        float_columns |= chunk_floats
+
+    if moments is None or moments.n == 0:
+        raise ValueError("Dataset contains no rows.")
+    _check_continuous(moments.names, _declared_discrete(metadata_path), float_columns)
+
+    logger.info(
+        "Computed covariance of %d variables over %d rows", len(moments.names), moments.n
+    )
+    return moments
+
+
+def update_moments(
+    data_path: Path,
+    state_path: Path,
+    metadata_path: Optional[Path] = None,
+    chunk_rows: int = 100_000,
+) -> Tuple[RunningMoments, int]:
+    """Bring the persisted moments of an append-only CSV up to date.
+
+    The state file keeps the moments, the header line and the byte offset up
+    to which rows have been read, so only rows appended since the last call
+    are parsed. A row counts once its line is terminated. If the header or
+    the bytes just before the offset changed, or the file got shorter, the
+    file was rewritten rather than appended to and the state is rebuilt.
+
+    :return: The updated moments and the number of new rows.
+    """
+    state = None
+    if state_path.exists():
+        with state_path.open("rb") as fh:
+            state = pickle.load(fh)
+
+    with data_path.open("rb") as fh:
+        header = fh.readline()
+        extends_state = False
+        if state and state["header"] == header and state["offset"] <= data_path.stat().st_size:
+            fh.seek(state["offset"] - len(state["anchor"]))
+            extends_state = fh.read(len(state["anchor"])) == state["anchor"]
+
+        if extends_state:
+            moments = state["moments"]
+            float_columns = state["float_columns"]
+        else:
+            if state:
+                logger.warning("%s no longer extends the saved state; rebuilding", data_path)
+            names = pd.read_csv(io.BytesIO(header), nrows=0).columns
+            moments = RunningMoments([str(col) for col in names])
+            float_columns = set()
+            fh.seek(len(header))
+        start = fh.tell()
+        tail = fh.read()
+        complete = tail.rfind(b"\n") + 1
+        offset = start + complete
+        fh.seek(max(0, offset - 64))
+        anchor = fh.read(offset - max(0, offset - 64))
+
+    previous_rows = moments.n
+    if complete:
+        buffer = io.BytesIO(header + tail[:complete])
+        for _, block, chunk_floats in iter_csv_blocks(buffer, chunk_rows):
+            moments.update(block)
+            float_columns |= chunk_floats
+    new_rows = moments.n - previous_rows
+
+    state_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = state_path.with_suffix(state_path.suffix + ".tmp")
+    with tmp_path.open("wb") as fh:
+        pickle.dump(
+            {
+                "header": header,
+                "offset": offset,
+                "anchor": anchor,
+                "moments": moments,
+                "float_columns": float_columns,
+            },
+            fh,
+            protocol=pickle.HIGHEST_PROTOCOL,
+        )
+    tmp_path.replace(state_path)
+
+    if moments.n == 0:
+        raise ValueError("Dataset contains no rows.")
+    _check_continuous(moments.names, _declared_discrete(metadata_path), float_columns)
+    logger.info(
+        "Updated covariance of %d variables with %d new rows (%d in total)",
+        len(moments.names), new_rows, moments.n,
+    )
+    return moments, new_rows
+
+
+class ResampleWeights:
+    """Per-row multiplicities of bootstrap resamples, drawn block by block.
+
+    Instead of drawing every resample's row indices up front (a resamples x
+    rows array), the counts of each block of rows are drawn conditionally on
+    the rows left: with replacement a resample of m rows puts a binomial
+    number of them into the next block and spreads those uniformly over the
+    block's rows (a multinomial), and without replacement the number is
+    hypergeometric and the rows are picked without repeats. Only one block
+    of counts is held at a time, and the draws do not depend on how the
+    caller's row chunks are sized.
+    """
+
+    def __init__(
+        self,
+        n_rows: int,
+        number_resampling: int,
+        percent_resample_size: float = 100,
+        with_replacement: bool = True,
+        seed: int = -1,
+        block_rows: int = 65_536,
+    ):
+        m = int(n_rows * percent_resample_size / 100)
+        if m <= 0:
+            raise ValueError(f"Resample size must be positive, got {m} rows.")
+        if not with_replacement and m > n_rows:
+            raise ValueError("Resample size exceeds the data size without replacement.")
+
+        self.n_rows = n_rows
+        self.with_replacement = with_replacement
+        self.block_rows = block_rows
+        self.sizes = np.full(number_resampling, m, dtype=np.int64)
+        self._rng = np.random.default_rng(None if seed is None or seed < 0 else seed)
+        self._rows_left = n_rows
+        self._draws_left = self.sizes.copy()
+        self._buffer = np.zeros((number_resampling, 0), dtype=np.int64)
+
+    @property
+    def num_resamples(self) -> int:
+        return len(self.sizes)
+
+    def _draw(self, rows: int) -> np.ndarray:
+        if self.with_replacement:
+            in_block = self._rng.binomial(self._draws_left, rows / self._rows_left)
+            counts = self._rng.multinomial(in_block, np.full(rows, 1.0 / rows))
+        else:
+            in_block = self._rng.hypergeometric(rows, self._rows_left - rows, self._draws_left)
+            counts = np.zeros((self.num_resamples, rows), dtype=np.int64)
+            for b, count in enumerate(in_block):
+                counts[b, self._rng.choice(rows, count, replace=False)] = 1
+        self._draws_left -= in_block
+        self._rows_left -= rows
+        return counts
+
+    def take(self, rows: int) -> np.ndarray:
+        """Multiplicities (resamples x rows) of the next ``rows`` rows."""
+        while self._buffer.shape[1] < rows:
+            if self._rows_left == 0:
+                raise ValueError(f"Only {self.n_rows} rows were expected.")
+            block = self._draw(min(self.block_rows, self._rows_left))
+            self._buffer = np.concatenate([self._buffer, block], axis=1)
+        counts, self._buffer = self._buffer[:, :rows], self._buffer[:, rows:]
+        return counts
+
+
+def resample_weights(n_rows: int, bootstrap_params: Dict[str, Any]) -> ResampleWeights:
+    """Per-row multiplicities of the configured bootstrap, drawn lazily."""
+    return ResampleWeights(
+        n_rows,
+        int(bootstrap_params.get("numberResampling", 0)),
+        bootstrap_params.get("percent_resample_size", 100),
+        bootstrap_params.get("with_replacement", True),
+        bootstrap_params.get("seed", -1),
+    )
+
+
+def weighted_covariances(
+    data_path: Path,
+    weights: ResampleWeights,
+    moments: RunningMoments,
+    chunk_rows: int = 100_000,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Covariance matrices of every resample, from one more pass over the file.
+
+    The weights of each chunk are drawn as the chunk is read, and sums are
+    taken around the full-data mean for numerical stability.
+
+    :return: Covariances of shape (resamples, p, p) and resample sizes.
+    """
+    num_resamples = weights.num_resamples
+    p = len(moments.names)
+    first = np.zeros((num_resamples, p))
+    second = np.zeros((num_resamples, p, p))
+
+    for _, block, _ in iter_csv_blocks(data_path, chunk_rows):
+        centered = block - moments.mean
+        counts = weights.take(block.shape[0])
+        for b in range(num_resamples):
+            w = counts[b].astype(np.float64)
+            first[b] += w @ centered
+            second[b] += (centered * w[:, None]).T @ centered
+
+    sizes = weights.sizes
+    covariances = (
+        second - first[:, :, None] * first[:, None, :] / sizes[:, None, None]
+    ) / (sizes - 1)[:, None, None]
+    return covariances, sizes
+
+
+def to_tetrad_covariance(covariance: np.ndarray, names: List[str], sample_size: int):
+    """Wrap a NumPy covariance matrix as a Tetrad ``CovarianceMatrix``."""
+    from jpype import JArray, JDouble
+    import edu.cmu.tetrad.data as td
+    import edu.cmu.tetrad.util as tu
+    import java.util as util
+
+    variables = util.ArrayList()
+    for name in names:
+        variables.add(td.ContinuousVariable(name))
+    matrix = tu.Matrix(JArray(JDouble, 2)(np.ascontiguousarray(covariance)))
+    return td.CovarianceMatrix(variables, matrix, int(sample_size))
+
+
+def covariance_configuration(configuration: Dict[str, Any]) -> Dict[str, Any]:
+    """Check a configuration for covariance mode, mapping methods that need rows."""
+    algorithm = configuration["algorithm_name"].lower()
+    if algorithm not in COVARIANCE_ALGORITHMS:
+        raise ValueError(
+            f"Algorithm '{algorithm}' needs row data. "
+            f"Covariance mode supports: {COVARIANCE_ALGORITHMS}"
+        )
+
+    configuration = dict(configuration)
+    for key in ("test", "score"):
+        name = configuration.get(f"{key}_name")
+        if not name:
+            continue
+        if name not in COVARIANCE_METHODS:
+            raise ValueError(
+                f"'{name}' cannot run on a covariance matrix. "
+                f"Choices: {list(COVARIANCE_METHODS)}"
+            )
+
+        mapped = COVARIANCE_METHODS[name]
+        params = dict(configuration.get(f"{key}_params") or {})
+        if mapped == "use_sem_bic" and "structure_prior" in params:
+            params["structurePrior"] = params.pop("structure_prior")
+        if mapped != name:
+            logger.info("Covariance mode: using %s in place of %s", mapped, name)
+        configuration[f"{key}_name"] = mapped
+        configuration[f"{key}_params"] = params
+
+    return configuration
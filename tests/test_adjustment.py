@@ -0,0 +1,29 @@
+import numpy as np
+
+from src.adjustment import ancestor_matrix
+
+NAMES = ["A", "B", "C", "D", "E"]
+
+
+def test_directed_paths_reach_descendants_only():
+    edges = [("A", "B", "TAIL", "ARROW"), ("B", "C", "TAIL", "ARROW"), ("D", "C", "TAIL", "ARROW")]
+    reach = ancestor_matrix(NAMES, edges)
+    expected = np.zeros((5, 5), dtype=bool)
+    expected[0, [1, 2]] = expected[1, 2] = expected[3, 2] = True
+    np.testing.assert_array_equal(reach, expected)
+
+
+def test_undirected_and_circle_edges_go_both_ways():
+    edges = [("A", "B", "TAIL", "TAIL"), ("B", "C", "CIRCLE", "ARROW"), ("D", "E", "ARROW", "ARROW")]
+    reach = ancestor_matrix(NAMES, edges)
+    assert reach[0, 1] and reach[1, 0] and reach[0, 2]
+    assert not reach[2, 1]
+    assert not reach[3, 4] and not reach[4, 3]
+
+
+def test_long_chain_is_closed_transitively():
+    names = [f"X{i}" for i in range(20)]
+    edges = [(names[i], names[i + 1], "TAIL", "ARROW") for i in range(19)]
+    reach = ancestor_matrix(names, edges)
+    np.testing.assert_array_equal(reach, np.triu(np.ones((20, 20), dtype=bool), 1))
+
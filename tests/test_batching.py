@@ -0,0 +1,54 @@
+import threading
+import time
+
+import pytest
+
+from src.batching import BatchQueue
+
+
+def test_lone_caller_does_not_wait_the_window():
+    queue = BatchQueue(lambda queries: [q * 2 for q in queries], window=5.0)
+    start = time.perf_counter()
+    assert queue.submit(21) == 42
+    assert time.perf_counter() - start < 1.0
+    assert queue.batches == 1
+
+
+def test_concurrent_callers_are_batched():
+    release = threading.Event()
+    sizes = []
+
+    def evaluate(queries):
+        release.wait(5)
+        sizes.append(len(queries))
+        return [q * 2 for q in queries]
+
+    queue = BatchQueue(evaluate, window=0.01, max_batch=16)
+    results = {}
+
+    def call(q):
+        results[q] = queue.submit(q)
+
+    threads = [threading.Thread(target=call, args=(q,)) for q in range(40)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.1)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert results == {q: q * 2 for q in range(40)}
+    assert queue.queries == 40
+    assert queue.batches < 40
+    assert max(sizes) <= 16
+
+
+def test_errors_reach_every_caller_in_the_batch():
+    def evaluate(queries):
+        raise RuntimeError("boom")
+
+    queue = BatchQueue(evaluate)
+    with pytest.raises(RuntimeError):
+        queue.submit(1)
+    with pytest.raises(RuntimeError):
+        queue.submit(2)
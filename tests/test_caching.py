@@ -0,0 +1,47 @@
+import pandas as pd
+
+from src.caching import LruCache, _approx_size, data_hash
+
+
+def test_lru_evicts_least_recently_used():
+    entry = _approx_size(("sig", 0)) + _approx_size((0.5, -0.1))
+    cache = LruCache(max_memory_mb=3.5 * entry / (1024 * 1024))
+    for key in range(3):
+        cache.put(("sig", key), (0.5, -0.1))
+    cache.get(("sig", 0))
+    cache.put(("sig", 3), (0.5, -0.1))
+    assert ("sig", 0) in cache
+    assert ("sig", 1) not in cache
+    assert cache.evictions == 1
+
+
+def test_hit_rate_counts_lookups():
+    cache = LruCache()
+    cache.put("a", 1)
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    stats = cache.stats("test_cache")
+    assert stats["test_cache_hits"] == 1
+    assert stats["test_cache_misses"] == 1
+    assert stats["test_cache_hit_rate"] == 0.5
+
+
+def test_save_and_load_round_trip(tmp_path):
+    path = tmp_path / "cache.pkl"
+    cache = LruCache(path=path)
+    cache.put(("sig", "X1", "X2", frozenset({"X3"})), (0.25, -0.2))
+    cache.save()
+    assert LruCache(path=path).get(("sig", "X1", "X2", frozenset({"X3"}))) == (0.25, -0.2)
+
+
+def test_unreadable_cache_file_is_ignored(tmp_path):
+    path = tmp_path / "cache.pkl"
+    path.write_bytes(b"not a pickle")
+    assert len(LruCache(path=path)) == 0
+
+
+def test_data_hash_depends_on_values_and_names():
+    df = pd.DataFrame({"X1": [1.0, 2.0], "X2": [3.0, 4.0]})
+    assert data_hash(df) == data_hash(df.copy())
+    assert data_hash(df) != data_hash(df.rename(columns={"X2": "X3"}))
+    assert data_hash(df) != data_hash(df.assign(X2=[3.0, 5.0]))
@@ -0,0 +1,28 @@
+import numpy as np
+import pandas as pd
+
+from benchmarks.conversion import random_frame, random_graph, regressions
+
+
+def test_random_frame_column_kinds():
+    frame = random_frame(50, 6, "mixed")
+    continuous = [pd.api.types.is_float_dtype(dtype) for dtype in frame.dtypes]
+    assert continuous == [False] * 3 + [True] * 3
+    assert random_frame(50, 4, "continuous").equals(random_frame(50, 4, "continuous"))
+
+
+def test_random_graph_is_a_dag():
+    graph = random_graph(30, avg_degree=4.0)
+    directed = graph.directed()
+    assert graph.num_edges == int(directed.sum())
+    assert not np.tril(directed).any()
+
+
+def test_regressions_keep_only_slower_cases():
+    baseline = pd.DataFrame({
+        "benchmark": ["a", "b"], "size": ["s", "s"], "seconds": [1.0, 1.0], "throughput": [1.0, 1.0],
+    })
+    results = baseline.assign(seconds=[1.2, 1.5], throughput=[0.8, 0.6])
+    slower = regressions(results, baseline, threshold=0.25)
+    assert slower["benchmark"].tolist() == ["b"]
+    assert slower["slowdown"].iloc[0] == 0.5
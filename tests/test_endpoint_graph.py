@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+from src.endpoint_graph import EndpointGraph
+from src.graph_io import ARROW, CIRCLE, TAIL
+
+NAMES = ["A", "B", "C", "D"]
+EDGES = [
+    ("A", "B", "TAIL", "ARROW"),
+    ("B", "C", "TAIL", "TAIL"),
+    ("C", "D", "CIRCLE", "ARROW"),
+    ("A", "D", "ARROW", "ARROW"),
+]
+
+
+@pytest.fixture
+def graph():
+    return EndpointGraph.from_edges(NAMES, EDGES)
+
+
+def test_text_round_trip(graph):
+    text = graph.to_text()
+    assert "1. A --> B" in text and "C o-> D" in text and "A <-> D" in text
+    assert EndpointGraph.from_text(text) == graph
+
+
+def test_file_round_trip(tmp_path, graph):
+    path = tmp_path / "graph.txt"
+    path.write_text(graph.to_text())
+    assert EndpointGraph.read(path) == graph
+
+
+def test_edge_tuples_round_trip(graph):
+    assert EndpointGraph.from_edges(NAMES, graph.edges()) == graph
+    assert graph.num_edges == 4
+
+
+def test_edge_queries(graph):
+    assert graph.endpoint("A", "B") == ARROW and graph.endpoint("B", "A") == TAIL
+    assert graph.symbol("B", "A") == "<--"
+    assert graph.is_directed("A", "B") and not graph.is_directed("B", "A")
+    assert graph.is_undirected("B", "C")
+    assert graph.is_bidirected("A", "D")
+    assert graph.has_circle("D", "C") and graph.endpoint("D", "C") == CIRCLE
+    assert graph.parents("B") == ["A"] and graph.children("A") == ["B"]
+    assert graph.neighbors("B") == ["C"]
+    assert graph.adjacent_nodes("A") == ["B", "D"]
+    with pytest.raises(ValueError):
+        graph.symbol("A", "C")
+
+
+def test_skeleton_is_symmetric(graph):
+    skeleton = graph.skeleton()
+    np.testing.assert_array_equal(skeleton, skeleton.T)
+    assert not skeleton.diagonal().any()
+
+
+def test_diff_aligns_node_order(graph):
+    other = EndpointGraph.from_edges(
+        ["D", "C", "B", "A"],
+        [("A", "B", "TAIL", "ARROW"), ("B", "C", "ARROW", "TAIL"), ("B", "D", "TAIL", "ARROW")],
+    )
+    assert graph.diff(other) == {
+        "added": [("B", "D")],
+        "removed": [("A", "D"), ("C", "D")],
+        "changed": [("B", "C")],
+    }
+    with pytest.raises(ValueError):
+        graph.diff(EndpointGraph(["A", "B"]))
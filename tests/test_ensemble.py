@@ -0,0 +1,47 @@
+import pytest
+
+from src.ensemble import agreement_matrix, consensus_edges, edge_table, parse_algorithms
+
+GRAPHS = {
+    "run_pc": [("X1", "X2", "TAIL", "ARROW"), ("X2", "X3", "TAIL", "TAIL")],
+    "run_fges": [("X2", "X1", "ARROW", "TAIL"), ("X2", "X3", "TAIL", "ARROW")],
+    "run_boss": [("X1", "X2", "TAIL", "ARROW"), ("X3", "X4", "TAIL", "ARROW")],
+}
+
+
+def test_parse_algorithms_numbers_repeated_names():
+    algorithms = parse_algorithms(["run_pc", {"name": "RUN_BOSS", "params": {"use_bes": True}}, "run_pc"])
+    assert algorithms == [
+        ("run_pc_1", "run_pc", {}),
+        ("run_boss", "run_boss", {"use_bes": True}),
+        ("run_pc_2", "run_pc", {}),
+    ]
+
+
+def test_parse_algorithms_rejects_empty_entries():
+    with pytest.raises(ValueError):
+        parse_algorithms([])
+    with pytest.raises(ValueError):
+        parse_algorithms([{"params": {}}])
+
+
+def test_edge_table_lists_each_algorithms_edge():
+    table = edge_table(list(GRAPHS), list(GRAPHS.values())).set_index(["node1", "node2"])
+    row = table.loc[("X1", "X2")]
+    assert (row["run_pc"], row["run_fges"], row["run_boss"]) == ("-->", "-->", "-->")
+    assert row["support"] == 1.0 and row["agreement"] == 1.0
+    row = table.loc[("X2", "X3")]
+    assert row["run_boss"] == "" and row["support"] == pytest.approx(2 / 3)
+    assert row["agreement"] == pytest.approx(1 / 3)
+
+
+def test_agreement_is_the_jaccard_index_of_adjacencies():
+    matrix = agreement_matrix(list(GRAPHS), list(GRAPHS.values()))
+    assert matrix.loc["run_pc", "run_fges"] == 1.0
+    assert matrix.loc["run_pc", "run_boss"] == pytest.approx(1 / 3)
+    assert matrix.loc["run_boss", "run_boss"] == 1.0
+
+
+def test_consensus_keeps_supported_pairs_with_majority_orientation():
+    edges = consensus_edges(list(GRAPHS.values()), min_support=0.5)
+    assert edges == [("X1", "X2", "TAIL", "ARROW"), ("X2", "X3", "TAIL", "TAIL")]
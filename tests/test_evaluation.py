@@ -0,0 +1,66 @@
+import json
+
+import numpy as np
+import pytest
+
+from src.endpoint_graph import EndpointGraph
+from src.evaluation import evaluate_batch, evaluate_runs, read_edges_dict, threshold_stack
+
+NAMES = ["A", "B", "C"]
+TRUTH = EndpointGraph.from_edges(NAMES, [("A", "B", "TAIL", "ARROW"), ("B", "C", "TAIL", "ARROW")])
+ESTIMATE = EndpointGraph.from_edges(
+    NAMES,
+    [("A", "B", "TAIL", "ARROW"), ("C", "B", "TAIL", "ARROW"), ("A", "C", "TAIL", "TAIL")],
+)
+
+
+def test_metrics_of_the_truth_and_an_estimate():
+    metrics = evaluate_batch(TRUTH.matrix, np.stack([TRUTH.matrix, ESTIMATE.matrix]))
+    np.testing.assert_array_equal(metrics["num_edges"], [2, 3])
+    np.testing.assert_allclose(metrics["adj_precision"], [1.0, 2 / 3])
+    np.testing.assert_allclose(metrics["adj_recall"], [1.0, 1.0])
+    np.testing.assert_allclose(metrics["adj_f1"], [1.0, 0.8])
+    np.testing.assert_allclose(metrics["arrow_precision"], [1.0, 0.5])
+    np.testing.assert_allclose(metrics["arrow_recall"], [1.0, 0.5])
+    np.testing.assert_array_equal(metrics["shd"], [0, 2])
+    np.testing.assert_array_equal(metrics["sid_ancestral"], [0, 3])
+
+
+def test_empty_estimate_has_undefined_precision():
+    metrics = evaluate_batch(TRUTH.matrix, np.zeros((1, 3, 3), dtype=np.int8))
+    assert np.isnan(metrics["adj_precision"][0])
+    assert metrics["adj_f1"][0] == 0.0
+
+
+def test_threshold_stack_drops_improbable_edges():
+    probability = np.array([[0, 0.9, 0], [0.9, 0, 0.4], [0, 0.4, 0]])
+    stack = threshold_stack(TRUTH.matrix, probability, [0.3, 0.5])
+    assert EndpointGraph(NAMES, stack[0]) == TRUTH
+    assert EndpointGraph(NAMES, stack[1]).num_edges == 1
+
+
+def test_read_edges_dict(tmp_path):
+    path = tmp_path / "true_edges_dict.json"
+    path.write_text(json.dumps({
+        "('X1', 'X2')": "source->target", "('X3', 'X2')": "target->source",
+        "('X1', 'X10')": "no_edge",
+    }))
+    names, matrix = read_edges_dict(path)
+    assert names == ["X1", "X2", "X3", "X10"]
+    graph = EndpointGraph(names, matrix)
+    assert graph.is_directed("X1", "X2") and graph.is_directed("X2", "X3")
+    assert graph.num_edges == 2
+
+
+def test_evaluate_runs_matches_truth_folders(tmp_path):
+    truth_dir = tmp_path / "truths" / "chain"
+    truth_dir.mkdir(parents=True)
+    (truth_dir / "tetrad.txt").write_text(TRUTH.to_text())
+    run_dir = tmp_path / "runs" / "chain"
+    run_dir.mkdir(parents=True)
+    (run_dir / "pc.txt").write_text(ESTIMATE.to_text())
+
+    frame = evaluate_runs([run_dir / "pc.txt"], {"chain": truth_dir})
+    assert len(frame) == 1
+    assert frame.loc[0, "shd"] == 2
+    assert frame.loc[0, "adj_precision"] == pytest.approx(2 / 3)
@@ -0,0 +1,57 @@
+import json
+
+import numpy as np
+import pytest
+
+from src.endpoint_graph import EndpointGraph
+from src.export import export_graph, export_paths, load_npz, render_dot
+
+TEXT = """Graph Nodes:
+X1;X2;X3
+
+Graph Edges:
+1. X1 --> X2 [no edge]:0.2000;[X1 --> X2]:0.8000;
+2. X2 o-o X3 [X2 o-o X3]:0.6000;
+"""
+
+
+def test_export_paths_sit_next_to_the_output(tmp_path):
+    paths = export_paths(tmp_path / "graph.txt", ["tetrad", "clean_dot", "npz"])
+    assert paths == {
+        "tetrad": tmp_path / "graph.txt",
+        "clean_dot": tmp_path / "graph_clean.dot",
+        "npz": tmp_path / "graph.npz",
+    }
+    with pytest.raises(ValueError):
+        export_paths(tmp_path / "graph.txt", ["png"])
+
+
+def test_every_format_holds_the_same_graph(tmp_path):
+    paths = export_graph(TEXT, tmp_path / "graph.txt", ["tetrad", "dot", "clean_dot", "json", "npz"])
+    expected = EndpointGraph.from_text(TEXT)
+
+    assert paths["tetrad"].read_text() == TEXT
+    dot = paths["dot"].read_text()
+    assert '"X1" -> "X2" [dir=both, arrowtail=none, arrowhead=normal, label="0.80"];' in dot
+    assert "arrowtail=odot, arrowhead=odot" in dot
+    assert "label" not in paths["clean_dot"].read_text()
+
+    data = json.loads(paths["json"].read_text())
+    assert data["nodes"] == ["X1", "X2", "X3"]
+    assert [edge["edge"] for edge in data["edges"]] == ["X1 --> X2", "X2 o-o X3"]
+    assert data["edges"][0]["probability"] == pytest.approx(0.8)
+
+    loaded = load_npz(paths["npz"])
+    assert loaded == expected
+    np.testing.assert_allclose(loaded.probability, expected.probability)
+
+
+def test_default_formats(tmp_path):
+    paths = export_graph(TEXT, tmp_path / "graph.txt")
+    assert sorted(paths) == ["clean_dot", "dot", "tetrad"]
+    assert all(path.exists() for path in paths.values())
+
+
+def test_dot_without_probabilities_has_no_labels():
+    graph = EndpointGraph.from_edges(["A", "B"], [("A", "B", "TAIL", "ARROW")])
+    assert "label" not in render_dot(graph)
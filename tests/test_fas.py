@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+from src.fas import fas_stable
+from src.partial_correlation import PartialCorrelationEngine
+
+
+@pytest.fixture(scope="module")
+def chain():
+    """X0 -> X1 -> X2 -> X3, and X4 independent of the rest."""
+    rng = np.random.default_rng(0)
+    n = 2000
+    data = np.empty((n, 5))
+    data[:, 0] = rng.standard_normal(n)
+    for k in (1, 2, 3):
+        data[:, k] = 0.8 * data[:, k - 1] + rng.standard_normal(n)
+    data[:, 4] = rng.standard_normal(n)
+    return data
+
+
+def edges(adjacency):
+    return {(int(i), int(j)) for i, j in zip(*np.nonzero(np.triu(adjacency, 1)))}
+
+
+def test_recovers_chain_skeleton_and_sepsets(chain):
+    adjacency, sepsets = fas_stable(PartialCorrelationEngine(chain), alpha=0.01)
+    assert edges(adjacency) == {(0, 1), (1, 2), (2, 3)}
+    assert sepsets[(0, 4)] == ()
+    assert sepsets[(0, 2)] == (1,)
+
+
+def test_forbidden_pairs_are_removed_untested(chain):
+    adjacency, sepsets = fas_stable(PartialCorrelationEngine(chain), forbidden=[(1, 2)])
+    assert (1, 2) not in edges(adjacency)
+    assert (1, 2) not in sepsets
+
+
+def test_required_pairs_are_kept_untested(chain):
+    engine = PartialCorrelationEngine(chain)
+    adjacency, sepsets = fas_stable(engine, alpha=0.01, required=[(0, 2), (3, 4)])
+    assert edges(adjacency) == {(0, 1), (1, 2), (2, 3), (0, 2), (3, 4)}
+    assert (0, 2) not in sepsets and (3, 4) not in sepsets
+
+
+def test_depth_limits_conditioning_sets(chain):
+    adjacency, _ = fas_stable(PartialCorrelationEngine(chain), alpha=0.01, depth=0)
+    assert (0, 2) in edges(adjacency)
+
+
+def test_matches_causal_learn_stable_skeleton(chain):
+    pc = pytest.importorskip("causallearn.search.ConstraintBased.PC")
+    cg = pc.pc(chain, 0.01, "fisherz", stable=True, show_progress=False)
+    expected = {(i, j) for i in range(5) for j in range(i + 1, 5) if cg.G.graph[i, j] != 0}
+    adjacency, _ = fas_stable(PartialCorrelationEngine(chain), alpha=0.01)
+    assert edges(adjacency) == expected
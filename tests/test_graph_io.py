@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+
+from src.graph_io import (
+    ARROW,
+    CIRCLE,
+    TAIL,
+    directed_edges,
+    edge_tuples,
+    is_graph_file,
+    parse_graph,
+    read_graph_dir,
+)
+
+OUTPUT = """Graph Nodes:
+X1;X2;X3;X4
+
+Graph Edges:
+1. X1 --> X2 [no edge]:0.1000;[X1 --> X2]:0.9000;
+2. X2 o-> X3 [X2 o-> X3]:0.5000;[X3 --> X2]:0.2500;
+3. X3 <-> X4
+
+Graph Attributes:
+BIC: -1234.5
+"""
+
+TRUTH = """Graph Nodes:
+X1;X2;X3
+
+1. X1 --> X2
+2. X3 --- X2
+"""
+
+
+def test_parse_output_format_with_frequencies():
+    names, matrix, probability = parse_graph(OUTPUT.splitlines())
+    assert names == ["X1", "X2", "X3", "X4"]
+    assert (matrix[0, 1], matrix[1, 0]) == (ARROW, TAIL)
+    assert (matrix[1, 2], matrix[2, 1]) == (ARROW, CIRCLE)
+    assert (matrix[2, 3], matrix[3, 2]) == (ARROW, ARROW)
+    assert matrix[0, 2] == 0
+    assert probability[0, 1] == probability[1, 0] == pytest.approx(0.9)
+    assert probability[1, 2] == pytest.approx(0.75)
+    assert probability[2, 3] == 0.0
+
+
+def test_parse_ground_truth_format():
+    names, matrix, probability = parse_graph(TRUTH.splitlines())
+    assert probability is None
+    assert directed_edges(names, matrix) == [("X1", "X2")]
+    assert edge_tuples(names, matrix) == [
+        ("X1", "X2", "TAIL", "ARROW"),
+        ("X2", "X3", "TAIL", "TAIL"),
+    ]
+
+
+def test_unknown_node_is_an_error():
+    with pytest.raises(ValueError):
+        parse_graph(["Graph Nodes:", "X1;X2", "", "Graph Edges:", "1. X1 --> X9"])
+
+
+def test_read_graph_dir_skips_other_files(tmp_path):
+    (tmp_path / "a.txt").write_text(OUTPUT)
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "sub" / "b.txt").write_text(TRUTH)
+    (tmp_path / "notes.txt").write_text("not a graph\n")
+    graphs = read_graph_dir(tmp_path)
+    assert sorted(path.name for path in graphs) == ["a.txt", "b.txt"]
+    assert not is_graph_file(tmp_path / "notes.txt")
+    np.testing.assert_array_equal(graphs[tmp_path / "a.txt"][1], parse_graph(OUTPUT.splitlines())[1])
@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+from src.kernel_ci import KernelCiEngine
+
+QUERIES = [
+    (0, 1, ()),
+    (0, 3, ()),
+    (0, 1, (2,)),
+    (3, 4, (0,)),
+    (0, 1, (2, 3)),
+    (1, 4, (0, 2, 3)),
+]
+
+
+@pytest.fixture(scope="module")
+def data():
+    rng = np.random.default_rng(0)
+    n = 400
+    z = rng.standard_normal(n)
+    x = z + 0.5 * rng.standard_normal(n)
+    y = np.tanh(z) + 0.5 * rng.standard_normal(n)
+    w = rng.standard_normal(n)
+    v = 0.3 * x + rng.standard_normal(n)
+    return np.column_stack([x, y, z, w, v])
+
+
+@pytest.mark.parametrize("est_width", ["empirical", "median"])
+def test_matches_causal_learn_kci(data, est_width):
+    cit = pytest.importorskip("causallearn.utils.cit")
+    reference = cit.CIT(data, "kci", est_width=est_width)
+    engine = KernelCiEngine(data, est_width=est_width)
+    for x, y, z in QUERIES:
+        expected = reference(x, y, list(z))
+        if z:
+            # causal-learn truncates tiny eigenvalues before the gamma fit
+            assert engine.pvalue(x, y, z) == pytest.approx(expected, abs=1e-3)
+        else:
+            assert engine.pvalue(x, y, z) == pytest.approx(expected, rel=1e-9, abs=1e-12)
+
+
+@pytest.mark.parametrize("est_width", ["empirical", "median"])
+def test_detects_dependence_and_conditional_independence(data, est_width):
+    engine = KernelCiEngine(data, est_width=est_width)
+    assert engine.pvalue(0, 1) < 1e-3
+    assert engine.pvalue(0, 3) > 0.01
+    assert engine.pvalue(0, 1, (2,)) > 0.01
+
+
+def test_batched_pvalues_match_single(data):
+    engine = KernelCiEngine(data)
+    single = [KernelCiEngine(data).pvalue(*query) for query in QUERIES]
+    np.testing.assert_allclose(engine.pvalues(QUERIES, num_threads=3), single)
+
+
+def test_nystroem_close_to_exact():
+    rng = np.random.default_rng(1)
+    data = rng.standard_normal((1500, 3))
+    data[:, 1] += data[:, 0]
+    exact = KernelCiEngine(data)
+    approx = KernelCiEngine(data, approximation_rank=300)
+    assert approx.pvalue(0, 1) < 1e-6
+    assert approx.pvalue(0, 2) == pytest.approx(exact.pvalue(0, 2), abs=0.05)
+    assert approx.pvalue(0, 2, (1,)) == pytest.approx(exact.pvalue(0, 2, (1,)), abs=0.05)
+
+
+def test_rejects_unknown_width_rule(data):
+    with pytest.raises(ValueError):
+        KernelCiEngine(data, est_width="manual")
@@ -0,0 +1,97 @@
+import numpy as np
+import pytest
+
+from src.markov_check import (
+    MarkovCheckResult,
+    dag_parents,
+    implied_independencies,
+    markov_summary,
+    sample_facts,
+)
+from src.partial_correlation import PartialCorrelationEngine
+
+NAMES = ["X1", "X2", "X3", "X4"]
+# X1 -> X2 -> X3 <- X4
+EDGES = [("X1", "X2", "TAIL", "ARROW"), ("X2", "X3", "TAIL", "ARROW"), ("X3", "X4", "ARROW", "TAIL")]
+
+
+def fact_set(facts):
+    return {(facts.names[x], facts.names[y], tuple(facts.names[k] for k in z))
+            for x, y, z in facts.queries()}
+
+
+def test_dag_parents():
+    assert dag_parents(NAMES, EDGES) == [[], [0], [1, 3], []]
+    with pytest.raises(ValueError):
+        dag_parents(NAMES, [("X1", "X2", "TAIL", "TAIL")])
+
+
+def test_local_markov_facts():
+    facts = implied_independencies(NAMES, dag_parents(NAMES, EDGES), "local_markov")
+    assert fact_set(facts) == {
+        ("X1", "X4", ()), ("X2", "X4", ("X1",)), ("X3", "X1", ("X2", "X4")),
+        ("X4", "X1", ()), ("X4", "X2", ()),
+    }
+
+
+def test_ordered_local_markov_tests_each_pair_once():
+    facts = implied_independencies(NAMES, dag_parents(NAMES, EDGES))
+    pairs = [frozenset((x, y)) for x, y, _ in fact_set(facts)]
+    assert len(pairs) == len(set(pairs)) == 3
+
+
+def test_cycles_are_rejected():
+    with pytest.raises(ValueError):
+        implied_independencies(["A", "B"], [[1], [0]])
+
+
+def test_sample_facts_keeps_order():
+    facts = implied_independencies(NAMES, dag_parents(NAMES, EDGES), "local_markov")
+    sample = sample_facts(facts, 3, seed=0)
+    assert len(sample) == 3
+    assert fact_set(sample) <= fact_set(facts)
+    assert sample_facts(facts, None) is facts
+
+
+def test_true_graph_passes_and_wrong_graph_fails():
+    rng = np.random.default_rng(0)
+    n = 3000
+    x1 = rng.standard_normal(n)
+    x2 = x1 + rng.standard_normal(n)
+    x4 = rng.standard_normal(n)
+    x3 = x2 + x4 + rng.standard_normal(n)
+    engine = PartialCorrelationEngine(np.column_stack([x1, x2, x3, x4]))
+
+    facts = implied_independencies(NAMES, dag_parents(NAMES, EDGES), "local_markov")
+    result = MarkovCheckResult(facts, engine.pvalues(facts.queries()), 0.05)
+    assert result.summary()["fraction_dependent"] <= 0.4
+    assert list(result.to_frame().columns) == ["x", "y", "z", "p_value"]
+
+    # Without X1 -> X2 the graph implies X1 _||_ X2, which the data reject.
+    wrong = implied_independencies(NAMES, [[], [], [1, 3], []], "local_markov")
+    frame = MarkovCheckResult(wrong, engine.pvalues(wrong.queries()), 0.05).to_frame()
+    assert (frame.query("x == 'X2' and y == 'X1'")["p_value"] < 1e-10).all()
+
+
+def test_summary_of_uniform_pvalues():
+    summary = markov_summary(np.linspace(0.005, 0.995, 100), 0.05)
+    assert summary["num_tests"] == 100
+    assert summary["fraction_dependent"] == pytest.approx(0.05)
+    assert summary["ks_pvalue"] > 0.9
+    assert markov_summary(np.array([np.nan]), 0.05) == {"num_tests": 0}
+
+
+def test_deduplicate_facts_shares_symmetric_facts():
+    from src.markov_check import deduplicate_facts
+
+    first = implied_independencies(NAMES, dag_parents(NAMES, EDGES), "local_markov")
+    second = implied_independencies(NAMES, dag_parents(NAMES, EDGES[:2]), "local_markov")
+    unique, positions = deduplicate_facts([first, second])
+
+    assert len(unique) < len(first) + len(second)
+    for facts, where in zip((first, second), positions):
+        for (x, y, z), k in zip(facts.queries(), where):
+            assert {unique.x[k], unique.y[k]} == {x, y}
+            assert unique.z[k] == tuple(sorted(z))
+    with pytest.raises(ValueError):
+        deduplicate_facts([])
@@ -0,0 +1,31 @@
+import pytest
+
+from src.multi_start import score_summary, start_orders, start_seeds
+
+
+def test_first_start_keeps_data_order():
+    orders = start_orders(5, 4, seed=1)
+    assert orders[0] == [0, 1, 2, 3, 4]
+    assert all(sorted(order) == [0, 1, 2, 3, 4] for order in orders)
+    assert orders == start_orders(5, 4, seed=1)
+
+
+def test_fixed_orders_when_not_random():
+    assert start_orders(3, 2, random_orders=False) == [[0, 1, 2], [0, 1, 2]]
+
+
+def test_at_least_one_start():
+    with pytest.raises(ValueError):
+        start_orders(3, 0)
+
+
+def test_seeds_are_distinct_and_reproducible():
+    seeds = start_seeds(8, seed=3)
+    assert len(set(seeds)) == 8
+    assert seeds == start_seeds(8, seed=3)
+
+
+def test_score_summary():
+    summary = score_summary([1.0, 2.0, 6.0])
+    assert summary == {"min": 1.0, "median": 2.0, "mean": 3.0, "max": 6.0,
+                       "std": pytest.approx(2.160246899)}
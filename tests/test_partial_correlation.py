@@ -0,0 +1,72 @@
+import math
+
+import numpy as np
+import pytest
+from scipy import stats
+
+from src.partial_correlation import PartialCorrelationEngine
+
+
+@pytest.fixture(scope="module")
+def data():
+    rng = np.random.default_rng(0)
+    values = rng.standard_normal((500, 6)) @ rng.standard_normal((6, 6))
+    return values
+
+
+def pinv_partial_correlation(data, x, y, z):
+    """Partial correlation from the pseudo-inverse of the correlation submatrix."""
+    r = np.corrcoef(data, rowvar=False)
+    index = [x, y, *z]
+    precision = np.linalg.pinv(r[np.ix_(index, index)])
+    return -precision[0, 1] / math.sqrt(precision[0, 0] * precision[1, 1])
+
+
+def fisher_z_pvalue(rho, n, k):
+    return 2 * stats.norm.sf(math.sqrt(n - k - 3) * abs(math.atanh(rho)))
+
+
+QUERIES = [(0, 1, ()), (0, 1, (2,)), (2, 5, (0, 1)), (3, 4, (5, 1, 0)), (1, 5, (0, 2, 3, 4))]
+
+
+def test_partial_correlations_match_pinv(data):
+    engine = PartialCorrelationEngine(data)
+    for x, y, z in QUERIES:
+        rho = engine.partial_correlations([x], [y], z)[0]
+        assert rho == pytest.approx(pinv_partial_correlation(data, x, y, z), abs=1e-10)
+
+
+def test_pvalues_match_fisher_z(data):
+    engine = PartialCorrelationEngine(data)
+    pvalues = engine.pvalues(QUERIES)
+    for (x, y, z), pvalue in zip(QUERIES, pvalues):
+        expected = fisher_z_pvalue(pinv_partial_correlation(data, x, y, z), len(data), len(z))
+        assert pvalue == pytest.approx(expected, rel=1e-8)
+
+
+def test_matches_causal_learn_fisher_z(data):
+    cit = pytest.importorskip("causallearn.utils.cit")
+    reference = cit.CIT(data, "fisherz")
+    engine = PartialCorrelationEngine(data)
+    for x, y, z in QUERIES:
+        assert engine.pvalue(x, y, z) == pytest.approx(reference(x, y, list(z)), rel=1e-8)
+
+
+def test_collinear_conditioning_variable_matches_pinv(data):
+    data = np.column_stack([data, data[:, 0] + 2 * data[:, 1]])
+    engine = PartialCorrelationEngine(data)
+    rho = engine.partial_correlations([2], [3], (0, 1, 6))[0]
+    assert rho == pytest.approx(pinv_partial_correlation(data, 2, 3, (0, 1, 6)), abs=1e-8)
+
+
+def test_from_covariance_matches_rows(data):
+    from_rows = PartialCorrelationEngine(data)
+    from_covariance = PartialCorrelationEngine.from_covariance(
+        np.cov(data, rowvar=False), len(data)
+    )
+    np.testing.assert_allclose(from_rows.pvalues(QUERIES), from_covariance.pvalues(QUERIES))
+
+
+def test_conditioning_order_does_not_matter(data):
+    engine = PartialCorrelationEngine(data)
+    assert engine.pvalue(3, 4, (5, 1, 0)) == engine.pvalue(3, 4, (0, 1, 5))
@@ -0,0 +1,76 @@
+import numpy as np
+
+from src.partition import (
+    add_overlap,
+    association_matrix,
+    correlation_blocks,
+    merge_block_edges,
+)
+
+
+def block_correlation():
+    """Two groups of strongly correlated variables, {0, 1, 2} and {3, 4, 5}."""
+    r = np.full((6, 6), 0.05)
+    r[:3, :3] = r[3:, 3:] = 0.9
+    r[2, 3] = r[3, 2] = 0.4
+    np.fill_diagonal(r, 1.0)
+    return r
+
+
+def test_blocks_follow_correlation_groups():
+    blocks = correlation_blocks(block_correlation(), max_block_size=3)
+    assert sorted(blocks) == [[0, 1, 2], [3, 4, 5]]
+
+
+def test_small_problems_are_one_block():
+    assert correlation_blocks(block_correlation(), max_block_size=10) == [list(range(6))]
+
+
+def test_overlap_adds_most_correlated_outside_variable():
+    blocks = add_overlap(block_correlation(), [[0, 1, 2], [3, 4, 5]], overlap=1)
+    assert blocks == [[0, 1, 2, 3], [2, 3, 4, 5]]
+
+
+def test_merge_takes_core_edges_and_votes_across_blocks():
+    names = ["A", "B", "C", "D"]
+    cores = [[0, 1], [2, 3]]
+    blocks = [[0, 1, 2], [1, 2, 3]]
+    block_edges = [
+        [("A", "B", "TAIL", "ARROW"), ("B", "C", "TAIL", "ARROW")],
+        [("B", "C", "TAIL", "ARROW"), ("C", "D", "TAIL", "ARROW"), ("A", "B", "ARROW", "TAIL")],
+    ]
+    edges, counts = merge_block_edges(names, cores, blocks, block_edges)
+    assert edges == [
+        ("A", "B", "TAIL", "ARROW"),
+        ("B", "C", "TAIL", "ARROW"),
+        ("C", "D", "TAIL", "ARROW"),
+    ]
+    assert counts == {"reconciled_pairs": 1, "broken_cycles": 0}
+
+
+def test_merge_breaks_cycles_at_reconciled_edges():
+    names = ["A", "B", "C"]
+    cores = [[0, 1], [2]]
+    blocks = [[0, 1, 2], [0, 1, 2]]
+    cycle = [("A", "B", "TAIL", "ARROW"), ("B", "C", "TAIL", "ARROW"), ("C", "A", "TAIL", "ARROW")]
+    edges, counts = merge_block_edges(names, cores, blocks, [cycle, cycle])
+    assert counts["broken_cycles"] == 1
+    assert ("A", "B", "TAIL", "ARROW") in edges
+    assert sum(edge[2:] == ("TAIL", "TAIL") for edge in edges) == 1
+
+
+def test_association_matrix_measures_discrete_columns():
+    rng = np.random.default_rng(0)
+    n = 3000
+    group = rng.integers(0, 3, n)
+    # The mean of x is not monotone in the group codes, so |r| of the codes is ~0.
+    x = np.array([0.0, 2.0, 0.0])[group] + 0.5 * rng.standard_normal(n)
+    noisy = np.where(rng.random(n) < 0.9, group, rng.integers(0, 3, n))
+    matrix = np.column_stack([group, x, noisy, rng.integers(0, 2, n), rng.standard_normal(n)])
+    association = association_matrix(matrix, [True, False, True, True, False])
+
+    np.testing.assert_allclose(association, association.T)
+    np.testing.assert_allclose(np.diag(association), 1.0)
+    assert association[0, 1] > 0.8 and association[0, 2] > 0.8
+    assert association[0, 3] < 0.1 and association[1, 4] < 0.1 and association[2, 4] < 0.1
+    assert sorted(correlation_blocks(association, max_block_size=3))[0] == [0, 1, 2]
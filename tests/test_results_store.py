@@ -0,0 +1,71 @@
+import pytest
+
+from src.results_store import ResultsStore, edge_frequencies, ingest, params_hash
+
+BOOTSTRAP = """Graph Nodes:
+X1;X2;X3
+
+Graph Edges:
+1. X2 --> X1 [no edge]:0.1000;[X2 --> X1]:0.7000;[X1 --> X2]:0.2000;
+"""
+
+PLAIN = """Graph Nodes:
+X1;X2;X3
+
+Graph Edges:
+1. X1 --> X2
+2. X2 --- X3
+"""
+
+
+@pytest.fixture
+def store(tmp_path):
+    with ResultsStore(tmp_path / "results.db") as store:
+        yield store
+
+
+def test_params_hash_ignores_key_order():
+    assert params_hash({"a": 1, "b": [2]}) == params_hash({"b": [2], "a": 1})
+    assert params_hash({"a": 1}) != params_hash({"a": 2})
+
+
+def test_edge_frequencies_are_stored_by_sorted_pair():
+    assert edge_frequencies(BOOTSTRAP) == [
+        ("X1", "X2", "no edge", 0.1),
+        ("X1", "X2", "X2 --> X1", 0.7),
+        ("X1", "X2", "X1 --> X2", 0.2),
+    ]
+
+
+def test_edge_history_reads_the_edge_either_way(store):
+    first = store.add_run(BOOTSTRAP, "d1", "run_pc", configuration={"alpha": 0.01})
+    second = store.add_run(PLAIN, "d1", "run_fges", elapsed_seconds=1.5, metrics={"bic": -3})
+    store.add_run(PLAIN, "d2", "run_fges")
+
+    history = store.edge_history("X2", "X1", dataset="d1")
+    assert history["run_id"].tolist() == [first, second]
+    assert history["edge"].tolist() == ["X2 --> X1", "X2 <-- X1"]
+    assert history["probability"].iloc[0] == pytest.approx(0.9)
+
+    missing = store.edge_history("X1", "X3")
+    assert missing["edge"].isna().all() and len(missing) == 3
+
+
+def test_runs_and_frequencies_queries(store):
+    store.add_runs([
+        {"graph_text": BOOTSTRAP, "dataset": "d1", "algorithm": "run_pc"},
+        {"graph_text": PLAIN, "dataset": "d1", "algorithm": "run_boss"},
+    ])
+    assert store.runs(algorithm="run_boss")["dataset"].tolist() == ["d1"]
+    frequencies = store.edge_frequencies("X2", "X1")
+    assert dict(zip(frequencies["edge"], frequencies["frequency"]))["X2 --> X1"] == 0.7
+
+
+def test_ingest_reads_algorithm_and_dataset_from_folders(tmp_path, store):
+    folder = tmp_path / "output" / "run_pc" / "synth"
+    folder.mkdir(parents=True)
+    (folder / "graph.txt").write_text(PLAIN)
+    (folder / "log.txt").write_text("not a graph\n")
+    assert len(ingest(store, tmp_path / "output")) == 1
+    runs = store.runs()
+    assert (runs.loc[0, "algorithm"], runs.loc[0, "dataset"]) == ("run_pc", "synth")
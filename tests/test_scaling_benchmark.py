@@ -0,0 +1,61 @@
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from benchmarks.scaling import (
+    DAG_ALGORITHMS,
+    compare,
+    dataset_seed,
+    expand_grid,
+    run_configurations,
+)
+from src.load_parse import load_yaml
+
+GRID = load_yaml(Path(__file__).parents[1] / "benchmarks" / "scaling.yaml")
+
+
+def test_grid_expands_smallest_first():
+    datasets = expand_grid(GRID)
+    assert len(datasets) == 3 * 3 * 4 * 2
+    sizes = [(d["p"], d["n"], d["avg_degree"]) for d in datasets]
+    assert sizes == sorted(sizes)
+
+
+def test_unknown_data_type_is_rejected():
+    with pytest.raises(ValueError):
+        expand_grid({"data_types": {"ordinal": {}}})
+
+
+def test_configurations_respect_data_type_restrictions():
+    continuous = {algorithm for algorithm, _, _ in run_configurations(GRID, "continuous")}
+    discrete = {algorithm for algorithm, _, _ in run_configurations(GRID, "discrete")}
+    assert {"run_dagma", "run_direct_lingam"} <= continuous
+    assert not {"run_dagma", "run_direct_lingam"} & discrete
+    assert {"run_dagma", "run_direct_lingam"} <= set(DAG_ALGORITHMS)
+
+    for algorithm, resamples, configuration in run_configurations(GRID, "continuous"):
+        assert configuration["test_name"] == "use_fisher_z"
+        assert ("bootstrap_params" in configuration) == (resamples > 0)
+
+
+def test_dataset_seed_is_stable_per_cell():
+    cell = {"data_type": "continuous", "n": 500, "p": 20, "avg_degree": 2.0, "repeat": 0}
+    assert dataset_seed(cell, 1000) == dataset_seed(dict(cell), 1000)
+    assert dataset_seed(cell, 1000) != dataset_seed({**cell, "repeat": 1}, 1000)
+
+
+def _results(wall_seconds, adj_f1):
+    return pd.DataFrame([{
+        "data_type": "continuous", "n": 500, "p": 20, "avg_degree": 2.0,
+        "algorithm": "run_pc", "bootstrap": 0, "status": "ok",
+        "wall_seconds": wall_seconds, "cpu_seconds": 1.0, "heap_peak_mb": 100.0,
+        "adj_f1": adj_f1, "arrow_f1": 0.8, "shd": 4,
+    }])
+
+
+def test_compare_flags_slower_and_less_accurate_cells():
+    table = compare(_results(2.0, 0.7), _results(1.0, 0.9), tolerance=0.2)
+    assert table.loc[0, "wall_seconds_ratio"] == 2.0
+    assert table.loc[0, "regressions"] == "wall_seconds adj_f1"
+    assert compare(_results(1.1, 0.9), _results(1.0, 0.9)).loc[0, "regressions"] == ""
@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import stats
+
+from src.partial_correlation import PartialCorrelationEngine
+from src.screening import correlation_screen, mutual_information_screen, screen_pairs
+
+
+@pytest.fixture(scope="module")
+def data():
+    """X1 -> X2 -> X3, X4 independent; X5 and X6 discrete and dependent."""
+    rng = np.random.default_rng(0)
+    n = 2000
+    x1 = rng.standard_normal(n)
+    x2 = x1 + rng.standard_normal(n)
+    x3 = x2 + rng.standard_normal(n)
+    x4 = rng.standard_normal(n)
+    x5 = rng.integers(0, 3, n)
+    x6 = np.where(rng.random(n) < 0.8, x5, rng.integers(0, 3, n))
+    return pd.DataFrame({
+        "X1": x1, "X2": x2, "X3": x3, "X4": x4,
+        "X5": x5.astype(str), "X6": x6.astype(str),
+    })
+
+
+def test_correlation_screen_keeps_dependent_pairs(data):
+    engine = PartialCorrelationEngine(data[["X1", "X2", "X3", "X4"]].to_numpy())
+    pruned = correlation_screen(engine, alpha=0.1)
+    assert not pruned[0, 1] and not pruned[1, 2] and not pruned[0, 2]
+    assert pruned[0, 3] and pruned[1, 3] and pruned[2, 3]
+    assert not np.tril(pruned).any()
+
+
+def test_first_order_screen_removes_separated_pairs(data):
+    engine = PartialCorrelationEngine(data[["X1", "X2", "X3", "X4"]].to_numpy())
+    assert correlation_screen(engine, alpha=0.01, order=1)[0, 2]
+
+
+def test_mutual_information_matches_g_test(data):
+    pvalue = stats.chi2_contingency(
+        pd.crosstab(data["X1"] > 0, data["X4"] > 0), correction=False, lambda_="log-likelihood"
+    )[1]
+    halves = pd.DataFrame({"A": (data["X1"] > 0).astype(str), "B": (data["X4"] > 0).astype(str)})
+    pruned = mutual_information_screen(halves, alpha=pvalue - 1e-9)
+    assert pruned[0, 1]
+    assert not mutual_information_screen(halves, alpha=pvalue + 1e-9)[0, 1]
+
+
+def test_screen_pairs_names_screened_pairs(data):
+    pairs = screen_pairs({"method": "mutual_information", "alpha": 0.1}, data)
+    assert ("X5", "X6") not in pairs and ("X1", "X2") not in pairs
+    assert ("X1", "X4") in pairs
+
+
+def test_screen_pairs_rejects_unknown_method(data):
+    with pytest.raises(ValueError):
+        screen_pairs({"method": "lasso"}, data)
+
+
+def test_correlation_screen_tests_discrete_pairs_with_g_test():
+    """C changes the spread of X but not its mean, so no coding of C correlates with X."""
+    rng = np.random.default_rng(1)
+    n = 3000
+    category = rng.integers(0, 3, n)
+    x = np.array([0.3, 1.0, 3.0])[category] * rng.standard_normal(n)
+    df = pd.DataFrame({
+        "C": np.array(["a", "b", "c"])[category],
+        "X": x,
+        "Y": x + rng.standard_normal(n),
+        "Z": rng.standard_normal(n),
+    })
+    pairs = screen_pairs({"method": "correlation", "alpha": 0.1}, df)
+    assert ("C", "X") not in pairs and ("X", "Y") not in pairs
+    assert ("C", "Z") in pairs and ("X", "Z") in pairs and ("Y", "Z") in pairs
@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.shared_data import SharedArray, encode_dataframe, resample_indices
+
+
+def test_encode_dataframe_keeps_values_and_categories():
+    df = pd.DataFrame({"X1": [0.5, 1.5, 2.5], "X2": ["b", "a", "b"], "X3": [1, 2, 3]})
+    matrix, schema = encode_dataframe(df)
+    assert schema.names == ["X1", "X2", "X3"]
+    assert schema.discrete == [False, True, True]
+    assert schema.categories["X2"] == ["b", "a"]
+    np.testing.assert_array_equal(matrix[:, 0], [0.5, 1.5, 2.5])
+    np.testing.assert_array_equal(matrix[:, 1], [0, 1, 0])
+
+
+@pytest.mark.parametrize("memmap", [False, True])
+def test_attached_array_sees_the_shared_copy(tmp_path, memmap):
+    source = np.arange(12, dtype=np.float64).reshape(4, 3)
+    shared = SharedArray.create(source, tmp_path if memmap else None)
+    try:
+        attached = SharedArray.attach(shared.handle)
+        np.testing.assert_array_equal(attached.array, source)
+        assert not attached.array.flags.writeable
+        attached.close()
+    finally:
+        shared.unlink()
+
+
+def test_resample_indices_shape_and_seed():
+    first = resample_indices(100, 5, 50, with_replacement=True, seed=1)
+    assert first.shape == (5, 50)
+    assert first.min() >= 0 and first.max() < 100
+    np.testing.assert_array_equal(first, resample_indices(100, 5, 50, True, seed=1))
+
+
+def test_resample_indices_without_replacement_are_distinct():
+    indices = resample_indices(100, 4, 80, with_replacement=False, seed=2)
+    for rows in indices:
+        assert len(set(rows.tolist())) == 80
+
+
+def test_resample_indices_reject_oversized_resamples():
+    with pytest.raises(ValueError):
+        resample_indices(10, 1, 200, with_replacement=False)
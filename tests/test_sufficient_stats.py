@@ -0,0 +1,157 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.sufficient_stats import (
+    ResampleWeights,
+    RunningMoments,
+    covariance_configuration,
+    stream_moments,
+    update_moments,
+    weighted_covariances,
+)
+
+
+@pytest.fixture(scope="module")
+def data():
+    rng = np.random.default_rng(0)
+    values = rng.standard_normal((1000, 4)) @ rng.standard_normal((4, 4)) + 100.0
+    return pd.DataFrame(values, columns=["X1", "X2", "X3", "X4"])
+
+
+@pytest.fixture
+def csv(tmp_path, data):
+    path = tmp_path / "data.csv"
+    data.to_csv(path, index=False)
+    return path
+
+
+def test_chunked_update_matches_one_pass_covariance(data):
+    moments = RunningMoments(list(data.columns))
+    for start in range(0, len(data), 137):
+        moments.update(data.to_numpy()[start : start + 137])
+    assert moments.n == len(data)
+    np.testing.assert_allclose(moments.mean, data.mean().to_numpy())
+    np.testing.assert_allclose(moments.covariance(), np.cov(data.to_numpy(), rowvar=False))
+
+
+def test_stream_moments_reads_the_csv_in_chunks(csv, data):
+    moments = stream_moments(csv, chunk_rows=300)
+    np.testing.assert_allclose(moments.covariance(), np.cov(data.to_numpy(), rowvar=False))
+
+
+def test_integer_columns_are_discrete_unless_the_metadata_says_otherwise(tmp_path, data):
+    path = tmp_path / "data.csv"
+    counts = data.assign(X4=np.arange(len(data)) % 7)
+    counts.to_csv(path, index=False)
+    with pytest.raises(ValueError, match="X4"):
+        stream_moments(path)
+    with pytest.raises(ValueError, match="X4"):
+        update_moments(path, tmp_path / "state.pkl")
+
+    metadata = tmp_path / "metadata.json"
+    metadata.write_text(json.dumps({"domains": [{"name": "X4", "discrete": False}]}))
+    moments = stream_moments(path, metadata)
+    np.testing.assert_allclose(moments.covariance(), np.cov(counts.to_numpy(), rowvar=False))
+
+
+def test_a_column_with_any_float_chunk_is_continuous(tmp_path, data):
+    path = tmp_path / "data.csv"
+    data.iloc[:900].assign(X4=np.arange(900) % 7).to_csv(path, index=False)
+    data.iloc[900:].assign(X4=0.5).to_csv(path, mode="a", header=False, index=False)
+    moments = stream_moments(path, chunk_rows=300)
+    assert moments.n == len(data)
+
+
+def test_covariance_configuration_maps_row_methods():
+    configuration = covariance_configuration({
+        "algorithm_name": "run_boss",
+        "score_name": "use_degenerate_gaussian_score",
+        "score_params": {"penalty_discount": 2},
+    })
+    assert configuration["score_name"] == "use_sem_bic"
+    with pytest.raises(ValueError):
+        covariance_configuration({"algorithm_name": "run_direct_lingam"})
+    with pytest.raises(ValueError):
+        covariance_configuration({"algorithm_name": "run_pc", "test_name": "use_kci"})
+
+
+def test_update_moments_reads_only_appended_rows(tmp_path, data):
+    path = tmp_path / "data.csv"
+    state = tmp_path / "state.pkl"
+    data.iloc[:600].to_csv(path, index=False)
+    _, new_rows = update_moments(path, state)
+    assert new_rows == 600
+
+    data.iloc[600:].to_csv(path, mode="a", header=False, index=False)
+    moments, new_rows = update_moments(path, state)
+    assert new_rows == 400
+    np.testing.assert_allclose(moments.covariance(), np.cov(data.to_numpy(), rowvar=False))
+
+
+@pytest.mark.parametrize("with_replacement", [True, False])
+def test_resample_weights_have_the_resample_size(with_replacement):
+    weights = ResampleWeights(1000, 5, 50, with_replacement, seed=3, block_rows=128)
+    counts = np.concatenate([weights.take(300), weights.take(700)], axis=1)
+    assert counts.shape == (5, 1000)
+    np.testing.assert_array_equal(counts.sum(axis=1), weights.sizes)
+    assert (weights.sizes == 500).all()
+    if not with_replacement:
+        assert counts.max() == 1
+
+
+def test_resample_weights_do_not_depend_on_chunking():
+    whole = ResampleWeights(1000, 3, seed=7, block_rows=256).take(1000)
+    weights = ResampleWeights(1000, 3, seed=7, block_rows=256)
+    parts = np.concatenate([weights.take(k) for k in (1, 99, 400, 500)], axis=1)
+    np.testing.assert_array_equal(whole, parts)
+
+
+def test_resample_weights_reject_extra_rows():
+    weights = ResampleWeights(10, 2, seed=0)
+    weights.take(10)
+    with pytest.raises(ValueError):
+        weights.take(1)
+
+
+def test_weighted_covariances_match_repeated_rows(csv, data):
+    moments = stream_moments(csv)
+    counts = ResampleWeights(len(data), 4, seed=11, block_rows=100).take(len(data))
+    weights = ResampleWeights(len(data), 4, seed=11, block_rows=100)
+    covariances, sizes = weighted_covariances(csv, weights, moments, chunk_rows=333)
+
+    for b in range(4):
+        resample = np.repeat(data.to_numpy(), counts[b], axis=0)
+        assert sizes[b] == len(resample)
+        np.testing.assert_allclose(covariances[b], np.cov(resample, rowvar=False))
+
+
+def test_update_moments_rebuilds_after_a_rewrite(tmp_path, data):
+    path = tmp_path / "data.csv"
+    state = tmp_path / "state.pkl"
+    data.to_csv(path, index=False)
+    update_moments(path, state)
+
+    data.iloc[:500].to_csv(path, index=False)
+    moments, new_rows = update_moments(path, state)
+    assert moments.n == new_rows == 500
+    np.testing.assert_allclose(
+        moments.covariance(), np.cov(data.iloc[:500].to_numpy(), rowvar=False)
+    )
+
+
+def test_update_moments_waits_for_unterminated_rows(tmp_path, data):
+    path = tmp_path / "data.csv"
+    state = tmp_path / "state.pkl"
+    data.iloc[:10].to_csv(path, index=False)
+    with path.open("a") as fh:
+        fh.write("1.0,2.0,3.0")
+    moments, _ = update_moments(path, state)
+    assert moments.n == 10
+
+    with path.open("a") as fh:
+        fh.write(",4.0\n")
+    moments, new_rows = update_moments(path, state)
+    assert (moments.n, new_rows) == (11, 1)
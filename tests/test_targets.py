@@ -0,0 +1,32 @@
+import pytest
+
+from src.targets import parse_targets, target_tasks, union_edges
+
+
+def test_parse_targets_accepts_lists_and_strings():
+    assert parse_targets("X1, X2 X3") == ["X1", "X2", "X3"]
+    assert parse_targets(["X1", "X2"]) == ["X1", "X2"]
+    with pytest.raises(ValueError):
+        parse_targets("")
+
+
+def test_one_task_per_target():
+    tasks = target_tasks("run_fges_mb", {"max_degree": 3}, ["X1", "X2"])
+    assert tasks == [
+        (None, "run_fges_mb", {"max_degree": 3, "targets": "X1"}),
+        (None, "run_fges_mb", {"max_degree": 3, "targets": "X2"}),
+    ]
+
+
+def test_target_mode_needs_a_local_algorithm():
+    with pytest.raises(ValueError):
+        target_tasks("run_pc", {}, ["X1"])
+
+
+def test_union_undirects_conflicting_orientations():
+    edges = union_edges([
+        [("X1", "X2", "TAIL", "ARROW"), ("X2", "X3", "TAIL", "ARROW")],
+        [("X2", "X1", "ARROW", "TAIL"), ("X3", "X2", "TAIL", "ARROW")],
+        [("X2", "X3", "TAIL", "ARROW")],
+    ])
+    assert edges == [("X1", "X2", "TAIL", "ARROW"), ("X2", "X3", "TAIL", "TAIL")]
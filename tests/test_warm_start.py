@@ -0,0 +1,42 @@
+import pytest
+
+from src.warm_start import causal_order, warm_start_order
+
+GRAPH = """Graph Nodes:
+X1;X2;X3;X4
+
+Graph Edges:
+1. X3 --> X1
+2. X1 --> X2
+3. X2 --- X4
+"""
+
+
+def test_causal_order_keeps_data_order_on_ties():
+    names = ["X1", "X2", "X3", "X4"]
+    assert causal_order(names, [("X3", "X1"), ("X1", "X2")]) == ["X3", "X1", "X2", "X4"]
+
+
+def test_variables_on_a_cycle_follow_in_data_order():
+    names = ["X1", "X2", "X3"]
+    assert causal_order(names, [("X1", "X2"), ("X2", "X1"), ("Z", "X3")]) == ["X3", "X1", "X2"]
+
+
+def test_order_from_a_previous_graph(tmp_path):
+    path = tmp_path / "graph.txt"
+    path.write_text(GRAPH)
+    names = ["X1", "X2", "X3", "X4"]
+    assert warm_start_order({"graph": "previous"}, names, path) == ["X3", "X1", "X2", "X4"]
+    assert warm_start_order({"graph": str(path)}, names) == ["X3", "X1", "X2", "X4"]
+
+
+def test_given_order_skips_unknown_and_appends_unlisted():
+    names = ["X1", "X2", "X3", "X4"]
+    assert warm_start_order({"order": ["X4", "Y", "X2"]}, names) == ["X4", "X2", "X1", "X3"]
+
+
+def test_missing_graph_is_an_error(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        warm_start_order({"graph": str(tmp_path / "none.txt")}, ["X1"])
+    with pytest.raises(ValueError):
+        warm_start_order({}, ["X1"])